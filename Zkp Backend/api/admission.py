@@ -0,0 +1,232 @@
+"""
+PER-CLIENT ADMISSION CONTROL
+
+Responsibilities:
+1. Tell verifier institutions apart by peer address, or by
+   CLIENT_ID_HEADER when a gateway that authenticates them is configured
+   (a header any caller can set would let a client pick a fresh quota or
+   another client's priority)
+2. Token-bucket quota per client, charged per unit of work: one token
+   per check, per proof in a batch, per job and per stream record.
+   Once it is spent, 429 + Retry-After; streams are paced instead
+3. Give each client a priority (high / normal / low) for load shedding;
+   a request may lower its own with "X-Priority", never raise it
+
+Fair queuing across clients and shedding against the latency target
+happen in the proving limiter (api/concurrency.py) and the job queue
+(api/jobs.py): waiters are charged to their client's share, so one
+bank's bulk campaign against /verify-both queues behind its own
+requests, not everyone else's.
+
+Config (environment):
+    CLIENT_ID_HEADER      header naming the client, trusted only when set
+                          (e.g. "X-Client-Id"; default: off, peer address)
+    CLIENT_GATEWAYS       peer addresses allowed to set that header, comma
+                          separated (default: any peer; the app is then
+                          reachable only through the gateway)
+    CLIENT_RATE           requests per second per client (default 10)
+    CLIENT_BURST          requests a client may send at once (default 20)
+    CLIENT_QUOTAS         per-client "rate:burst", e.g. "bank-a=50:100,campaign=2:5"
+    CLIENT_WEIGHTS        share of proving slots, e.g. "bank-a=2" (default 1)
+    CLIENT_PRIORITIES     highest priority per client, e.g. "ops=high,campaign=low"
+                          (default normal)
+    MAX_TRACKED_CLIENTS   quota buckets kept before the idlest is dropped (default 10000)
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request
+
+from monitoring.metrics import Counter, Gauge
+from prover.scheduler import parse_weights
+
+CLIENT_ID_HEADER = os.getenv("CLIENT_ID_HEADER", "").strip()
+CLIENT_GATEWAYS = {
+    address.strip() for address in os.getenv("CLIENT_GATEWAYS", "").split(",") if address.strip()
+}
+CLIENT_RATE = float(os.getenv("CLIENT_RATE", "10"))
+CLIENT_BURST = float(os.getenv("CLIENT_BURST", "20"))
+MAX_TRACKED_CLIENTS = int(os.getenv("MAX_TRACKED_CLIENTS", "10000"))
+
+PRIORITIES = ("low", "normal", "high")
+
+
+def _parse_map(text):
+    entries = {}
+    for part in text.split(","):
+        name, _, value = part.partition("=")
+        if name.strip() and value.strip():
+            entries[name.strip()] = value.strip()
+    return entries
+
+
+def _parse_quota(value):
+    rate, _, burst = value.partition(":")
+    return float(rate), float(burst or rate)
+
+
+CLIENT_QUOTAS = {
+    name: _parse_quota(value) for name, value in _parse_map(os.getenv("CLIENT_QUOTAS", "")).items()
+}
+CLIENT_WEIGHTS = parse_weights(os.getenv("CLIENT_WEIGHTS", ""))
+CLIENT_PRIORITIES = _parse_map(os.getenv("CLIENT_PRIORITIES", ""))
+
+for _name, _priority in CLIENT_PRIORITIES.items():
+    if _priority not in PRIORITIES:
+        raise ValueError(f"CLIENT_PRIORITIES: {_name} has unknown priority {_priority}")
+
+
+class Client:
+
+    __slots__ = ("id", "priority")
+
+    def __init__(self, client_id, priority="normal"):
+        self.id = client_id
+        self.priority = priority
+
+
+# ==========================================================
+# TOKEN BUCKETS
+# ==========================================================
+
+class QuotaTable:
+    """
+    One token bucket per client, refilled lazily on use. Only touched from
+    the event loop (the dependencies are async), so no lock.
+    """
+
+    def __init__(self, rate=CLIENT_RATE, burst=CLIENT_BURST, overrides=None,
+                 max_clients=MAX_TRACKED_CLIENTS):
+        self.default = (rate, burst)
+        self.overrides = CLIENT_QUOTAS if overrides is None else overrides
+        self.max_clients = max(1, max_clients)
+        # client → [tokens, last refill]; least recently seen first
+        self._buckets = OrderedDict()
+        self.throttled = 0
+
+    def burst(self, client_id):
+        return self.overrides.get(client_id, self.default)[1]
+
+    def take(self, client_id, tokens=1, count=True):
+        """0 if admitted, else seconds until the client has enough tokens."""
+        rate, burst = self.overrides.get(client_id, self.default)
+        now = time.monotonic()
+
+        bucket = self._buckets.pop(client_id, None)
+        if bucket is None:
+            bucket = [burst, now]
+            # a dropped bucket comes back full: only idle clients get dropped
+            while len(self._buckets) >= self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        self._buckets[client_id] = bucket
+
+        if bucket[0] >= tokens:
+            bucket[0] -= tokens
+            return 0
+
+        if count:
+            self.throttled += 1
+        return (tokens - bucket[0]) / rate if rate > 0 else math.inf
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+quotas = QuotaTable()
+
+
+# ==========================================================
+# FASTAPI DEPENDENCY
+# ==========================================================
+
+def client_id(request):
+    peer = request.client.host if request.client else "unknown"
+
+    # 🔹 only a configured (and, if listed, known) gateway names the client
+    if CLIENT_ID_HEADER and (not CLIENT_GATEWAYS or peer in CLIENT_GATEWAYS):
+        header = request.headers.get(CLIENT_ID_HEADER, "").strip()
+        if header:
+            return header[:128]
+
+    return peer
+
+
+def client_priority(request, name):
+    ceiling = CLIENT_PRIORITIES.get(name, "normal")
+    asked = request.headers.get("X-Priority", ceiling).lower()
+
+    if asked not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Unknown priority: {asked}")
+
+    return PRIORITIES[min(PRIORITIES.index(asked), PRIORITIES.index(ceiling))]
+
+
+async def admit(request: Request):
+    """
+    Dependency for single-check endpoints: charges the client one token
+    and returns who it is, for the proving limiter. (async so the buckets
+    are only ever touched from the event loop)
+    """
+    client = await identify(request)
+    charge(client)
+    return client
+
+
+async def identify(request: Request):
+    """Dependency for bulk endpoints, which charge per item themselves."""
+    name = client_id(request)
+    return Client(name, client_priority(request, name))
+
+
+def charge(client, tokens=1):
+    """Take tokens from the client's quota or raise 429 (413 if it can never fit)."""
+    if tokens > quotas.burst(client.id):
+        raise HTTPException(
+            status_code=413,
+            detail=f"{tokens} items exceed the quota of client {client.id} "
+                   f"({quotas.burst(client.id):g} at once), split the request"
+        )
+
+    retry_after = quotas.take(client.id, tokens)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Request quota exceeded for client {client.id}, retry later",
+            headers={"Retry-After": str(max(1, math.ceil(min(retry_after, 3600))))}
+        )
+
+
+async def pace(client, tokens=1):
+    """
+    Streams: wait until the quota covers the next record instead of
+    failing it, so a long upload runs at the client's rate.
+    """
+    counted = True
+    while True:
+        retry_after = quotas.take(client.id, tokens, count=counted)
+        if not retry_after:
+            return
+        if retry_after == math.inf:
+            charge(client, tokens)
+        counted = False
+        await asyncio.sleep(retry_after)
+
+
+Counter(
+    "kyc_client_throttled_total",
+    "Requests turned away with 429 because the client's quota was spent",
+    callback=lambda: quotas.throttled
+)
+
+Gauge(
+    "kyc_clients_tracked",
+    "Clients with a quota bucket",
+    callback=lambda: len(quotas)
+)
@@ -0,0 +1,203 @@
+"""
+PROVING CONCURRENCY LIMIT
+
+Responsibilities:
+1. Cap how many proofs run at once (one per prover worker by default)
+2. Cap how many requests may wait for a free slot
+3. Reject with 503 + Retry-After when a request cannot start in time
+4. Hand a freed slot to the waiter the scheduler picks (prover/scheduler.py),
+   so cheap address checks are not stuck behind a burst of kyc proofs;
+   waiters queue per (client, circuit) (api/admission.py), so one
+   client's burst queues behind its own requests of the same circuit
+5. Shed load early: estimate the wait for a slot from the queued work
+   (prover/scheduler.py cost model) and reject at once with 503
+       low priority     when the wait is past PROVER_SLO_SECONDS
+       normal priority  when it is past PROVER_QUEUE_TIMEOUT (it would time out anyway)
+       high priority    only when the queue is full
+
+Without this, a burst of requests piles up on the threadpool until the
+box runs out of memory instead of failing fast.
+
+Config (environment):
+    PROVER_CONCURRENCY     proofs running at once (default PROVER_POOL_SIZE)
+    PROVER_QUEUE_LIMIT     requests allowed to wait for a slot (default 32)
+    PROVER_QUEUE_TIMEOUT   seconds a request may wait before 503 (default 5)
+    RETRY_AFTER_SECONDS    Retry-After value sent with 503 (default 2)
+    PROVER_SLO_SECONDS     target wait for a proving slot (default 1)
+    VERIFIER_CONCURRENCY   client proofs verified at once (default 1)
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+from monitoring.metrics import Counter, Gauge
+from api.admission import CLIENT_WEIGHTS
+from prover.scheduler import Scheduler
+from prover.worker_pool import POOL_SIZE
+
+MAX_CONCURRENCY = int(os.getenv("PROVER_CONCURRENCY", str(POOL_SIZE)))
+MAX_QUEUE = int(os.getenv("PROVER_QUEUE_LIMIT", "32"))
+QUEUE_TIMEOUT = float(os.getenv("PROVER_QUEUE_TIMEOUT", "5"))
+RETRY_AFTER_SECONDS = int(os.getenv("RETRY_AFTER_SECONDS", "2"))
+SLO_SECONDS = float(os.getenv("PROVER_SLO_SECONDS", "1"))
+
+# Pure-Python pairings hold the GIL, so more threads add latency, not
+# throughput: scale verifier nodes with `uvicorn --workers N` instead.
+VERIFY_CONCURRENCY = int(os.getenv("VERIFIER_CONCURRENCY", "1"))
+
+
+class ProvingLimiter:
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, max_queue=MAX_QUEUE,
+                 queue_timeout=QUEUE_TIMEOUT, slo=SLO_SECONDS, name="Prover"):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.slo = slo
+        # 🔹 MODIFIED: scheduler-ordered waiters instead of a FIFO semaphore;
+        # only touched from the event loop, so no lock
+        self._scheduler = Scheduler(client_weights=CLIENT_WEIGHTS)
+        self.waiting = 0
+        self.running = 0
+        # expected seconds of the work holding the slots
+        self._running_cost = 0.0
+        self.rejected = 0
+        self.shed = {"low": 0, "normal": 0}
+
+    def estimated_wait(self):
+        """Seconds a new request would wait for a slot (0 if one is free)."""
+        if self.running < self.max_concurrency:
+            return 0.0
+        # running work is half done on average
+        work = self._scheduler.queued_cost() + self._running_cost / 2
+        return work / self.max_concurrency
+
+    def _shed(self, priority):
+        # 🔹 NEW: refuse work that would miss its latency target, before it queues
+        if priority == "high":
+            return
+        limit = self.slo if priority == "low" else self.queue_timeout
+        if self.estimated_wait() > limit:
+            self.shed[priority] += 1
+            self._overloaded(f"{self.name} overloaded, retry later")
+
+    def _overloaded(self, reason):
+        self.rejected += 1
+        raise HTTPException(
+            status_code=503,
+            detail=reason,
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+
+    def _release(self):
+        # hand the slot straight to the next waiter that is still waiting
+        while True:
+            ticket = self._scheduler.pop()
+            if ticket is None:
+                self.running -= 1
+                return
+            if not ticket.waiter.done():
+                ticket.waiter.set_result(None)
+                return
+
+    @asynccontextmanager
+    async def slot(self, circuit=None, client=None):
+        """
+        circuit: registry name, used to order this request while it waits.
+        client: api/admission.py Client; its share and priority apply.
+        """
+        priority = client.priority if client else "normal"
+        cost = self._scheduler.costs.estimate(circuit)
+
+        # 🔹 All slots busy: wait in a bounded queue or fail fast
+        if self.running >= self.max_concurrency:
+            if self.waiting >= self.max_queue:
+                self._overloaded(f"{self.name} queue is full, retry later")
+            self._shed(priority)
+
+            granted = asyncio.get_running_loop().create_future()
+            ticket = self._scheduler.push(circuit, granted, client=client.id if client else None)
+
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(asyncio.shield(granted), self.queue_timeout)
+            except asyncio.TimeoutError:
+                # the slot may have been handed over as the wait ran out
+                if not granted.done():
+                    self._scheduler.remove(ticket)
+                    granted.cancel()
+                    self._overloaded(f"{self.name} busy, retry later")
+            except asyncio.CancelledError:
+                # client went away: give back a slot handed over meanwhile
+                self._scheduler.remove(ticket)
+                if granted.done() and not granted.cancelled():
+                    self._release()
+                else:
+                    granted.cancel()
+                raise
+            finally:
+                self.waiting -= 1
+            # running was not decremented by _release: the slot passed to us
+        else:
+            self.running += 1
+
+        self._running_cost += cost
+        try:
+            yield
+        finally:
+            self._running_cost -= cost
+            self._release()
+
+
+limiter = ProvingLimiter()
+
+# 🔹 Separate limit for /verify-proof: verifying never waits behind proving
+verify_limiter = ProvingLimiter(max_concurrency=VERIFY_CONCURRENCY, name="Verifier")
+
+
+Gauge(
+    "kyc_prover_queue_depth",
+    "Requests waiting for a proving slot",
+    callback=lambda: limiter.waiting
+)
+
+Gauge(
+    "kyc_prover_slots_busy",
+    "Proving slots in use",
+    callback=lambda: limiter.running
+)
+
+Counter(
+    "kyc_prover_rejected_total",
+    "Requests turned away with 503 (queue full or wait timed out)",
+    callback=lambda: limiter.rejected
+)
+
+Gauge(
+    "kyc_prover_estimated_wait_seconds",
+    "Expected wait for a proving slot, as used for load shedding",
+    callback=lambda: limiter.estimated_wait()
+)
+
+Counter(
+    "kyc_prover_shed_total",
+    "Requests shed with 503 because the expected wait missed their latency target",
+    labels=("priority",),
+    callback=lambda: {(priority,): count for priority, count in limiter.shed.items()}
+)
+
+Gauge(
+    "kyc_verifier_queue_depth",
+    "Client proofs waiting for a verification slot",
+    callback=lambda: verify_limiter.waiting
+)
+
+Counter(
+    "kyc_verifier_rejected_total",
+    "Client proofs turned away with 503 (queue full or wait timed out)",
+    callback=lambda: verify_limiter.rejected
+)
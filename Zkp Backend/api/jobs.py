@@ -0,0 +1,331 @@
+"""
+ASYNC PROOF JOBS
+
+Responsibilities:
+1. Accept a check (age / address / kyc / *_set) as a job and return its id at once
+2. Keep job state in a local SQLite store (WAL mode) so jobs survive a restart
+3. Run queued jobs on a fixed pool of workers, picking the next job
+   fairly across clients (prover/scheduler.py, per client and circuit);
+   each job takes a proving slot like a sync request (api/concurrency.py)
+   and, when refused one, waits Retry-After and asks again
+4. Let clients poll a job, or follow it as server-sent events
+
+Lifecycle: queued → running → done | failed. Jobs still queued or running
+when the process stops are queued again on the next start (in creation
+order, without their client: the store keeps no client ids). The request
+(personal data) is deleted from the store as soon as the job finishes;
+finished jobs are kept for PROOF_JOB_TTL seconds (pruned at start-up and
+every PROOF_JOB_PRUNE_INTERVAL seconds while running).
+
+Config (environment):
+    PROOF_JOB_DB              SQLite file (default data/jobs.sqlite3)
+    PROOF_JOB_WORKERS         jobs running at once (default PROVER_POOL_SIZE)
+    PROOF_JOB_QUEUE_LIMIT     queued jobs before POST /proofs answers 503 (default 1000)
+    PROOF_JOB_TTL             seconds finished jobs are kept (default 3600)
+    PROOF_JOB_PRUNE_INTERVAL  seconds between prunes of expired jobs (default 300)
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from api.admission import CLIENT_WEIGHTS
+from api.concurrency import RETRY_AFTER_SECONDS, limiter
+from prover.scheduler import Scheduler
+from prover.worker_pool import POOL_SIZE
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+JOB_DB = os.getenv("PROOF_JOB_DB", os.path.join(BASE_DIR, "data", "jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("PROOF_JOB_WORKERS", str(POOL_SIZE)))
+JOB_QUEUE_LIMIT = int(os.getenv("PROOF_JOB_QUEUE_LIMIT", "1000"))
+JOB_TTL = float(os.getenv("PROOF_JOB_TTL", "3600"))
+PRUNE_INTERVAL = float(os.getenv("PROOF_JOB_PRUNE_INTERVAL", "300"))
+
+FINISHED = ("done", "failed")
+
+# seconds between SSE keep-alive comments
+SSE_KEEPALIVE = 15
+
+
+# ==========================================================
+# JOB STORE (SQLite)
+# ==========================================================
+
+class JobStore:
+
+    def __init__(self, path=JOB_DB):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL: durable across process crashes, cheap commits
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id       TEXT PRIMARY KEY,
+                    check_name TEXT NOT NULL,
+                    status   TEXT NOT NULL,
+                    request  TEXT,
+                    result   TEXT,
+                    error    TEXT,
+                    created  REAL NOT NULL,
+                    updated  REAL NOT NULL
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def create(self, check, request):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._execute(
+            "INSERT INTO jobs (id, check_name, status, request, created, updated) "
+            "VALUES (?, ?, 'queued', ?, ?, ?)",
+            (job_id, check, json.dumps(request), now, now)
+        )
+        return job_id
+
+    def get(self, job_id):
+        rows = self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        if not rows:
+            return None
+
+        row = rows[0]
+        job = {
+            "id": row["id"],
+            "check": row["check_name"],
+            "status": row["status"],
+            "created": row["created"],
+            "updated": row["updated"]
+        }
+        if row["result"] is not None:
+            job["result"] = json.loads(row["result"])
+        if row["error"] is not None:
+            job["error"] = row["error"]
+        return job
+
+    def claim(self, job_id):
+        """queued → running; returns (check, request) or None if not queued."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT check_name, request FROM jobs WHERE id = ? AND status = 'queued'", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE jobs SET status = 'running', updated = ? WHERE id = ?", (time.time(), job_id)
+            )
+        return row["check_name"], json.loads(row["request"])
+
+    def finish(self, job_id, result=None, error=None):
+        # the request holds personal data: drop it once the job is over
+        self._execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, request = NULL, updated = ? WHERE id = ?",
+            (
+                "failed" if error is not None else "done",
+                json.dumps(result) if result is not None else None,
+                error,
+                time.time(),
+                job_id
+            )
+        )
+
+    def recover(self):
+        """Requeue jobs interrupted by a restart; return queued ids, oldest first."""
+        self._execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+        rows = self._execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY created")
+        return [row["id"] for row in rows]
+
+    def prune(self, ttl=JOB_TTL):
+        self._execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated < ?",
+            (time.time() - ttl,)
+        )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# ==========================================================
+# JOB MANAGER (queue + workers)
+# ==========================================================
+
+class _FairQueue:
+    """(job id, client) handed out in scheduler order instead of arrival order."""
+
+    def __init__(self):
+        self._scheduler = Scheduler(client_weights=CLIENT_WEIGHTS)
+        self._ready = asyncio.Semaphore(0)
+
+    def put_nowait(self, job_id, circuit=None, client=None):
+        """client: api/admission.py Client, or None (jobs recovered at start-up)."""
+        self._scheduler.push(circuit, (job_id, client), client=client.id if client else None)
+        self._ready.release()
+
+    async def get(self):
+        await self._ready.acquire()
+        return self._scheduler.pop().waiter
+
+    def qsize(self):
+        return len(self._scheduler)
+
+
+class JobManager:
+    """
+    handlers: {check: (request_model, check_function, circuit)}, where
+    check_function(request) is the blocking check the sync endpoints run
+    and circuit the registry name it proves (for scheduling).
+    """
+
+    def __init__(self, handlers, store_path=JOB_DB, workers=JOB_WORKERS):
+        self.handlers = handlers
+        self.store_path = store_path
+        self.workers = max(1, workers)
+        self.store = None
+        self._queue = None
+        self._tasks = []
+        # job id -> Event set on the job's next status change
+        self._changed = {}
+
+    async def start(self):
+        self.store = JobStore(self.store_path)
+        self.store.prune()
+
+        self._queue = _FairQueue()
+        for job_id in self.store.recover():
+            self._queue.put_nowait(job_id)
+
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        # 🔹 expired jobs are dropped while the process runs, not only at start-up
+        self._tasks.append(asyncio.ensure_future(self._pruner()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        # running jobs stay 'running' in the store and are requeued on start
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    # ------------------------------------------------------
+    # API
+    # ------------------------------------------------------
+
+    async def submit(self, check, request, client=None):
+        """request: validated request model for the check; client: api/admission.py Client."""
+        if self.queue_depth() >= JOB_QUEUE_LIMIT:
+            raise HTTPException(
+                status_code=503,
+                detail="Job queue is full, retry later",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+            )
+
+        # SQLite write: off the event loop
+        job_id = await run_in_threadpool(self.store.create, check, request.model_dump())
+        self._queue.put_nowait(job_id, self.handlers[check][2], client)
+        return job_id
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    async def events(self, job_id):
+        """Async generator of SSE messages until the job finishes."""
+        last_status = None
+
+        while True:
+            changed = self._changed.setdefault(job_id, asyncio.Event())
+            job = self.store.get(job_id)
+
+            if job is None:
+                yield "event: error\ndata: " + json.dumps({"detail": "Job not found"}) + "\n\n"
+                return
+
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield f"event: {last_status}\ndata: " + json.dumps(job) + "\n\n"
+
+            if last_status in FINISHED:
+                return
+
+            try:
+                await asyncio.wait_for(changed.wait(), SSE_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+
+    # ------------------------------------------------------
+    # workers
+    # ------------------------------------------------------
+
+    async def _pruner(self):
+        while True:
+            await asyncio.sleep(max(1.0, PRUNE_INTERVAL))
+            try:
+                await run_in_threadpool(self.store.prune)
+            except sqlite3.Error as exc:
+                # try again next round; workers keep running
+                print(f"Job store prune failed: {exc}")
+
+    def _notify(self, job_id):
+        event = self._changed.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def _run(self, check_function, request, circuit, client):
+        """Run a check in a proving slot, as the sync endpoints do."""
+        while True:
+            entered = False
+            try:
+                async with limiter.slot(circuit, client):
+                    entered = True
+                    return await run_in_threadpool(check_function, request)
+            except HTTPException as exc:
+                # refused a slot (503): a job can wait, ask again later
+                if entered or exc.status_code != 503:
+                    raise
+            await asyncio.sleep(RETRY_AFTER_SECONDS)
+
+    async def _worker(self):
+        while True:
+            job_id, client = await self._queue.get()
+
+            claimed = self.store.claim(job_id)
+            if claimed is None:
+                continue
+            self._notify(job_id)
+
+            check, data = claimed
+
+            try:
+                model, check_function, circuit = self.handlers[check]
+                result = await self._run(check_function, model(**data), circuit, client)
+            except Exception as exc:
+                # one bad job must not take the worker down
+                self.store.finish(job_id, error=str(exc) or type(exc).__name__)
+            else:
+                self.store.finish(job_id, result=result)
+
+            self._notify(job_id)
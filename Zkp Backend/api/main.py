@@ -6,27 +6,100 @@ This exposes endpoints for:
 1. Age Verification
 2. Address Verification
 3. Combined KYC Verification
+4. Batch Proof Verification (client proofs, see 10)
+5. Proof Cache Statistics
+6. Aadhaar QR Signature Verification (single / bulk)
+7. Streaming QR → Proof Pipeline (NDJSON in, NDJSON out)
+8. Prometheus Metrics (per-circuit / per-stage latency, failures, queues)
+9. Async Proof Jobs (submit, poll, server-sent events)
+10. Verifier-only: client-side proofs checked against a circuit's key.
+    Only circuits with public policy inputs accept them (address_membership /
+    kyc_membership, once built): age / address / kyc proofs carry no public
+    signals, so they do not show which policy they were made against.
+    GET /circuits says which circuits accept client proofs; with none
+    built, /verify-proof and /verify-batch answer 400
+11. Address / KYC against any number of allowed states (Merkle root policy)
+12. Liveness / readiness probes (ready once the startup warm-up is done)
+13. Compact binary proofs (128-byte Groth16 proof + packed public signals)
+    accepted wherever a client sends a proof (verifier/proof_codec.py)
+14. Per-client quotas, fair share of proving slots and load shedding
+    (api/admission.py, api/concurrency.py)
 
 This acts as the bridge between frontend and ZKP engine.
+
+Handlers are async: proving / verification run off the event loop,
+behind a bounded concurrency limit (api/concurrency.py). Requests that
+cannot get a proving slot in time get a fast 503 with Retry-After, and
+a client past its quota a 429.
+Clients that would rather not hold a connection open submit a job
+(POST /proofs) and poll it instead (api/jobs.py).
 """
 
-from fastapi import FastAPI
-from pydantic import BaseModel
+import datetime
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
+
+from api.admission import Client, admit, charge, identify
+from api.concurrency import limiter, verify_limiter
+from api.jobs import JobManager
+from api.stream import CHECKS, PipelineResponse, run_pipeline
+from api.warmup import is_ready, liveness, mark_stopping, readiness, start_warmup
+from circuits.registry import circuit_names, get_circuit, load_registry
+from monitoring import metrics
+from prover.proof_cache import proof_cache
+from prover.signature_verify import SIGNATURE_BATCH_LIMIT, verify_qr_string, verify_qr_batch
 
 from prover.proof_runner import (
     generate_age_proof,
     generate_address_proof,
-    generate_kyc_proof
+    generate_kyc_proof,
+    generate_address_set_proof,
+    generate_kyc_set_proof
 )
 
+from verifier.groth16 import ProofFormatError
+from verifier.proof_codec import bundle_from_base64, decode_bundle
+from verifier.replay_guard import REPLAY_PROTECTION, get_replay_guard
 from verifier.verify_runner import (
     verify_age_proof,
     verify_address_proof,
-    verify_kyc_proof
+    verify_kyc_proof,
+    verify_address_set_proof,
+    verify_kyc_set_proof,
+    verify_batch_proofs,
+    run_verify
 )
 
 
-app = FastAPI(title="Privacy Preserving KYC API")
+@asynccontextmanager
+async def lifespan(app):
+    # 🔹 Locate + hash-check every circuit artifact before taking traffic
+    load_registry()
+    # 🔹 Prepared keys, wasm, Node workers and a throwaway proof per circuit,
+    #    in the background: /readyz turns 200 once it is done
+    warmup = await start_warmup()
+    # 🔹 Rebuild the seen-proof Bloom filter before accepting client proofs
+    if REPLAY_PROTECTION:
+        get_replay_guard()
+    # 🔹 Resume jobs left queued / running by the last shutdown
+    await jobs.start()
+    # 🔹 Say up front when client proofs cannot be accepted at all
+    if not _client_proof_circuits():
+        print("Client proofs (/verify-proof, /verify-batch) are refused: no built circuit "
+              "has public inputs (build address_membership / kyc_membership)")
+    yield
+    mark_stopping()
+    if warmup is not None:
+        warmup.cancel()
+    await jobs.stop()
+
+
+app = FastAPI(title="Privacy Preserving KYC API", lifespan=lifespan)
 
 
 # ==========================================================
@@ -58,12 +131,64 @@ class KYCRequest(BaseModel):
     allowed_state2: int
 
 
+class AddressSetRequest(BaseModel):
+    country_code: int
+    state_code: int
+    required_country: int
+    allowed_states: List[int]
+
+
+class KYCSetRequest(BaseModel):
+    dob_year: int
+    current_year: int
+    min_age: int = 18
+    country_code: int
+    state_code: int
+    required_country: int
+    allowed_states: List[int]
+
+
+class ProofItem(BaseModel):
+    # snarkjs JSON, or 🔹 compact: base64 bundle (verifier/proof_codec.py)
+    proof: Optional[dict] = None
+    public_signals: List[str] = []
+    compact: Optional[str] = None
+
+
+class VerifyProofRequest(ProofItem):
+    circuit: str
+
+
+class BatchRequest(BaseModel):
+    circuit: str
+    proofs: List[ProofItem]
+
+
+class JobRequest(BaseModel):
+    check: str
+    request: dict
+
+
+class QRRequest(BaseModel):
+    qr: str
+
+
+class QRBatchRequest(BaseModel):
+    qrs: List[str]
+
+
 # ==========================================================
 # AGE ENDPOINT
 # ==========================================================
 
 @app.post("/verify-age")
-def verify_age(request: AgeRequest):
+async def verify_age(request: AgeRequest, client: Client = Depends(admit)):
+
+    async with limiter.slot("age", client):
+        return await run_in_threadpool(_check_age, request)
+
+
+def _check_age(request):
 
     prover_result = generate_age_proof(
         dob_year=request.dob_year,
@@ -74,7 +199,14 @@ def verify_age(request: AgeRequest):
     if prover_result["status"] != "success":
         return {"eligible": False, "reason": prover_result.get("message")}
 
-    verifier_result = verify_age_proof()
+    # 🔹 DEMO MODE: no proof was generated, nothing to verify
+    if prover_result.get("demo"):
+        return {"eligible": True, "message": "Age requirement satisfied"}
+
+    verifier_result = verify_age_proof(
+        prover_result["proof"],
+        prover_result["public_signals"]
+    )
 
     if verifier_result["status"] == "valid":
         return {"eligible": True, "message": "Age requirement satisfied"}
@@ -87,7 +219,13 @@ def verify_age(request: AgeRequest):
 # ==========================================================
 
 @app.post("/verify-address")
-def verify_address(request: AddressRequest):
+async def verify_address(request: AddressRequest, client: Client = Depends(admit)):
+
+    async with limiter.slot("address", client):
+        return await run_in_threadpool(_check_address, request)
+
+
+def _check_address(request):
 
     prover_result = generate_address_proof(
         country_code=request.country_code,
@@ -100,7 +238,14 @@ def verify_address(request: AddressRequest):
     if prover_result["status"] != "success":
         return {"eligible": False, "reason": prover_result.get("message")}
 
-    verifier_result = verify_address_proof()
+    # 🔹 DEMO MODE: no proof was generated, nothing to verify
+    if prover_result.get("demo"):
+        return {"eligible": True, "message": "Address policy satisfied"}
+
+    verifier_result = verify_address_proof(
+        prover_result["proof"],
+        prover_result["public_signals"]
+    )
 
     if verifier_result["status"] == "valid":
         return {"eligible": True, "message": "Address policy satisfied"}
@@ -113,7 +258,13 @@ def verify_address(request: AddressRequest):
 # ==========================================================
 
 @app.post("/verify-both")
-def verify_both(request: KYCRequest):
+async def verify_both(request: KYCRequest, client: Client = Depends(admit)):
+
+    async with limiter.slot("kyc", client):
+        return await run_in_threadpool(_check_kyc, request)
+
+
+def _check_kyc(request):
 
     prover_result = generate_kyc_proof(
         dob_year=request.dob_year,
@@ -129,9 +280,415 @@ def verify_both(request: KYCRequest):
     if prover_result["status"] != "success":
         return {"eligible": False, "reason": prover_result.get("message")}
 
-    verifier_result = verify_kyc_proof()
+    # 🔹 DEMO MODE: no proof was generated, nothing to verify
+    if prover_result.get("demo"):
+        return {"eligible": True, "message": "KYC requirements satisfied"}
+
+    verifier_result = verify_kyc_proof(
+        prover_result["proof"],
+        prover_result["public_signals"]
+    )
+
+    if verifier_result["status"] == "valid":
+        return {"eligible": True, "message": "KYC requirements satisfied"}
+
+    return {"eligible": False, "reason": "Proof verification failed"}
+
+
+# ==========================================================
+# ALLOWED-STATE SET ENDPOINTS (any number of states)
+# ==========================================================
+
+@app.post("/verify-address-set")
+async def verify_address_set(request: AddressSetRequest, client: Client = Depends(admit)):
+
+    async with limiter.slot("address_membership", client):
+        return await run_in_threadpool(_check_address_set, request)
+
+
+def _check_address_set(request):
+
+    prover_result = generate_address_set_proof(
+        country_code=request.country_code,
+        state_code=request.state_code,
+        required_country=request.required_country,
+        allowed_states=request.allowed_states
+    )
+
+    if prover_result["status"] != "success":
+        return {"eligible": False, "reason": prover_result.get("message")}
+
+    # 🔹 DEMO MODE: no proof was generated, nothing to verify
+    if prover_result.get("demo"):
+        return {"eligible": True, "message": "Address policy satisfied"}
+
+    verifier_result = verify_address_set_proof(
+        prover_result["proof"],
+        request.required_country,
+        request.allowed_states
+    )
+
+    if verifier_result["status"] == "valid":
+        return {"eligible": True, "message": "Address policy satisfied"}
+
+    return {"eligible": False, "reason": "Proof verification failed"}
+
+
+@app.post("/verify-both-set")
+async def verify_both_set(request: KYCSetRequest, client: Client = Depends(admit)):
+
+    async with limiter.slot("kyc_membership", client):
+        return await run_in_threadpool(_check_kyc_set, request)
+
+
+def _check_kyc_set(request):
+
+    prover_result = generate_kyc_set_proof(
+        dob_year=request.dob_year,
+        current_year=request.current_year,
+        min_age=request.min_age,
+        country_code=request.country_code,
+        state_code=request.state_code,
+        required_country=request.required_country,
+        allowed_states=request.allowed_states
+    )
+
+    if prover_result["status"] != "success":
+        return {"eligible": False, "reason": prover_result.get("message")}
+
+    # 🔹 DEMO MODE: no proof was generated, nothing to verify
+    if prover_result.get("demo"):
+        return {"eligible": True, "message": "KYC requirements satisfied"}
+
+    verifier_result = verify_kyc_set_proof(
+        prover_result["proof"],
+        request.current_year,
+        request.min_age,
+        request.required_country,
+        request.allowed_states
+    )
 
     if verifier_result["status"] == "valid":
         return {"eligible": True, "message": "KYC requirements satisfied"}
 
     return {"eligible": False, "reason": "Proof verification failed"}
+
+
+# ==========================================================
+# BATCH VERIFICATION ENDPOINT
+# ==========================================================
+
+def _proof_and_signals(item):
+    """(proof, public_signals) from a snarkjs JSON or compact request item."""
+    if item.compact is None:
+        if item.proof is None:
+            raise HTTPException(status_code=422, detail="Send either proof or compact")
+        return item.proof, item.public_signals
+
+    try:
+        return bundle_from_base64(item.compact)
+    except ProofFormatError as exc:
+        raise HTTPException(status_code=400, detail=f"Bad compact proof: {exc}")
+
+
+@app.post("/verify-batch")
+async def verify_batch(request: BatchRequest, client: Client = Depends(identify)):
+    """
+    Many client proofs for one circuit, checked together. Same circuits
+    as /verify-proof: only those with public inputs (GET /circuits).
+    """
+
+    # client-supplied proofs too: same rule as /verify-proof
+    _check_client_circuit(request.circuit)
+
+    # 🔹 one token per proof, not per request
+    charge(client, max(1, len(request.proofs)))
+
+    proofs = [_proof_and_signals(item) for item in request.proofs]
+
+    async with limiter.slot(client=client):
+        verifier_result = await run_in_threadpool(
+            verify_batch_proofs,
+            request.circuit,
+            proofs,
+            True
+        )
+
+    if verifier_result["status"] == "error":
+        return {"valid": False, "reason": verifier_result["message"]}
+
+    return {
+        "valid": verifier_result["status"] == "valid",
+        "results": verifier_result["results"],
+        "invalid": verifier_result.get("invalid", []),
+        "replayed": verifier_result.get("replayed", []),
+        "message": verifier_result["message"]
+    }
+
+
+# ==========================================================
+# VERIFIER-ONLY ENDPOINTS (proof made on the user's device)
+# ==========================================================
+
+@app.get("/circuits")
+def list_circuits():
+    """Artifact hashes, so clients can check they prove with the same wasm / zkey."""
+
+    return {
+        name: {
+            "n_public": get_circuit(name).zkey_header["n_public"],
+            # 🔹 /verify-proof and /verify-batch accept proofs of this circuit
+            "client_proofs": name in _client_proof_circuits(),
+            "sha256": get_circuit(name).sha256
+        }
+        for name in circuit_names()
+    }
+
+
+@app.get("/circuits/{circuit}/verification-key")
+def get_verification_key(circuit: str):
+
+    if circuit not in circuit_names():
+        raise HTTPException(status_code=404, detail=f"Unknown circuit: {circuit}")
+
+    return get_circuit(circuit).verification_key_json
+
+
+def _client_proof_circuits():
+    """Built circuits whose policy is a public input."""
+    return [name for name in circuit_names() if get_circuit(name).zkey_header["n_public"] > 0]
+
+
+def _check_client_circuit(circuit):
+    """
+    Only circuits whose policy is a public input can check a client proof:
+    with no public signals (age / address / kyc) the proof does not say
+    which min_age or allowed states it was made against.
+    """
+    if circuit not in circuit_names():
+        raise HTTPException(status_code=400, detail=f"Unknown circuit: {circuit}")
+
+    if get_circuit(circuit).zkey_header["n_public"] == 0:
+        accepted = _client_proof_circuits()
+        raise HTTPException(
+            status_code=400,
+            detail=f"Circuit {circuit} has no public inputs, so a client proof does not bind the policy; "
+                   + (f"client proofs are accepted for: {', '.join(accepted)}" if accepted else
+                      "no circuit that accepts client proofs is built on this server "
+                      "(address_membership / kyc_membership)")
+        )
+
+
+@app.post("/verify-proof")
+async def verify_client_proof(request: VerifyProofRequest, client: Client = Depends(admit)):
+    """
+    Checks a proof the client generated itself: the server never sees the
+    private inputs and only pays for verification, not proving.
+    Each proof is accepted once; a replay gets reason "Proof has already been used".
+    The public signals (the policy the proof was made against) are echoed
+    back: the caller checks them against its own policy.
+    """
+    _check_client_circuit(request.circuit)
+
+    proof, public_signals = _proof_and_signals(request)
+
+    return await _verify_client_proof(request.circuit, proof, public_signals, client)
+
+
+@app.post("/verify-proof/{circuit}")
+async def verify_client_proof_binary(circuit: str, request: Request, client: Client = Depends(admit)):
+    """
+    🔹 NEW: Same check, with the raw compact bundle as the request body
+    (Content-Type: application/octet-stream, ~130 bytes instead of ~800 of JSON).
+    """
+    _check_client_circuit(circuit)
+
+    try:
+        proof, public_signals = decode_bundle(await request.body())
+    except ProofFormatError as exc:
+        raise HTTPException(status_code=400, detail=f"Bad compact proof: {exc}")
+
+    return await _verify_client_proof(circuit, proof, public_signals, client)
+
+
+async def _verify_client_proof(circuit, proof, public_signals, client=None):
+
+    async with verify_limiter.slot(client=client):
+        verifier_result = await run_in_threadpool(
+            run_verify, circuit, proof, public_signals, True
+        )
+
+    if verifier_result["status"] == "valid":
+        return {"valid": True, "message": verifier_result["message"], "public_signals": public_signals}
+
+    return {"valid": False, "reason": verifier_result["message"]}
+
+
+# ==========================================================
+# PROOF CACHE STATS
+# ==========================================================
+
+@app.get("/cache/stats")
+def cache_stats():
+    return proof_cache.stats()
+
+
+# ==========================================================
+# ASYNC PROOF JOBS
+# ==========================================================
+
+jobs = JobManager({
+    "age": (AgeRequest, _check_age, "age"),
+    "address": (AddressRequest, _check_address, "address"),
+    "kyc": (KYCRequest, _check_kyc, "kyc"),
+    "address_set": (AddressSetRequest, _check_address_set, "address_membership"),
+    "kyc_set": (KYCSetRequest, _check_kyc_set, "kyc_membership")
+})
+
+metrics.Gauge(
+    "kyc_job_queue_depth",
+    "Proof jobs waiting for a job worker",
+    callback=jobs.queue_depth
+)
+
+
+@app.post("/proofs", status_code=202)
+async def submit_proof_job(request: JobRequest, client: Client = Depends(admit)):
+    """
+    Body: {"check": "age" | "address" | "kyc" | "address_set" | "kyc_set",
+           "request": <that endpoint's body>}
+    Returns the job id right away; the result is fetched with GET /proofs/{id}.
+    """
+    handler = jobs.handlers.get(request.check)
+    if handler is None:
+        raise HTTPException(status_code=400, detail=f"Unknown check: {request.check}")
+
+    try:
+        check_request = handler[0](**request.request)
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors(include_url=False))
+
+    job_id = await jobs.submit(request.check, check_request, client)
+
+    return {"id": job_id, "status": "queued"}
+
+
+@app.get("/proofs/{job_id}")
+def get_proof_job(job_id: str):
+
+    job = jobs.get(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job
+
+
+@app.get("/proofs/{job_id}/events")
+def proof_job_events(job_id: str):
+    """Server-sent events: one event per status change, until done / failed."""
+
+    if jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return StreamingResponse(
+        jobs.events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
+# ==========================================================
+# HEALTH PROBES
+# ==========================================================
+
+@app.get("/healthz")
+def healthz():
+    # liveness: the process is up and serving, warm or not
+    return liveness()
+
+
+@app.get("/readyz")
+def readyz():
+    # readiness: send traffic only to warm instances
+    report = readiness()
+    return JSONResponse(report, status_code=200 if is_ready() else 503)
+
+
+# ==========================================================
+# METRICS
+# ==========================================================
+
+@app.get("/metrics")
+def get_metrics():
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+# ==========================================================
+# QR SIGNATURE ENDPOINTS
+# ==========================================================
+
+@app.post("/verify-qr")
+async def verify_qr(request: QRRequest, client: Client = Depends(admit)):
+    return await run_in_threadpool(verify_qr_string, request.qr)
+
+
+@app.post("/verify-qr-batch")
+async def verify_qr_bulk(request: QRBatchRequest, client: Client = Depends(identify)):
+
+    # 🔹 bounded RSA work per request, one quota token per QR string
+    if len(request.qrs) > SIGNATURE_BATCH_LIMIT:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {SIGNATURE_BATCH_LIMIT} QR strings per request, got {len(request.qrs)}"
+        )
+    charge(client, max(1, len(request.qrs)))
+
+    results = await run_in_threadpool(verify_qr_batch, request.qrs)
+
+    return {
+        "valid": sum(1 for r in results if r["status"] == "valid"),
+        "invalid": sum(1 for r in results if r["status"] != "valid"),
+        "results": results
+    }
+
+
+# ==========================================================
+# STREAMING PIPELINE ENDPOINT
+# ==========================================================
+
+@app.post("/verify-stream")
+async def verify_stream(
+    request: Request,
+    check: str = "kyc",
+    current_year: Optional[int] = None,
+    min_age: int = 18,
+    required_country: int = 1,
+    allowed_state1: Optional[int] = None,
+    allowed_state2: Optional[int] = None,
+    client: Client = Depends(identify)
+):
+    """
+    Body: NDJSON, one {"id": ..., "qr": "<QR string>"} per line.
+    Policy comes from the query string and applies to every record.
+    Each record takes one token of the client's quota: past it, the
+    upload is read at the client's rate.
+    """
+    if check not in CHECKS:
+        raise HTTPException(status_code=400, detail=f"Unknown check: {check}")
+
+    if check != "age" and (allowed_state1 is None or allowed_state2 is None):
+        raise HTTPException(status_code=400, detail="allowed_state1 and allowed_state2 are required")
+
+    policy = {
+        "current_year": current_year or datetime.date.today().year,
+        "min_age": min_age,
+        "required_country": required_country,
+        "allowed_state1": allowed_state1,
+        "allowed_state2": allowed_state2
+    }
+
+    return PipelineResponse(
+        run_pipeline(request.stream(), check, policy, client),
+        media_type="application/x-ndjson"
+    )
@@ -0,0 +1,299 @@
+"""
+STREAMING QR → PROOF PIPELINE
+
+Responsibilities:
+1. Read an NDJSON upload one line at a time ({"id": ..., "qr": "<QR string>"})
+2. Run each record through overlapping stages:
+       signature check → pre-check + proof → verification
+3. Stream one NDJSON result per record as soon as it finishes
+4. Charge the client per record: the upload is read at the client's
+   quota rate (api/admission.py) and each proof takes a proving slot
+   like a single check (api/concurrency.py); a record refused a slot
+   fails with stage "prove", the stream goes on
+
+Stages are connected by small bounded queues, so a slow stage holds
+back the upload instead of buffering it: memory stays flat however
+large the input is. Results may come back out of input order; each
+carries the record's id (or its line number when no id is given).
+
+Config (environment):
+    STREAM_QUEUE_SIZE       records buffered between stages (default 16)
+    STREAM_PROVE_WORKERS    proofs in flight per stream (default PROVER_POOL_SIZE)
+    STREAM_MAX_LINE_BYTES   longest accepted input line (default 65536)
+"""
+
+import asyncio
+import json
+import os
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from api.admission import pace
+from api.concurrency import limiter
+from prover.proof_runner import (
+    generate_age_proof,
+    generate_address_proof,
+    generate_kyc_proof
+)
+from prover.signature_verify import verify_qr_string
+from prover.worker_pool import POOL_SIZE
+from verifier.verify_runner import (
+    verify_age_proof,
+    verify_address_proof,
+    verify_kyc_proof
+)
+
+QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "16"))
+PROVE_WORKERS = int(os.getenv("STREAM_PROVE_WORKERS", str(POOL_SIZE)))
+MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", "65536"))
+
+_DONE = object()
+
+
+# ==========================================================
+# PER-CHECK PROVE / VERIFY
+# ==========================================================
+
+def _prove_age(data, policy):
+    return generate_age_proof(
+        dob_year=data["dob_year"],
+        current_year=policy["current_year"],
+        min_age=policy["min_age"]
+    )
+
+
+def _prove_address(data, policy):
+    return generate_address_proof(
+        country_code=data["country_code"],
+        state_code=data["state_code"],
+        required_country=policy["required_country"],
+        allowed_state1=policy["allowed_state1"],
+        allowed_state2=policy["allowed_state2"]
+    )
+
+
+def _prove_kyc(data, policy):
+    return generate_kyc_proof(
+        dob_year=data["dob_year"],
+        current_year=policy["current_year"],
+        min_age=policy["min_age"],
+        country_code=data["country_code"],
+        state_code=data["state_code"],
+        required_country=policy["required_country"],
+        allowed_state1=policy["allowed_state1"],
+        allowed_state2=policy["allowed_state2"]
+    )
+
+
+# check → (prove, verify, circuit the proving slot is charged to)
+CHECKS = {
+    "age": (_prove_age, verify_age_proof, "age"),
+    "address": (_prove_address, verify_address_proof, "address"),
+    "kyc": (_prove_kyc, verify_kyc_proof, "kyc")
+}
+
+
+# ==========================================================
+# STAGES
+# ==========================================================
+
+def _fail(record, stage, reason):
+    record["result"] = {"id": record["id"], "eligible": False, "stage": stage, "reason": reason}
+    return record
+
+
+def _signature_stage(record):
+    try:
+        line = json.loads(record.pop("line"))
+        record["id"] = line.get("id", record["id"])
+        qr = line["qr"]
+    except (ValueError, AttributeError, KeyError, TypeError):
+        return _fail(record, "parse", "Expected a JSON object with a 'qr' field")
+
+    signature = verify_qr_string(qr)
+
+    if signature["status"] != "valid":
+        return _fail(record, "signature", signature["message"])
+
+    record["aadhaar_data"] = signature["aadhaar_data"]
+    return record
+
+
+def _prove_stage(record, prove, policy):
+    try:
+        prover_result = prove(record.pop("aadhaar_data"), policy)
+    except (KeyError, TypeError) as exc:
+        return _fail(record, "precheck", f"Aadhaar data is missing {exc}")
+
+    if prover_result["status"] != "success":
+        return _fail(record, "prove", prover_result.get("message"))
+
+    record["prover_result"] = prover_result
+    return record
+
+
+def _verify_stage(record, verify):
+    prover_result = record.pop("prover_result")
+
+    # 🔹 DEMO MODE: no proof was generated, nothing to verify
+    if not prover_result.get("demo"):
+        verifier_result = verify(prover_result["proof"], prover_result["public_signals"])
+        if verifier_result["status"] != "valid":
+            return _fail(record, "verify", "Proof verification failed")
+
+    record["result"] = {"id": record["id"], "eligible": True}
+    return record
+
+
+async def _finish(work, outbox):
+    """
+    Run a reader / stage, then send the end marker downstream, also when
+    it fails: the next stage and run_pipeline wait for that marker, and
+    run_pipeline re-raises the error once it arrives.
+    """
+    try:
+        await work
+    except asyncio.CancelledError:
+        # run_pipeline is tearing the stream down: nobody waits for the marker
+        raise
+    except Exception:
+        await outbox.put(_DONE)
+        raise
+    await outbox.put(_DONE)
+
+
+async def _run_stage(inbox, outbox, handler, workers=1, gate=None):
+    """
+    Move records inbox → handler (threadpool) → outbox; finished records
+    pass straight through. gate: async context manager factory each
+    handler call runs under (a proving slot).
+    """
+
+    async def handle(record):
+        if gate is None:
+            return await run_in_threadpool(handler, record)
+        try:
+            async with gate():
+                return await run_in_threadpool(handler, record)
+        except HTTPException as exc:
+            return _fail(record, "prove", exc.detail)
+
+    async def worker():
+        while True:
+            record = await inbox.get()
+            if record is _DONE:
+                # let sibling workers see the end marker too
+                await inbox.put(_DONE)
+                return
+            if "result" not in record:
+                try:
+                    record = await handle(record)
+                except Exception as exc:
+                    # one bad record must not stall the whole stream
+                    record = _fail(record, "error", str(exc))
+            await outbox.put(record)
+
+    await _finish(asyncio.gather(*(worker() for _ in range(workers))), outbox)
+
+
+async def _read_lines(chunks, outbox, client=None):
+    buffer = b""
+    line_number = 0
+
+    async def emit(line):
+        nonlocal line_number
+        line_number += 1
+        # also lines that arrived whole in one chunk, never seen unsplit in the buffer
+        if len(line) > MAX_LINE_BYTES:
+            await outbox.put(_fail({"id": line_number}, "parse", "Line too long"))
+            return
+        if line.strip():
+            # one quota token per record: a long upload is read at the client's rate
+            if client is not None:
+                await pace(client)
+            await outbox.put({"id": line_number, "line": line})
+
+    async def read():
+        nonlocal buffer, line_number
+
+        async for chunk in chunks:
+            buffer += chunk
+
+            while True:
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    await emit(line)
+
+                if len(buffer) <= MAX_LINE_BYTES:
+                    break
+
+                # drop the oversized record, resync at the next newline; what
+                # follows it goes round the split again (it may hold whole records)
+                line_number += 1
+                await outbox.put(_fail({"id": line_number}, "parse", "Line too long"))
+                buffer = b""
+                async for chunk in chunks:
+                    if b"\n" in chunk:
+                        buffer = chunk.split(b"\n", 1)[1]
+                        break
+
+        await emit(buffer)
+
+    await _finish(read(), outbox)
+
+
+# ==========================================================
+# PIPELINE
+# ==========================================================
+
+class PipelineResponse(StreamingResponse):
+    """
+    StreamingResponse that leaves `receive` to the request body.
+
+    On ASGI < 2.4 servers Starlette listens for client disconnects on
+    `receive` while streaming, which would swallow the upload we are
+    still reading. A gone client shows up as a failed send instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+async def run_pipeline(chunks, check, policy, client=None):
+    """
+    Async generator of NDJSON result lines for an async iterator of
+    upload byte chunks. client: api/admission.py Client the records are
+    charged to (quota and proving slots).
+    """
+    prove, verify, circuit = CHECKS[check]
+
+    lines = asyncio.Queue(QUEUE_SIZE)
+    signed = asyncio.Queue(QUEUE_SIZE)
+    proved = asyncio.Queue(QUEUE_SIZE)
+    done = asyncio.Queue(QUEUE_SIZE)
+
+    tasks = [
+        asyncio.ensure_future(_read_lines(chunks, lines, client)),
+        asyncio.ensure_future(_run_stage(lines, signed, _signature_stage)),
+        asyncio.ensure_future(_run_stage(
+            signed, proved, lambda record: _prove_stage(record, prove, policy),
+            workers=max(1, PROVE_WORKERS),
+            gate=lambda: limiter.slot(circuit, client)
+        )),
+        asyncio.ensure_future(_run_stage(proved, done, lambda record: _verify_stage(record, verify)))
+    ]
+
+    try:
+        while True:
+            record = await done.get()
+            if record is _DONE:
+                break
+            yield json.dumps(record["result"]) + "\n"
+
+        # surface errors from the reader / stages
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
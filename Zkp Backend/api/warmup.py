@@ -0,0 +1,182 @@
+"""
+STARTUP WARM-UP + READINESS
+
+Responsibilities:
+1. Pay every cold-start cost before the instance takes traffic:
+   prepared verification keys, witness wasm compilation, Node worker
+   boot + zkey load, and the first (JIT-cold) proof on each worker
+2. Prove and verify each circuit's sample input once (throwaway; it
+   bypasses the proof cache, metrics and the replay index)
+3. Report liveness (GET /healthz) and readiness (GET /readyz)
+
+Warm-up runs in the background, so /healthz answers at once while
+/readyz stays 503 until every circuit is warm. A failed warm-up keeps
+the instance out of rotation (status "failed") instead of letting
+requests find the problem.
+
+In DEMO_MODE no proof is made on the request path, so the prover is not
+warmed and the instance is ready once its keys are prepared.
+
+Config (environment):
+    WARMUP          "false" skips warm-up: ready as soon as the app starts (default "true")
+    WARMUP_PROOFS   throwaway proofs per circuit (default PROVER_POOL_SIZE, one per worker)
+"""
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.concurrency import run_in_threadpool
+
+from circuits.registry import circuit_names, get_circuit
+from monitoring.metrics import Gauge
+from prover.witness import get_calculator
+from prover.worker_pool import POOL_SIZE, get_pool
+from verifier.groth16 import verify
+from verifier.verify_runner import get_prepared_key, prepare_verification_keys
+
+WARMUP = os.getenv("WARMUP", "true").lower() == "true"
+WARMUP_PROOFS = int(os.getenv("WARMUP_PROOFS", str(POOL_SIZE)))
+
+STARTED = time.time()
+
+_state = {"status": "starting", "circuits": {}, "error": None}
+
+
+class WarmupError(Exception):
+    """Raised when a circuit cannot be proved or verified during warm-up."""
+
+
+# ==========================================================
+# WARM-UP
+# ==========================================================
+
+def _warm_prover(circuit):
+    """Witness + proof + verify on the sample input; returns timings (s)."""
+    with open(circuit.sample_input_path, "r") as f:
+        input_data = json.load(f)
+
+    timings = {}
+
+    start = time.perf_counter()
+    # first call compiles the wasm module
+    witness = get_calculator(circuit.wasm_path).calculate_wtns(input_data)
+    timings["witness"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pool = get_pool()
+    timings["pool"] = time.perf_counter() - start
+
+    # one proof per worker at once, so every worker gets its first proof here
+    proofs = max(1, WARMUP_PROOFS)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=proofs) as executor:
+        results = list(executor.map(
+            lambda _: pool.prove(witness, circuit.zkey_path, circuit.name), range(proofs)
+        ))
+    timings["prove"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vk = get_prepared_key(circuit.name)
+    for proof, public_signals in results:
+        if not verify(vk, proof, public_signals):
+            raise WarmupError(f"{circuit.name}: warm-up proof did not verify")
+    timings["verify"] = time.perf_counter() - start
+
+    return timings
+
+
+def run_warmup():
+    """Blocking warm-up of every registered circuit (run off the event loop)."""
+    demo = os.getenv("DEMO_MODE", "true").lower() == "true"
+
+    start = time.perf_counter()
+    prepare_verification_keys()
+    print(f"Warm-up: verification keys ready in {time.perf_counter() - start:.2f}s")
+
+    for name in circuit_names():
+        circuit = get_circuit(name)
+
+        if demo:
+            _state["circuits"][name] = {"proof": "skipped (DEMO_MODE)"}
+            continue
+
+        if circuit.sample_input_path is None:
+            _state["circuits"][name] = {"proof": "skipped (no sample input)"}
+            print(f"Warm-up: {name} has no sample input, prover not warmed")
+            continue
+
+        try:
+            timings = _warm_prover(circuit)
+        except WarmupError:
+            raise
+        except Exception as exc:
+            raise WarmupError(f"{name}: {str(exc) or type(exc).__name__}") from exc
+
+        _state["circuits"][name] = {
+            stage: round(seconds * 1000, 1) for stage, seconds in timings.items()
+        }
+        print(f"Warm-up: {name} " + ", ".join(f"{k} {v:.2f}s" for k, v in timings.items()))
+
+
+async def start_warmup():
+    """Start warm-up in the background; /readyz reports its progress."""
+    if not WARMUP:
+        _state["status"] = "ready"
+        return None
+
+    _state["status"] = "warming"
+
+    async def warm():
+        start = time.perf_counter()
+        try:
+            await run_in_threadpool(run_warmup)
+        except Exception as exc:
+            # WarmupError, or a failure preparing the verification keys
+            _state["status"] = "failed"
+            _state["error"] = str(exc) or type(exc).__name__
+            print(f"Warm-up failed: {_state['error']}")
+            return
+
+        _state["status"] = "ready"
+        _state["warmup_seconds"] = round(time.perf_counter() - start, 2)
+        print(f"Warm-up: ready in {_state['warmup_seconds']}s")
+
+    return asyncio.ensure_future(warm())
+
+
+def mark_stopping():
+    # out of rotation while the lifespan shuts down
+    _state["status"] = "stopping"
+
+
+# ==========================================================
+# PROBES
+# ==========================================================
+
+def is_ready():
+    return _state["status"] == "ready"
+
+
+def readiness():
+    report = {"status": _state["status"], "circuits": dict(_state["circuits"])}
+
+    if _state["error"]:
+        report["error"] = _state["error"]
+    if "warmup_seconds" in _state:
+        report["warmup_seconds"] = _state["warmup_seconds"]
+
+    return report
+
+
+def liveness():
+    return {"status": "ok", "uptime_seconds": round(time.time() - STARTED, 1)}
+
+
+Gauge(
+    "kyc_ready",
+    "1 once warm-up has finished and the instance takes traffic",
+    callback=lambda: 1 if is_ready() else 0
+)
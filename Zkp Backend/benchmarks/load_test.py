@@ -0,0 +1,314 @@
+"""
+HTTP LOAD TEST
+
+Responsibilities:
+1. Send a configurable mix of /verify-age, /verify-address and
+   /verify-both requests at a fixed arrival rate (or as fast as a fixed
+   number of clients allows)
+2. Report throughput and latency percentiles per endpoint
+3. Run against a live server, or against the app in-process (no network)
+4. Compare DEMO_MODE=true with the real proving path in one run
+
+Run from the "Zkp Backend" directory:
+
+    # live server
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --rate 20 --duration 30
+
+    # in-process, demo vs real snarkjs path
+    python -m benchmarks.load_test --in-process --compare-demo --rate 5 --duration 20
+
+    # closed loop: 8 clients back to back, 2:1:1 mix
+    python -m benchmarks.load_test --in-process --rate 0 --concurrency 8 --mix age=2,address=1,kyc=1
+
+Latency in open-loop mode (--rate > 0) is measured from each request's
+scheduled send time, so a stalled server shows up as latency instead of
+silently lowering the offered load.
+
+Notes:
+- Inputs come from a small domain, so the proof cache (prover/proof_cache.py)
+  answers most repeats; use --no-proof-cache (in-process) to measure
+  cold proving.
+- In-process mode runs the client on the server's event loop; keep the
+  offered load well under one core's worth of client work.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+
+import httpx
+
+from benchmarks.stage_bench import percentile
+
+ENDPOINTS = {
+    "age": "/verify-age",
+    "address": "/verify-address",
+    "kyc": "/verify-both"
+}
+
+CURRENT_YEAR = 2026
+REQUIRED_COUNTRY = 1
+ALLOWED_STATES = (10, 20)
+
+
+# ==========================================================
+# REQUEST MIX
+# ==========================================================
+
+def parse_mix(text):
+    """"age=2,address=1,kyc=1" -> {"age": 2.0, ...}"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown check in mix: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def make_body(check, rng, fail_ratio):
+    """Random request body; about fail_ratio of them fail the pre-check."""
+    fail = rng.random() < fail_ratio
+
+    dob_year = rng.randint(CURRENT_YEAR - 17, CURRENT_YEAR - 5) if fail else rng.randint(1950, CURRENT_YEAR - 18)
+    state_code = rng.choice((30, 40)) if fail else rng.choice(ALLOWED_STATES)
+
+    policy = {
+        "required_country": REQUIRED_COUNTRY,
+        "allowed_state1": ALLOWED_STATES[0],
+        "allowed_state2": ALLOWED_STATES[1]
+    }
+
+    if check == "age":
+        return {"dob_year": dob_year, "current_year": CURRENT_YEAR, "min_age": 18}
+
+    if check == "address":
+        return {"country_code": REQUIRED_COUNTRY, "state_code": state_code, **policy}
+
+    return {
+        "dob_year": dob_year,
+        "current_year": CURRENT_YEAR,
+        "min_age": 18,
+        "country_code": REQUIRED_COUNTRY,
+        "state_code": state_code,
+        **policy
+    }
+
+
+# ==========================================================
+# LOAD
+# ==========================================================
+
+async def send(client, check, body, scheduled, samples):
+    status = "error"
+    try:
+        response = await client.post(ENDPOINTS[check], json=body)
+        if response.status_code == 200:
+            status = "eligible" if response.json().get("eligible") else "rejected"
+        elif response.status_code == 503:
+            status = "overloaded"
+        else:
+            status = f"http_{response.status_code}"
+    except httpx.HTTPError:
+        pass
+
+    samples.append((check, status, time.perf_counter() - scheduled))
+
+
+async def open_loop(client, args, mix, rng, samples):
+    """Requests arrive at --rate per second (Poisson), at most --concurrency in flight."""
+    checks, weights = list(mix), list(mix.values())
+    limit = asyncio.Semaphore(args.concurrency)
+    tasks = []
+
+    async def one(check, body, scheduled):
+        async with limit:
+            await send(client, check, body, scheduled, samples)
+
+    start = time.perf_counter()
+    next_at = start
+
+    while True:
+        next_at += rng.expovariate(args.rate)
+        if next_at - start >= args.duration:
+            break
+
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        check = rng.choices(checks, weights)[0]
+        tasks.append(asyncio.ensure_future(one(check, make_body(check, rng, args.fail_ratio), next_at)))
+
+    await asyncio.gather(*tasks)
+
+
+async def closed_loop(client, args, mix, rng, samples):
+    """--concurrency clients, each sending its next request as soon as the last returns."""
+    checks, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + args.duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            check = rng.choices(checks, weights)[0]
+            await send(client, check, make_body(check, rng, args.fail_ratio), time.perf_counter(), samples)
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+
+async def run_load(client, args, mix):
+    rng = random.Random(args.seed)
+    samples = []
+
+    start = time.perf_counter()
+    if args.rate > 0:
+        await open_loop(client, args, mix, rng, samples)
+    else:
+        await closed_loop(client, args, mix, rng, samples)
+    elapsed = time.perf_counter() - start
+
+    return summarize(samples, elapsed)
+
+
+# ==========================================================
+# REPORT
+# ==========================================================
+
+def _latency(latencies):
+    latencies = sorted(latency * 1000 for latency in latencies)
+    if not latencies:
+        return {}
+    return {
+        "mean_ms": statistics.fmean(latencies),
+        "p50_ms": percentile(latencies, 50),
+        "p90_ms": percentile(latencies, 90),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1]
+    }
+
+
+def summarize(samples, elapsed):
+    groups = {"all": samples}
+    for check in ENDPOINTS:
+        group = [sample for sample in samples if sample[0] == check]
+        if group:
+            groups[check] = group
+
+    summary = {}
+    for name, group in groups.items():
+        statuses = {}
+        for _, status, _ in group:
+            statuses[status] = statuses.get(status, 0) + 1
+
+        # answered = got a 200, eligible or not
+        answered = [latency for _, status, latency in group if status in ("eligible", "rejected")]
+
+        summary[name] = {
+            "requests": len(group),
+            "statuses": statuses,
+            "throughput_rps": len(answered) / elapsed if elapsed else 0.0,
+            "latency": _latency(answered)
+        }
+
+    return {"elapsed_s": elapsed, "endpoints": summary}
+
+
+def print_summary(title, summary):
+    print(f"\n=== {title} ({summary['elapsed_s']:.1f} s) ===")
+    for name, result in summary["endpoints"].items():
+        latency = result["latency"]
+        statuses = ", ".join(f"{k}={v}" for k, v in sorted(result["statuses"].items()))
+        line = f"  {name:<8} {result['requests']:6d} req   {result['throughput_rps']:8.2f} rps"
+        if latency:
+            line += (
+                f"   p50 {latency['p50_ms']:8.1f}   p90 {latency['p90_ms']:8.1f}"
+                f"   p99 {latency['p99_ms']:8.1f}   max {latency['max_ms']:8.1f} ms"
+            )
+        print(line)
+        print(f"  {'':<8} {statuses}")
+
+
+# ==========================================================
+# TARGETS
+# ==========================================================
+
+async def run_remote(args, mix):
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        return {"remote": await run_load(client, args, mix)}
+
+
+async def run_in_process(args, mix):
+    # Imported here: the app reads its config from the environment at import
+    from api.main import app
+    from prover.proof_cache import proof_cache
+
+    if args.no_proof_cache:
+        proof_cache.max_entries = 0
+
+    modes = ["true", "false"] if args.compare_demo else [os.getenv("DEMO_MODE", "true")]
+    results = {}
+
+    transport = httpx.ASGITransport(app=app)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://kyc.local",
+                                     timeout=args.timeout) as client:
+            for mode in modes:
+                # proof_runner reads DEMO_MODE on every call
+                os.environ["DEMO_MODE"] = mode
+                proof_cache.clear()
+                results[f"DEMO_MODE={mode}"] = await run_load(client, args, mix)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the KYC verification endpoints")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="base URL of a running server")
+    target.add_argument("--in-process", action="store_true", help="run the app in this process")
+
+    parser.add_argument("--rate", type=float, default=10.0,
+                        help="arrivals per second (0 = closed loop, as fast as --concurrency allows)")
+    parser.add_argument("--concurrency", type=int, default=16, help="max requests in flight")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to generate load")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("age=1,address=1,kyc=1"),
+                        help='request mix, e.g. "age=2,address=1,kyc=1"')
+    parser.add_argument("--fail-ratio", type=float, default=0.1,
+                        help="fraction of requests that fail the pre-check")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare-demo", action="store_true",
+                        help="in-process only: run DEMO_MODE=true, then the real proving path")
+    parser.add_argument("--no-proof-cache", action="store_true",
+                        help="in-process only: disable the proof cache")
+    parser.add_argument("--out", help="write the results as JSON")
+    args = parser.parse_args()
+
+    if args.url and (args.compare_demo or args.no_proof_cache):
+        parser.error("--compare-demo / --no-proof-cache need --in-process")
+
+    runner = run_in_process if args.in_process else run_remote
+    results = asyncio.run(runner(args, args.mix))
+
+    for title, summary in results.items():
+        print_summary(title, summary)
+
+    if args.out:
+        report = {
+            "config": {key: value for key, value in vars(args).items()},
+            "results": results
+        }
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
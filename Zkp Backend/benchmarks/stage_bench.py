@@ -0,0 +1,414 @@
+"""
+STAGE BENCHMARKS
+
+Responsibilities:
+1. Time every stage of a KYC check on its own, for each circuit:
+       precheck → serialize → witness → prove → verify
+   plus the Aadhaar QR signature check shared by all circuits
+2. Report mean / p50 / p99 (ms) and peak Python memory per stage
+3. Save results as JSON so runs can be compared across commits
+
+Run from the "Zkp Backend" directory:
+
+    python -m benchmarks.stage_bench                       # all circuits
+    python -m benchmarks.stage_bench --circuits age -n 50
+    python -m benchmarks.stage_bench --compare benchmarks/results/<old>.json
+
+Results go to benchmarks/results/<git commit>.json by default.
+
+Notes:
+- The prove stage needs node + snarkjs (prover/worker_pool.py); when they
+  are missing it is reported as skipped and verify falls back to the
+  checked-in <circuit>_proof.json / <circuit>_public.json, if present.
+- Memory is the tracemalloc peak of one extra, untimed run. It only sees
+  Python allocations: the Node workers and wasmtime's linear memory are
+  not included (the process max RSS is recorded in "meta" instead, where
+  the platform has the resource module).
+- The shared verdict cache (verifier/verify_cache.py) is turned off for
+  the run, unless VERIFY_CACHE_ENTRIES is set, so verify times the pairing
+  check on every iteration, not a cache hit; likewise the pre-check
+  verdict cache is cleared before each precheck.
+"""
+
+import argparse
+import base64
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Windows: no getrusage, max RSS is left out of the report
+    resource = None
+
+from circuits.registry import BASE_DIR, circuit_names, get_circuit
+from prover.proof_cache import proof_key
+from circuits.state_tree import get_state_tree
+from prover.proof_runner import (
+    _cached_check,
+    precheck_address,
+    precheck_address_set,
+    precheck_age,
+    precheck_kyc
+)
+from prover.signature_verify import verify_qr_string
+from prover.witness import get_calculator
+from prover.worker_pool import get_pool, WorkerError
+from verifier import verify_cache
+from verifier.verify_runner import run_verify
+
+RESULTS_DIR = os.path.join(BASE_DIR, "benchmarks", "results")
+QR_PATH = os.path.join(BASE_DIR, "data", "aadhaar_qr.txt")
+
+
+# ==========================================================
+# SAMPLE INPUTS (all pass their circuit)
+# ==========================================================
+
+POLICY = {
+    "current_year": 2026,
+    "min_age": 18,
+    "required_country": 1,
+    "allowed_state1": 10,
+    "allowed_state2": 20
+}
+
+PERSON = {"dob_year": 2002, "country_code": 1, "state_code": 10}
+
+# Merkle-root policies: a realistic 30-state list
+ALLOWED_STATES = list(range(10, 40))
+
+
+def _membership(state_code):
+    tree = get_state_tree(ALLOWED_STATES)
+    path_elements, path_indices = tree.path(state_code)
+    return {
+        "allowed_states_root": tree.root,
+        "state_code": state_code,
+        "path_elements": path_elements,
+        "path_indices": path_indices
+    }
+
+
+SAMPLES = {
+    "age": (
+        lambda: precheck_age(PERSON["dob_year"], POLICY["current_year"], POLICY["min_age"]),
+        {
+            "dob_year": PERSON["dob_year"],
+            "current_year": POLICY["current_year"],
+            "min_age": POLICY["min_age"]
+        }
+    ),
+    "address": (
+        lambda: precheck_address(
+            PERSON["country_code"], PERSON["state_code"],
+            POLICY["required_country"], POLICY["allowed_state1"], POLICY["allowed_state2"]
+        ),
+        {
+            "country_code": PERSON["country_code"],
+            "state_code": PERSON["state_code"],
+            "required_country": POLICY["required_country"],
+            "allowed_state1": POLICY["allowed_state1"],
+            "allowed_state2": POLICY["allowed_state2"]
+        }
+    ),
+    "kyc": (
+        lambda: precheck_kyc(
+            PERSON["dob_year"], POLICY["current_year"], POLICY["min_age"],
+            PERSON["country_code"], PERSON["state_code"],
+            POLICY["required_country"], POLICY["allowed_state1"], POLICY["allowed_state2"]
+        ),
+        {
+            "dob_year": PERSON["dob_year"],
+            "current_year": POLICY["current_year"],
+            "min_age": POLICY["min_age"],
+            "country_code": PERSON["country_code"],
+            "state_code": PERSON["state_code"],
+            "required_country": POLICY["required_country"],
+            "allowed_state1": POLICY["allowed_state1"],
+            "allowed_state2": POLICY["allowed_state2"]
+        }
+    ),
+    "address_membership": (
+        lambda: precheck_address_set(
+            PERSON["country_code"], PERSON["state_code"], POLICY["required_country"], ALLOWED_STATES
+        ),
+        {
+            "required_country": POLICY["required_country"],
+            "country_code": PERSON["country_code"],
+            **_membership(PERSON["state_code"])
+        }
+    ),
+    "kyc_membership": (
+        lambda: precheck_age(PERSON["dob_year"], POLICY["current_year"], POLICY["min_age"])
+        or precheck_address_set(
+            PERSON["country_code"], PERSON["state_code"], POLICY["required_country"], ALLOWED_STATES
+        ),
+        {
+            "current_year": POLICY["current_year"],
+            "min_age": POLICY["min_age"],
+            "required_country": POLICY["required_country"],
+            "dob_year": PERSON["dob_year"],
+            "country_code": PERSON["country_code"],
+            **_membership(PERSON["state_code"])
+        }
+    )
+}
+
+
+class StageSkipped(Exception):
+    """Raised by a stage that cannot run in this environment."""
+
+
+# ==========================================================
+# MEASUREMENT
+# ==========================================================
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not samples:
+        return None
+    rank = max(1, -(-len(samples) * pct // 100))
+    return samples[int(rank) - 1]
+
+
+def measure(fn, iterations, warmup):
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    samples.sort()
+
+    return {
+        "status": "ok",
+        "n": len(samples),
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": percentile(samples, 50),
+        "p99_ms": percentile(samples, 99),
+        "min_ms": samples[0],
+        "max_ms": samples[-1],
+        "peak_kib": peak / 1024
+    }
+
+
+def run_stage(name, fn, iterations, warmup):
+    try:
+        result = measure(fn, iterations, warmup)
+    except StageSkipped as exc:
+        result = {"status": "skipped", "reason": str(exc)}
+    except Exception as exc:
+        result = {"status": "error", "reason": f"{type(exc).__name__}: {exc}"}
+
+    print(f"  {name:<10} {format_result(result)}")
+    return result
+
+
+def format_result(result):
+    if result["status"] != "ok":
+        return f"{result['status']}: {result['reason']}"
+    return (
+        f"mean {result['mean_ms']:9.3f} ms   p50 {result['p50_ms']:9.3f} ms   "
+        f"p99 {result['p99_ms']:9.3f} ms   peak {result['peak_kib']:8.1f} KiB"
+    )
+
+
+# ==========================================================
+# STAGES
+# ==========================================================
+
+def _fixture_proof(name):
+    proof_path = os.path.join(BASE_DIR, f"{name}_proof.json")
+    public_path = os.path.join(BASE_DIR, f"{name}_public.json")
+
+    if not (os.path.exists(proof_path) and os.path.exists(public_path)):
+        return None
+
+    with open(proof_path, "r") as f:
+        proof = json.load(f)
+    with open(public_path, "r") as f:
+        public_signals = json.load(f)
+
+    return proof, public_signals
+
+
+def bench_circuit(name, iterations, warmup):
+    print(f"\n[{name}]")
+
+    circuit = get_circuit(name)
+    precheck, input_data = SAMPLES[name]
+    calculator = get_calculator(circuit.wasm_path)
+    witness = calculator.calculate_wtns(input_data)
+
+    results = {}
+
+    def uncached_precheck():
+        # the verdict cache would turn every iteration after the first into a hit
+        _cached_check.cache_clear()
+        return precheck()
+
+    results["precheck"] = run_stage("precheck", uncached_precheck, iterations, warmup)
+
+    # cache key + worker request body, i.e. everything serialized per proof
+    def serialize():
+        proof_key(circuit, input_data)
+        json.dumps({
+            "op": "prove",
+            "witness": base64.b64encode(witness).decode(),
+            "zkey": circuit.zkey_path
+        })
+
+    results["serialize"] = run_stage("serialize", serialize, iterations, warmup)
+
+    results["witness"] = run_stage(
+        "witness", lambda: calculator.calculate_wtns(input_data), iterations, warmup
+    )
+
+    proved = []
+
+    def prove():
+        try:
+            proved[:] = [get_pool().prove(witness, circuit.zkey_path, circuit.name)]
+        except (WorkerError, OSError) as exc:
+            raise StageSkipped(f"prover unavailable ({exc})")
+
+    results["prove"] = run_stage("prove", prove, iterations, warmup)
+
+    sample = proved[0] if proved else _fixture_proof(name)
+
+    def verify():
+        if sample is None:
+            raise StageSkipped("no proof to verify (prover unavailable, no fixture)")
+        result = run_verify(name, *sample)
+        if result["status"] != "valid":
+            raise StageSkipped(f"sample proof does not verify: {result['message']}")
+
+    results["verify"] = run_stage("verify", verify, iterations, warmup)
+
+    return results
+
+
+def bench_signature(iterations, warmup):
+    print("\n[signature]")
+
+    with open(QR_PATH, "r") as f:
+        qr = f.read().strip()
+
+    def check():
+        if verify_qr_string(qr)["status"] != "valid":
+            raise StageSkipped("sample QR does not verify against keys/")
+
+    return {"verify_qr": run_stage("verify_qr", check, iterations, warmup)}
+
+
+# ==========================================================
+# RESULTS
+# ==========================================================
+
+def git_commit():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no", "--", "."],
+            cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + ("-dirty" if dirty else "")
+
+
+def compare(base, current):
+    """Print mean / p99 change of every stage present in both runs."""
+    print(f"\n=== {base['meta']['commit']} → {current['meta']['commit']} ===")
+
+    for group, stages in current["results"].items():
+        for stage, result in stages.items():
+            old = base["results"].get(group, {}).get(stage)
+            if result["status"] != "ok" or not old or old["status"] != "ok":
+                continue
+
+            changes = []
+            for field in ("mean_ms", "p99_ms"):
+                delta = (result[field] - old[field]) / old[field] * 100 if old[field] else 0.0
+                changes.append(f"{field[:-3]} {old[field]:9.3f} → {result[field]:9.3f} ms ({delta:+6.1f}%)")
+
+            print(f"  {group + '.' + stage:<20} " + "   ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage prover / verifier benchmarks")
+    available = [name for name in circuit_names() if name in SAMPLES]
+    parser.add_argument("--circuits", nargs="+", choices=available, default=available)
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--no-signature", action="store_true", help="skip the QR signature stage")
+    parser.add_argument("--out", help="result file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    # this process only (the environment is left alone); read on first use
+    if "VERIFY_CACHE_ENTRIES" not in os.environ:
+        verify_cache.VERIFY_CACHE_ENTRIES = 0
+
+    results = {}
+
+    for name in args.circuits:
+        results[name] = bench_circuit(name, args.iterations, args.warmup)
+
+    if not args.no_signature:
+        results["signature"] = bench_signature(args.iterations, args.warmup)
+
+    meta = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "iterations": args.iterations,
+        "warmup": args.warmup
+    }
+
+    if resource is not None:
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        meta["max_rss_kib"] = (
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            // (1024 if sys.platform == "darwin" else 1)
+        )
+
+    report = {"meta": meta, "results": results}
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{report['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\nResults written: {out}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+pragma circom 2.0.0;
+
+include "state_membership.circom";
+
+// Address policy over any number of allowed states (up to 2^DEPTH):
+// the verifier supplies the Merkle root of its allowed-state list.
+//
+// Build (from "Zkp Backend"):
+//   circom circuits/address_membership.circom --r1cs --wasm --sym -l node_modules -o circuits/build_address_membership
+//   npx snarkjs groth16 setup circuits/build_address_membership/address_membership.r1cs <pot12.ptau> address_membership_0000.zkey
+//   npx snarkjs zkey contribute address_membership_0000.zkey address_membership_final.zkey
+//   npx snarkjs zkey export verificationkey address_membership_final.zkey address_membership_verification_key.json
+//   python -m circuits.registry --update
+
+template AddressMembership(DEPTH) {
+
+    // Public policy inputs (declared first: this is their public signal order)
+    signal input required_country;
+    signal input allowed_states_root;
+
+    // Private inputs (hidden)
+    signal input country_code;
+    signal input state_code;
+    signal input path_elements[DEPTH];
+    signal input path_indices[DEPTH];
+
+    // Enforce country match
+    country_code === required_country;
+
+    // Enforce state is a leaf of the allowed-states tree
+    component membership = StateMembership(DEPTH);
+    membership.leaf <== state_code;
+
+    for (var i = 0; i < DEPTH; i++) {
+        membership.path_elements[i] <== path_elements[i];
+        membership.path_indices[i] <== path_indices[i];
+    }
+
+    membership.root === allowed_states_root;
+}
+
+// DEPTH must match TREE_DEPTH in circuits/state_tree.py
+component main {public [required_country, allowed_states_root]} = AddressMembership(5);
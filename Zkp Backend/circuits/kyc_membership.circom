@@ -0,0 +1,52 @@
+pragma circom 2.0.0;
+
+include "circomlib/circuits/comparators.circom";
+include "state_membership.circom";
+
+// Combined KYC with the allowed states given as a Merkle root
+// (see address_membership.circom for the build steps, with "kyc_membership").
+
+template KYCMembership(DEPTH) {
+
+    // Public policy inputs (declared first: this is their public signal order)
+    signal input current_year;
+    signal input min_age;
+    signal input required_country;
+    signal input allowed_states_root;
+
+    // Private inputs (hidden)
+    signal input dob_year;
+    signal input country_code;
+    signal input state_code;
+    signal input path_elements[DEPTH];
+    signal input path_indices[DEPTH];
+
+    signal age;
+
+    // Compute age
+    age <== current_year - dob_year;
+
+    // Age >= min_age
+    component lt = LessThan(16);
+    lt.in[0] <== age;
+    lt.in[1] <== min_age;
+
+    lt.out === 0;
+
+    // Country match
+    country_code === required_country;
+
+    // State is a leaf of the allowed-states tree
+    component membership = StateMembership(DEPTH);
+    membership.leaf <== state_code;
+
+    for (var i = 0; i < DEPTH; i++) {
+        membership.path_elements[i] <== path_elements[i];
+        membership.path_indices[i] <== path_indices[i];
+    }
+
+    membership.root === allowed_states_root;
+}
+
+// DEPTH must match TREE_DEPTH in circuits/state_tree.py
+component main {public [current_year, min_age, required_country, allowed_states_root]} = KYCMembership(5);
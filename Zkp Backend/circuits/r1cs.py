@@ -0,0 +1,203 @@
+"""
+R1CS / SYM LOADER + CONSTRAINT CHECKER
+
+Responsibilities:
+1. Memory-map a circuit's .r1cs (iden3 binary format) and read its header
+   and constraints
+2. Read the .sym file: signal name → witness index
+3. Check a witness against every constraint  A·w * B·w = C·w  (mod p)
+   and name the signals of the ones it breaks
+4. Report signal / constraint counts for capacity planning
+
+    python -m circuits.r1cs      # counts for every circuit in the registry
+
+The witness from prover/witness.py is indexed like the r1cs wires
+(wire 0 is the constant 1), so no mapping is needed.
+"""
+
+import mmap
+import struct
+
+SECTION_HEADER = 1
+SECTION_CONSTRAINTS = 2
+
+MAX_COUNTED_CONSTRAINTS = 1 << 16
+
+
+class R1CSError(Exception):
+    """Raised when an .r1cs / .sym file cannot be read."""
+
+
+# ==========================================================
+# SYM FILE
+# ==========================================================
+
+def read_sym(path):
+    """{signal name: witness index}; signals the compiler removed are left out."""
+    signals = {}
+    with open(path, "r") as f:
+        for line in f:
+            parts = line.strip().split(",", 3)
+            if len(parts) != 4:
+                continue
+            _, witness_index, _, name = parts
+            if int(witness_index) >= 0:
+                signals[name] = int(witness_index)
+    return signals
+
+
+# ==========================================================
+# R1CS FILE
+# ==========================================================
+
+def _sections(buf):
+    if buf[:4] != b"r1cs":
+        raise R1CSError("Not an r1cs file")
+
+    _, n_sections = struct.unpack_from("<II", buf, 4)
+    sections = {}
+    pos = 12
+
+    for _ in range(n_sections):
+        section_type, size = struct.unpack_from("<IQ", buf, pos)
+        pos += 12
+        sections[section_type] = (pos, size)
+        pos += size
+
+    return sections
+
+
+class ConstraintSystem:
+
+    def __init__(self, r1cs_path, sym_path=None):
+        self.r1cs_path = r1cs_path
+
+        with open(r1cs_path, "rb") as f:
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._sections = _sections(self._buf)
+        if SECTION_HEADER not in self._sections or SECTION_CONSTRAINTS not in self._sections:
+            raise R1CSError(f"{r1cs_path}: missing header or constraints section")
+
+        self._read_header()
+
+        self.signals = read_sym(sym_path) if sym_path else {}
+        self._names = {index: name for name, index in self.signals.items()}
+
+        # parsed on first check
+        self._constraints = None
+
+    def _read_header(self):
+        buf = self._buf
+        pos, _ = self._sections[SECTION_HEADER]
+
+        self.n8, = struct.unpack_from("<I", buf, pos)
+        pos += 4
+        self.prime = int.from_bytes(buf[pos:pos + self.n8], "little")
+        pos += self.n8
+
+        (
+            self.n_wires, self.n_public_outputs, self.n_public_inputs,
+            self.n_private_inputs, self.n_labels, self.n_constraints
+        ) = struct.unpack_from("<IIIIQI", buf, pos)
+
+    # ------------------------------------------------------
+    # constraints
+    # ------------------------------------------------------
+
+    def _read_constraints(self):
+        buf = self._buf
+        n8 = self.n8
+        pos, _ = self._sections[SECTION_CONSTRAINTS]
+        constraints = []
+
+        for _ in range(self.n_constraints):
+            combinations = []
+            for _ in range(3):
+                n_terms, = struct.unpack_from("<I", buf, pos)
+                pos += 4
+                terms = []
+                for _ in range(n_terms):
+                    wire, = struct.unpack_from("<I", buf, pos)
+                    coefficient = int.from_bytes(buf[pos + 4:pos + 4 + n8], "little")
+                    terms.append((wire, coefficient))
+                    pos += 4 + n8
+                combinations.append(tuple(terms))
+            constraints.append(tuple(combinations))
+
+        return constraints
+
+    @property
+    def constraints(self):
+        if self._constraints is None:
+            self._constraints = self._read_constraints()
+        return self._constraints
+
+    def unsatisfied(self, witness):
+        """Indices of the constraints the witness (list of ints, wire order) breaks."""
+        if len(witness) < self.n_wires:
+            raise R1CSError(f"Witness has {len(witness)} values, circuit has {self.n_wires} wires")
+
+        p = self.prime
+        broken = []
+
+        for index, (a, b, c) in enumerate(self.constraints):
+            a_value = sum(coefficient * witness[wire] for wire, coefficient in a)
+            b_value = sum(coefficient * witness[wire] for wire, coefficient in b)
+            c_value = sum(coefficient * witness[wire] for wire, coefficient in c)
+            if (a_value * b_value - c_value) % p:
+                broken.append(index)
+
+        return broken
+
+    def is_satisfied(self, witness):
+        return not self.unsatisfied(witness)
+
+    def constraint_signals(self, index):
+        """Names of the signals a constraint touches (wire numbers if unnamed)."""
+        names = []
+        for combination in self.constraints[index]:
+            for wire, _ in combination:
+                if wire == 0:
+                    continue
+                name = self._names.get(wire, f"wire {wire}")
+                if name not in names:
+                    names.append(name)
+        return names
+
+    def signal(self, witness, name):
+        """Value of a named signal in a witness (KeyError if it was optimized away)."""
+        return witness[self.signals[name]]
+
+    # ------------------------------------------------------
+    # capacity planning
+    # ------------------------------------------------------
+
+    def stats(self):
+        stats = {
+            "wires": self.n_wires,
+            "constraints": self.n_constraints,
+            "public_outputs": self.n_public_outputs,
+            "public_inputs": self.n_public_inputs,
+            "private_inputs": self.n_private_inputs,
+            "labels": self.n_labels,
+            "named_signals": len(self.signals)
+        }
+        # non-zero terms (prover MSM work); only counted where parsing is cheap
+        if self._constraints is not None or self.n_constraints <= MAX_COUNTED_CONSTRAINTS:
+            stats["terms"] = sum(
+                len(combination) for constraint in self.constraints for combination in constraint
+            )
+        return stats
+
+    def close(self):
+        self._buf.close()
+
+
+if __name__ == "__main__":
+
+    from circuits.registry import load_registry
+
+    for name, circuit in load_registry().items():
+        stats = circuit.constraint_system.stats()
+        print(f"{name}: " + ", ".join(f"{key} {value}" for key, value in stats.items()))
@@ -0,0 +1,339 @@
+"""
+CIRCUIT REGISTRY
+
+Responsibilities:
+1. Declare every circuit's artifacts (wasm, zkey, verification key, r1cs, sym) once
+2. Check artifact hashes against circuits/artifacts.sha256 at startup
+3. Check each verification key and r1cs matches its zkey (no stale keys)
+4. Keep verification keys parsed and zkeys / r1cs memory-mapped
+
+Adding a circuit = one entry in CIRCUITS + one line per artifact in the
+manifest (regenerate with `python -m circuits.registry --update`).
+Circuits marked "optional" are skipped while their artifacts are not built.
+"sample_input" (not an artifact, not hashed) is a valid input the API
+proves once at startup to warm the prover (api/warmup.py).
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+
+from circuits.r1cs import ConstraintSystem
+from verifier.groth16 import parse_verification_key
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+MANIFEST_PATH = os.path.join(BASE_DIR, "circuits", "artifacts.sha256")
+
+# Paths relative to BASE_DIR
+CIRCUITS = {
+    "age": {
+        "wasm": "circuits/build_age/age_js/age.wasm",
+        "zkey": "age_final.zkey",
+        "verification_key": "age_verification_key.json",
+        "r1cs": "circuits/build_age/age.r1cs",
+        "sym": "circuits/build_age/age.sym",
+        "sample_input": "circuits/age_input.json"
+    },
+    "address": {
+        "wasm": "circuits/build_address/address_js/address.wasm",
+        "zkey": "address_final.zkey",
+        "verification_key": "address_verification_key.json",
+        "r1cs": "circuits/build_address/address.r1cs",
+        "sym": "circuits/build_address/address.sym",
+        "sample_input": "circuits/address_input.json"
+    },
+    "kyc": {
+        "wasm": "circuits/build/kyc_js/kyc.wasm",
+        "zkey": "kyc_final.zkey",
+        "verification_key": "kyc_verification_key.json",
+        "r1cs": "circuits/build/kyc.r1cs",
+        "sym": "circuits/build/kyc.sym",
+        "sample_input": "circuits/input.json"
+    },
+    # 🔹 Merkle-root state policies (circuits/state_tree.py); optional
+    # until built, see the build steps in address_membership.circom
+    "address_membership": {
+        "wasm": "circuits/build_address_membership/address_membership_js/address_membership.wasm",
+        "zkey": "address_membership_final.zkey",
+        "verification_key": "address_membership_verification_key.json",
+        "r1cs": "circuits/build_address_membership/address_membership.r1cs",
+        "sym": "circuits/build_address_membership/address_membership.sym",
+        "optional": True
+    },
+    "kyc_membership": {
+        "wasm": "circuits/build_kyc_membership/kyc_membership_js/kyc_membership.wasm",
+        "zkey": "kyc_membership_final.zkey",
+        "verification_key": "kyc_membership_verification_key.json",
+        "r1cs": "circuits/build_kyc_membership/kyc_membership.r1cs",
+        "sym": "circuits/build_kyc_membership/kyc_membership.sym",
+        "optional": True
+    }
+}
+
+ARTIFACTS = ("wasm", "zkey", "verification_key", "r1cs", "sym")
+
+
+class RegistryError(Exception):
+    """Raised when a circuit artifact is missing, modified or inconsistent."""
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# ==========================================================
+# ZKEY HEADER (snarkjs binary format)
+# ==========================================================
+
+def _zkey_sections(buf):
+    if buf[:4] != b"zkey":
+        raise RegistryError("Not a zkey file")
+
+    _, n_sections = struct.unpack_from("<II", buf, 4)
+    sections = {}
+    pos = 12
+
+    for _ in range(n_sections):
+        section_type, size = struct.unpack_from("<IQ", buf, pos)
+        pos += 12
+        sections[section_type] = (pos, size)
+        pos += size
+
+    return sections
+
+
+def read_zkey_header(buf):
+    """
+    Groth16 header of a zkey: sizes plus alpha / beta / gamma / delta,
+    converted from Montgomery form to plain integers.
+    """
+    sections = _zkey_sections(buf)
+
+    protocol, = struct.unpack_from("<I", buf, sections[1][0])
+    if protocol != 1:
+        raise RegistryError("Only groth16 zkeys are supported")
+
+    pos = sections[2][0]
+
+    n8q, = struct.unpack_from("<I", buf, pos)
+    pos += 4
+    q = int.from_bytes(buf[pos:pos + n8q], "little")
+    pos += n8q
+
+    n8r, = struct.unpack_from("<I", buf, pos)
+    pos += 4 + n8r
+
+    n_vars, n_public, domain_size = struct.unpack_from("<III", buf, pos)
+    pos += 12
+
+    r_inv = pow(1 << (8 * n8q), -1, q)
+
+    def field():
+        nonlocal pos
+        value = int.from_bytes(buf[pos:pos + n8q], "little") * r_inv % q
+        pos += n8q
+        return value
+
+    def g1():
+        return [field(), field()]
+
+    def g2():
+        return [[field(), field()], [field(), field()]]
+
+    alpha_1 = g1()
+    g1()  # beta_1 (prover only)
+    beta_2 = g2()
+    gamma_2 = g2()
+    g1()  # delta_1 (prover only)
+    delta_2 = g2()
+
+    return {
+        "n_vars": n_vars,
+        "n_public": n_public,
+        "domain_size": domain_size,
+        "vk_alpha_1": alpha_1,
+        "vk_beta_2": beta_2,
+        "vk_gamma_2": gamma_2,
+        "vk_delta_2": delta_2
+    }
+
+
+def _affine(point):
+    # snarkjs JSON points are [x, y, "1"] / [[x0, x1], [y0, y1], ["1", "0"]]
+    return [
+        [int(c) for c in coord] if isinstance(coord, list) else int(coord)
+        for coord in point[:2]
+    ]
+
+
+# ==========================================================
+# CIRCUIT
+# ==========================================================
+
+class Circuit:
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.wasm_path = os.path.join(BASE_DIR, spec["wasm"])
+        self.zkey_path = os.path.join(BASE_DIR, spec["zkey"])
+        self.verification_key_path = os.path.join(BASE_DIR, spec["verification_key"])
+        self.r1cs_path = os.path.join(BASE_DIR, spec["r1cs"])
+        self.sym_path = os.path.join(BASE_DIR, spec["sym"])
+        self.sample_input_path = (
+            os.path.join(BASE_DIR, spec["sample_input"]) if spec.get("sample_input") else None
+        )
+
+        for artifact in ARTIFACTS:
+            path = getattr(self, f"{artifact}_path")
+            if not os.path.exists(path):
+                raise RegistryError(f"{name}: missing artifact {path}")
+
+        self.sha256 = {
+            artifact: file_sha256(getattr(self, f"{artifact}_path")) for artifact in ARTIFACTS
+        }
+
+        # zkey stays mapped for the life of the process
+        with open(self.zkey_path, "rb") as f:
+            self.zkey = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.zkey_header = read_zkey_header(self.zkey)
+
+        with open(self.verification_key_path, "r") as f:
+            self.verification_key_json = json.load(f)
+
+        self._check_key_matches_zkey()
+
+        self.verification_key = parse_verification_key(self.verification_key_json)
+
+        # 🔹 Constraints + signal names, for pre-checks that come from the circuit
+        self.constraint_system = ConstraintSystem(self.r1cs_path, self.sym_path)
+
+        if self.constraint_system.n_wires != self.zkey_header["n_vars"]:
+            raise RegistryError(
+                f"{self.name}: {os.path.basename(self.r1cs_path)} does not match "
+                f"{os.path.basename(self.zkey_path)} (different wire count)"
+            )
+
+    def _check_key_matches_zkey(self):
+        vk = self.verification_key_json
+
+        if int(vk["nPublic"]) != self.zkey_header["n_public"]:
+            raise RegistryError(f"{self.name}: verification key nPublic does not match zkey")
+
+        for field in ("vk_alpha_1", "vk_beta_2", "vk_gamma_2", "vk_delta_2"):
+            if _affine(vk[field]) != self.zkey_header[field]:
+                raise RegistryError(
+                    f"{self.name}: {field} in {os.path.basename(self.verification_key_path)} "
+                    f"does not match {os.path.basename(self.zkey_path)}"
+                )
+
+    def relative_paths(self):
+        return {
+            artifact: os.path.relpath(getattr(self, f"{artifact}_path"), BASE_DIR).replace(os.sep, "/")
+            for artifact in ARTIFACTS
+        }
+
+
+# ==========================================================
+# MANIFEST
+# ==========================================================
+
+def read_manifest(path=MANIFEST_PATH):
+    manifest = {}
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                digest, relpath = line.split(None, 1)
+                manifest[relpath.lstrip("*")] = digest
+    return manifest
+
+
+def write_manifest(circuits, path=MANIFEST_PATH):
+    lines = []
+    for circuit in circuits.values():
+        for artifact, relpath in circuit.relative_paths().items():
+            lines.append(f"{circuit.sha256[artifact]}  {relpath}")
+
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def check_manifest(circuits, manifest):
+    for circuit in circuits.values():
+        for artifact, relpath in circuit.relative_paths().items():
+            expected = manifest.get(relpath)
+            if expected is None:
+                raise RegistryError(f"{circuit.name}: {relpath} is not in the artifact manifest")
+            if expected != circuit.sha256[artifact]:
+                raise RegistryError(f"{circuit.name}: {relpath} does not match its recorded hash")
+
+
+# ==========================================================
+# REGISTRY
+# ==========================================================
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def _built(spec):
+    return all(os.path.exists(os.path.join(BASE_DIR, spec[artifact])) for artifact in ARTIFACTS)
+
+
+def _load_circuits():
+    circuits = {}
+    for name, spec in CIRCUITS.items():
+        if spec.get("optional") and not _built(spec):
+            print(f"Circuit registry: {name} is not built, skipping")
+            continue
+        circuits[name] = Circuit(name, spec)
+    return circuits
+
+
+def load_registry(check_hashes=True):
+    """Load and check every circuit once; later calls return the same registry."""
+    global _registry
+
+    with _registry_lock:
+        if _registry is None:
+            circuits = _load_circuits()
+            if check_hashes:
+                check_manifest(circuits, read_manifest())
+            _registry = circuits
+
+    return _registry
+
+
+def get_circuit(name):
+    circuit = load_registry().get(name)
+    if circuit is None:
+        raise KeyError(f"Unknown circuit: {name}")
+    return circuit
+
+
+def circuit_names():
+    """Circuits available in this deployment (optional ones only once built)."""
+    return list(load_registry())
+
+
+if __name__ == "__main__":
+
+    if "--update" in sys.argv:
+        circuits = _load_circuits()
+        write_manifest(circuits)
+        print(f"Manifest written: {MANIFEST_PATH}")
+    else:
+        for name, circuit in load_registry().items():
+            header = circuit.zkey_header
+            constraints = circuit.constraint_system.n_constraints
+            print(f"{name}: OK ({header['n_vars']} signals, {constraints} constraints, {header['n_public']} public)")
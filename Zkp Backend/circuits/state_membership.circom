@@ -0,0 +1,43 @@
+pragma circom 2.0.0;
+
+include "circomlib/circuits/poseidon.circom";
+
+// Merkle root of the tree that holds `leaf` at the position given by
+// path_indices (0 = current node is the left child, 1 = right child).
+// Cost is DEPTH Poseidon hashes whatever the number of allowed states.
+// Python mirror (tree building, paths, roots): circuits/state_tree.py
+
+template StateMembership(DEPTH) {
+
+    signal input leaf;
+    signal input path_elements[DEPTH];
+    signal input path_indices[DEPTH];
+
+    signal output root;
+
+    component hashers[DEPTH];
+
+    signal levels[DEPTH + 1];
+    signal left[DEPTH];
+    signal right[DEPTH];
+
+    levels[0] <== leaf;
+
+    for (var i = 0; i < DEPTH; i++) {
+
+        // Index bits must be 0 or 1
+        path_indices[i] * (1 - path_indices[i]) === 0;
+
+        // Swap (node, sibling) when the node is the right child
+        left[i] <== levels[i] + path_indices[i] * (path_elements[i] - levels[i]);
+        right[i] <== path_elements[i] + path_indices[i] * (levels[i] - path_elements[i]);
+
+        hashers[i] = Poseidon(2);
+        hashers[i].inputs[0] <== left[i];
+        hashers[i].inputs[1] <== right[i];
+
+        levels[i + 1] <== hashers[i].out;
+    }
+
+    root <== levels[DEPTH];
+}
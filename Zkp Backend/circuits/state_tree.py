@@ -0,0 +1,166 @@
+"""
+ALLOWED-STATE MERKLE TREES
+
+Responsibilities:
+1. Poseidon hash, bit-for-bit equal to circomlib's Poseidon(2)
+2. Build a fixed-depth Merkle tree over a policy's allowed state codes
+3. Give the prover a state's path, and the verifier the policy's root
+4. Cache one tree per policy
+
+Mirrors circuits/state_membership.circom: leaves are the state codes
+themselves, nodes are Poseidon(left, right), and the tree is padded to
+2^TREE_DEPTH leaves by repeating the last state. Any policy of up to
+2^TREE_DEPTH states proves and verifies at the same cost.
+
+Poseidon constants are derived with the reference Grain LFSR procedure
+(BN254 scalar field, x^5, t = 3, 8 full / 57 partial rounds), which is
+how circomlib's constants were produced:
+    poseidon([1, 2]) = 0x115cc0f5e7d690413df64c6b9662e9cf2a3617f2743245519e19607a4417189a
+"""
+
+import functools
+
+from py_ecc.optimized_bn128 import curve_order as FIELD
+
+# Must match the DEPTH the membership circuits are compiled with
+TREE_DEPTH = 5
+MAX_STATES = 1 << TREE_DEPTH
+
+POSEIDON_T = 3
+POSEIDON_FULL_ROUNDS = 8
+POSEIDON_PARTIAL_ROUNDS = 57
+
+
+# ==========================================================
+# POSEIDON (circomlib-compatible, 2 inputs)
+# ==========================================================
+
+def _grain_bits(field, sbox, n, t, full_rounds, partial_rounds):
+    """Grain LFSR bit stream seeded with the Poseidon parameters."""
+    seed = (
+        bin(field)[2:].zfill(2) + bin(sbox)[2:].zfill(4) + bin(n)[2:].zfill(12)
+        + bin(t)[2:].zfill(12) + bin(full_rounds)[2:].zfill(10)
+        + bin(partial_rounds)[2:].zfill(10)
+    )
+    state = [int(bit) for bit in seed] + [1] * 30
+
+    def step():
+        bit = state[62] ^ state[51] ^ state[38] ^ state[23] ^ state[13] ^ state[0]
+        state.pop(0)
+        state.append(bit)
+        return bit
+
+    for _ in range(160):
+        step()
+
+    # self-shrinking: keep the second bit of each pair whose first bit is 1
+    while True:
+        if step():
+            yield step()
+        else:
+            step()
+
+
+@functools.lru_cache(maxsize=None)
+def _poseidon_params():
+    bits = _grain_bits(1, 0, FIELD.bit_length(), POSEIDON_T,
+                       POSEIDON_FULL_ROUNDS, POSEIDON_PARTIAL_ROUNDS)
+
+    def field_element(reject):
+        while True:
+            value = 0
+            for _ in range(FIELD.bit_length()):
+                value = (value << 1) | next(bits)
+            if not reject:
+                return value % FIELD
+            if value < FIELD:
+                return value
+
+    rounds = POSEIDON_FULL_ROUNDS + POSEIDON_PARTIAL_ROUNDS
+    constants = [field_element(reject=True) for _ in range(rounds * POSEIDON_T)]
+
+    # Cauchy MDS matrix: M[i][j] = 1 / (x_i + y_j)
+    points = [field_element(reject=False) for _ in range(2 * POSEIDON_T)]
+    xs, ys = points[:POSEIDON_T], points[POSEIDON_T:]
+    mds = [[pow(x + y, -1, FIELD) for y in ys] for x in xs]
+
+    return constants, mds
+
+
+def poseidon(left, right):
+    constants, mds = _poseidon_params()
+    t = POSEIDON_T
+    half = POSEIDON_FULL_ROUNDS // 2
+
+    state = [0, left % FIELD, right % FIELD]
+
+    for r in range(POSEIDON_FULL_ROUNDS + POSEIDON_PARTIAL_ROUNDS):
+        state = [(value + constants[r * t + i]) % FIELD for i, value in enumerate(state)]
+
+        if r < half or r >= half + POSEIDON_PARTIAL_ROUNDS:
+            state = [pow(value, 5, FIELD) for value in state]
+        else:
+            state[0] = pow(state[0], 5, FIELD)
+
+        state = [sum(m * value for m, value in zip(row, state)) % FIELD for row in mds]
+
+    return state[0]
+
+
+# ==========================================================
+# TREE
+# ==========================================================
+
+class PolicyError(ValueError):
+    """Raised when an allowed-states policy cannot be turned into a tree."""
+
+
+class StateTree:
+
+    def __init__(self, allowed_states, depth=TREE_DEPTH):
+        self.states = tuple(allowed_states)
+        self.depth = depth
+
+        if not self.states:
+            raise PolicyError("At least one allowed state is required")
+        if len(self.states) > 1 << depth:
+            raise PolicyError(f"At most {1 << depth} allowed states are supported")
+
+        leaves = list(self.states) + [self.states[-1]] * ((1 << depth) - len(self.states))
+
+        # levels[0] = leaves, levels[depth] = [root]
+        self.levels = [leaves]
+        for _ in range(depth):
+            below = self.levels[-1]
+            self.levels.append([
+                poseidon(below[i], below[i + 1]) for i in range(0, len(below), 2)
+            ])
+
+        self.root = self.levels[-1][0]
+        self._index = {state: i for i, state in enumerate(self.states)}
+
+    def path(self, state):
+        """(path_elements, path_indices) proving state is a leaf."""
+        index = self._index.get(state)
+        if index is None:
+            raise PolicyError(f"State {state} is not in the policy")
+
+        elements = []
+        indices = []
+        for level in self.levels[:-1]:
+            # sibling of the node on this level; index bit = we are the right child
+            elements.append(level[index ^ 1])
+            indices.append(index & 1)
+            index >>= 1
+
+        return elements, indices
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_tree(states):
+    return StateTree(states)
+
+
+def get_state_tree(allowed_states):
+    """Tree for a policy; the same set of states (any order) shares one tree."""
+    return _cached_tree(tuple(sorted(set(int(state) for state in allowed_states))))
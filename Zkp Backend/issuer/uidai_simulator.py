@@ -136,15 +136,27 @@ UIDAI SIMULATOR (ISSUER)
 This simulates Aadhaar issuing authority.
 
 Responsibilities:
-1. Generate RSA key pair
+1. Generate RSA key pair (only when missing)
 2. Create Aadhaar JSON data
 3. Digitally sign Aadhaar data
 4. Generate simulated QR payload (Base64 encoded)
+5. 🔹 NEW: Bulk mode — synthetic identities signed across a process pool,
+   streamed out as NDJSON QR payloads for load testing
+
+Usage:
+    python -m issuer.uidai_simulator                       # single demo record
+    python -m issuer.uidai_simulator --bulk 1000000 \
+        --out data/synthetic_qr.ndjson --workers 8 --seed 42
 """
 
+import argparse
 import json
 import os
 import base64
+import random
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives import serialization, hashes
 from cryptography.hazmat.backends import default_backend
@@ -152,6 +164,14 @@ from cryptography.hazmat.backends import default_backend
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
+PRIVATE_KEY_PATH = os.path.join(BASE_DIR, "keys", "private_key.pem")
+PUBLIC_KEY_PATH = os.path.join(BASE_DIR, "keys", "public_key.pem")
+
+PSS_PADDING = padding.PSS(
+    mgf=padding.MGF1(hashes.SHA256()),
+    salt_length=padding.PSS.MAX_LENGTH
+)
+
 
 # ==========================================================
 # STEP 1 — Generate RSA Key Pair (Run Once)
@@ -186,7 +206,24 @@ def generate_keys():
             )
         )
 
-    print("RSA Keys Generated Successfully")
+    print("RSA Keys Generated Successfully", file=sys.stderr)
+
+
+def ensure_keys():
+    """🔹 NEW: Keep the existing keypair so earlier QR payloads stay valid."""
+    if os.path.exists(PRIVATE_KEY_PATH) and os.path.exists(PUBLIC_KEY_PATH):
+        print("RSA Keys already present, reusing them", file=sys.stderr)
+        return
+    generate_keys()
+
+
+def load_private_key():
+    with open(PRIVATE_KEY_PATH, "rb") as f:
+        return serialization.load_pem_private_key(
+            f.read(),
+            password=None,
+            backend=default_backend()
+        )
 
 
 # ==========================================================
@@ -207,7 +244,7 @@ def create_aadhaar_data():
     with open(aadhaar_path, "w") as f:
         json.dump(aadhaar_data, f, indent=4)
 
-    print("Aadhaar JSON Created")
+    print("Aadhaar JSON Created", file=sys.stderr)
 
 
 # ==========================================================
@@ -245,7 +282,7 @@ def sign_aadhaar():
     with open(os.path.join(BASE_DIR, "data", "aadhaar_signature.sig"), "wb") as f:
         f.write(signature)
 
-    print("Aadhaar Data Signed Successfully")
+    print("Aadhaar Data Signed Successfully", file=sys.stderr)
 
 
 # ==========================================================
@@ -282,7 +319,104 @@ def generate_qr_payload():
     with open(os.path.join(BASE_DIR, "data", "aadhaar_qr.txt"), "w") as f:
         f.write(qr_string)
 
-    print("QR Payload Generated Successfully")
+    print("QR Payload Generated Successfully", file=sys.stderr)
+
+
+# ==========================================================
+# STEP 5 — Bulk Synthetic Identities (Load Testing)
+# ==========================================================
+
+FIRST_NAMES = [
+    "Aarav", "Amlan", "Ananya", "Arjun", "Diya", "Ishaan", "Kavya", "Meera",
+    "Neha", "Priya", "Rahul", "Riya", "Rohan", "Sai", "Sneha", "Vikram"
+]
+
+# Mostly domestic residents, a few foreign ones to exercise the country check
+COUNTRY_WEIGHTS = [(1, 95), (2, 3), (3, 2)]
+
+STATE_CODES = list(range(1, 37))
+
+
+def make_synthetic_record(index, seed):
+    """Deterministic for (index, seed): the same run can be regenerated exactly."""
+    rng = random.Random(seed * 1_000_003 + index)
+
+    countries, weights = zip(*COUNTRY_WEIGHTS)
+
+    return {
+        "name": f"{rng.choice(FIRST_NAMES)} {index}",
+        "dob_year": rng.randint(1940, 2015),
+        "country_code": rng.choices(countries, weights)[0],
+        "state_code": rng.choice(STATE_CODES)
+    }
+
+
+def build_qr_string(private_key, aadhaar_data):
+    """Sign one record and wrap it exactly like generate_qr_payload()."""
+    message = json.dumps(aadhaar_data).encode()
+    signature = private_key.sign(message, PSS_PADDING, hashes.SHA256())
+
+    payload = {
+        "aadhaar_data": aadhaar_data,
+        "signature": base64.b64encode(signature).decode()
+    }
+
+    return base64.b64encode(json.dumps(payload).encode()).decode()
+
+
+_worker_key = None
+
+
+def _init_signer():
+    # Each pool process loads the private key once
+    global _worker_key
+    _worker_key = load_private_key()
+
+
+def _sign_range(args):
+    start, end, seed = args
+    lines = []
+    for index in range(start, end):
+        record = make_synthetic_record(index, seed)
+        qr = build_qr_string(_worker_key, record)
+        lines.append(json.dumps({"id": index, "qr": qr}))
+    return "\n".join(lines) + "\n"
+
+
+def generate_bulk(count, out, workers=None, chunk_size=1000, seed=0):
+    """
+    Write `count` signed synthetic QR payloads as NDJSON ({"id", "qr"} per
+    line, the /verify-stream input format) to the file object `out`.
+
+    Chunks are signed in parallel and written in order; only a few chunks
+    per worker are in flight, so memory stays bounded for any count.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = (
+        (start, min(start + chunk_size, count), seed)
+        for start in range(0, count, chunk_size)
+    )
+
+    written = 0
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_signer) as pool:
+        pending = deque()
+
+        for chunk in chunks:
+            pending.append(pool.submit(_sign_range, chunk))
+
+            if len(pending) >= workers * 2:
+                written += _write_chunk(out, pending.popleft().result())
+
+        while pending:
+            written += _write_chunk(out, pending.popleft().result())
+
+    return written
+
+
+def _write_chunk(out, text):
+    out.write(text)
+    return text.count("\n")
 
 
 # ==========================================================
@@ -291,11 +425,36 @@ def generate_qr_payload():
 
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser(description="UIDAI issuer simulator")
+    parser.add_argument("--bulk", type=int, default=0,
+                        help="number of synthetic records to generate")
+    parser.add_argument("--out", default=os.path.join(BASE_DIR, "data", "synthetic_qr.ndjson"),
+                        help="NDJSON output path, '-' for stdout")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="signing processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rotate-keys", action="store_true",
+                        help="generate a new keypair even if one exists")
+    args = parser.parse_args()
+
     # Create required folders if not exist
     os.makedirs(os.path.join(BASE_DIR, "keys"), exist_ok=True)
     os.makedirs(os.path.join(BASE_DIR, "data"), exist_ok=True)
 
-    generate_keys()
-    create_aadhaar_data()
-    sign_aadhaar()
-    generate_qr_payload()   # 🔹 NEW STEP ADDED
+    if args.rotate_keys:
+        generate_keys()
+    else:
+        ensure_keys()
+
+    if args.bulk:
+        if args.out == "-":
+            count = generate_bulk(args.bulk, sys.stdout, args.workers, args.chunk_size, args.seed)
+        else:
+            with open(args.out, "w") as f:
+                count = generate_bulk(args.bulk, f, args.workers, args.chunk_size, args.seed)
+        print(f"{count} Synthetic QR Payloads Generated", file=sys.stderr)
+    else:
+        create_aadhaar_data()
+        sign_aadhaar()
+        generate_qr_payload()   # 🔹 NEW STEP ADDED
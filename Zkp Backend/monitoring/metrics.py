@@ -0,0 +1,220 @@
+"""
+METRICS
+
+Responsibilities:
+1. Counters, gauges and histograms with labels (circuit, stage, ...)
+2. Render them in the Prometheus text format for GET /metrics
+
+Recording is one lock + a few integer updates, so it is safe on the
+proving hot path. Values other modules already keep (cache stats,
+limiter queue, worker restarts) are read through callbacks at scrape
+time instead of being recorded twice.
+
+No prometheus_client dependency: the text format is small enough to
+write directly.
+"""
+
+import bisect
+import threading
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds: sub-ms pre-checks / witness up to slow proofs
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+_metrics = []
+_metrics_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+# ==========================================================
+# METRIC TYPES
+# ==========================================================
+
+class _Metric:
+
+    kind = None
+
+    def __init__(self, name, description, labels=(), callback=None):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        # callback() -> number, or {label values tuple: number}
+        self.callback = callback
+        self._values = {}
+        self._lock = threading.Lock()
+
+        with _metrics_lock:
+            _metrics.append(self)
+
+    def _samples(self):
+        if self.callback is None:
+            with self._lock:
+                return dict(self._values)
+
+        value = self.callback()
+        return value if isinstance(value, dict) else {(): value}
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.kind}"
+        ]
+        for label_values, value in sorted(self._samples().items()):
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {_number(value)}")
+        return lines
+
+
+class Counter(_Metric):
+
+    kind = "counter"
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+
+class Gauge(_Metric):
+
+    kind = "gauge"
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram(_Metric):
+
+    kind = "histogram"
+
+    def __init__(self, name, description, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                # per-bucket counts (+Inf last), sum, count
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[label_values] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.kind}"
+        ]
+
+        with self._lock:
+            snapshot = {key: (list(s[0]), s[1], s[2]) for key, s in self._values.items()}
+
+        for label_values, (counts, total, count) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _number(float(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, label_values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {count}")
+
+        return lines
+
+
+# ==========================================================
+# EXPOSITION
+# ==========================================================
+
+def render():
+    with _metrics_lock:
+        metrics = list(_metrics)
+
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ==========================================================
+# KYC METRICS (shared by prover / verifier / api)
+# ==========================================================
+
+stage_seconds = Histogram(
+    "kyc_stage_seconds",
+    "Time spent in each proving / verification stage",
+    labels=("circuit", "stage")
+)
+
+worker_start_seconds = Histogram(
+    "kyc_prover_worker_start_seconds",
+    "Time to boot a Node prover worker (phase=boot) and read its zkeys (phase=load)",
+    labels=("phase",)
+)
+
+precheck_failures = Counter(
+    "kyc_precheck_failures_total",
+    "Requests rejected by the Python pre-check before proving",
+    labels=("circuit",)
+)
+
+precheck_drift = Counter(
+    "kyc_precheck_drift_total",
+    "Inputs where the Python pre-check rules and the circuit disagree",
+    labels=("circuit",)
+)
+
+circuit_failures = Counter(
+    "kyc_circuit_failures_total",
+    "Inputs the circuit rejected while computing the witness",
+    labels=("circuit",)
+)
+
+prover_errors = Counter(
+    "kyc_prover_errors_total",
+    "Proofs lost to a prover worker crash, timeout or error",
+    labels=("circuit",)
+)
+
+verify_failures = Counter(
+    "kyc_verify_failures_total",
+    "Proofs that failed verification",
+    labels=("circuit",)
+)
+
+proofs_in_flight = Gauge(
+    "kyc_proofs_in_flight",
+    "Proofs currently being computed",
+    labels=("circuit",)
+)
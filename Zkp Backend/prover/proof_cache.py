@@ -0,0 +1,161 @@
+"""
+PROOF CACHE
+
+Responsibilities:
+1. Key each proof on a hash of (circuit wasm, zkey, inputs)
+2. Keep recent proofs with LRU + TTL eviction
+3. Coalesce identical requests that arrive while a proof is running
+4. Count hits / misses for monitoring
+
+Only hashes of the inputs are kept, never the inputs themselves.
+
+Config (environment):
+    PROOF_CACHE_SIZE   max cached proofs, 0 disables the cache (default 1024)
+    PROOF_CACHE_TTL    seconds a cached proof stays valid (default 300)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from monitoring.metrics import Counter, Gauge
+
+CACHE_SIZE = int(os.getenv("PROOF_CACHE_SIZE", "1024"))
+CACHE_TTL = float(os.getenv("PROOF_CACHE_TTL", "300"))
+
+
+# ==========================================================
+# CACHE KEY
+# ==========================================================
+
+def proof_key(circuit, input_data):
+    """circuit: registry entry (artifact hashes are computed once at startup)."""
+    h = hashlib.sha256()
+    h.update(circuit.name.encode())
+    h.update(circuit.sha256["wasm"].encode())
+    h.update(circuit.sha256["zkey"].encode())
+    h.update(json.dumps(input_data, sort_keys=True, separators=(",", ":")).encode())
+    return h.hexdigest()
+
+
+# ==========================================================
+# CACHE
+# ==========================================================
+
+class ProofCache:
+
+    def __init__(self, max_entries=CACHE_SIZE, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._inflight = {}             # key -> Future
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for key, or run compute() once for it.
+
+        Callers asking for a key that is already being computed wait for
+        that result instead of computing it again. A None result (failed
+        proof) is shared with waiters but not cached.
+        """
+        if self.max_entries <= 0:
+            return compute()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+            future = self._inflight.get(key)
+
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as exc:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(exc)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            if value is not None:
+                self._store(key, value)
+
+        future.set_result(value)
+        return value
+
+    def _store(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "inflight": len(self._inflight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions
+            }
+
+
+proof_cache = ProofCache()
+
+
+# ==========================================================
+# METRICS (read at scrape time)
+# ==========================================================
+
+for _field, _description in (
+    ("hits", "Proofs served from the cache"),
+    ("misses", "Proofs computed because they were not cached"),
+    ("coalesced", "Requests that waited on an identical in-flight proof"),
+    ("evictions", "Cached proofs evicted to stay under PROOF_CACHE_SIZE")
+):
+    Counter(
+        f"kyc_proof_cache_{_field}_total",
+        _description,
+        callback=lambda field=_field: getattr(proof_cache, field)
+    )
+
+Gauge(
+    "kyc_proof_cache_entries",
+    "Proofs currently cached",
+    callback=lambda: len(proof_cache._entries)
+)
@@ -1,6 +1,20 @@
-import subprocess
-import json
+import functools
 import os
+import time
+
+from circuits.registry import circuit_names, get_circuit
+from circuits.state_tree import MAX_STATES, get_state_tree
+from monitoring.metrics import (
+    circuit_failures,
+    precheck_drift,
+    precheck_failures,
+    prover_errors,
+    proofs_in_flight,
+    stage_seconds
+)
+from prover.proof_cache import proof_cache, proof_key
+from prover.witness import get_calculator, WitnessError
+from prover.worker_pool import get_pool, WorkerError
 
 # 🔹 MODIFIED: No longer importing signature verification for "Layman" flow
 # from prover.signature_verify import verify_aadhaar_signature 
@@ -8,118 +22,327 @@ import os
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
 
-def run_command(command):
-    result = subprocess.run(
-        command,
-        shell=True,
-        capture_output=True,
-        text=True
-    )
-    return result
+def run_fullprove(circuit, input_data, witness_values=None):
+    """
+    🔹 MODIFIED:
+    - Proves on a warm snarkjs worker instead of spawning `npx` per call
+    - Proof and public signals stay in memory (no shared files between requests)
+    - 🔹 NEW: Identical requests reuse a cached / in-flight proof (prover/proof_cache.py)
+    - 🔹 NEW: Witness is computed in-process (prover/witness.py), then proved
+      from the binary .wtns buffer; both stages are timed
+    - 🔹 NEW: Artifacts come from the circuit registry (circuits/registry.py)
+    - 🔹 NEW: Stage timings and failures are recorded for GET /metrics
+    - 🔹 NEW: The witness is checked against the circuit's R1CS before it
+      reaches the prover; witness_values (from the pre-check) is reused
+
+    Returns (proof, public_signals, timings), or None if the circuit rejected
+    the input. timings is empty when the proof came from the cache.
+    """
+    timings = {}
+
+    def prove():
+        proofs_in_flight.inc(circuit.name)
+        try:
+            start = time.perf_counter()
+            calculator = get_calculator(circuit.wasm_path)
+            try:
+                values = witness_values or calculator.calculate(input_data)
+            except WitnessError as exc:
+                print(f"Witness generation failed: {exc}")
+                circuit_failures.inc(circuit.name)
+                return None
+
+            # an unsatisfying witness would only give a proof that fails to verify
+            if not witness_values and circuit.constraint_system.unsatisfied(values):
+                print(f"Witness breaks the {circuit.name} constraints")
+                circuit_failures.inc(circuit.name)
+                return None
+
+            witness = calculator.encode_wtns(values)
+            timings["witness"] = time.perf_counter() - start
+            stage_seconds.observe(timings["witness"], circuit.name, "witness")
+
+            start = time.perf_counter()
+            try:
+                result = get_pool().prove(witness, circuit.zkey_path, circuit.name)
+            except WorkerError as exc:
+                print(exc)
+                prover_errors.inc(circuit.name)
+                return None
+            timings["prove"] = time.perf_counter() - start
+            stage_seconds.observe(timings["prove"], circuit.name, "prove")
+
+            return result
+        finally:
+            proofs_in_flight.dec(circuit.name)
+
+    key = proof_key(circuit, input_data)
+
+    result = proof_cache.get_or_compute(key, prove)
+
+    if result is None:
+        return None
+
+    proof, public_signals = result
+
+    return proof, public_signals, timings
+
+
+def generate_proof(circuit_name, input_data,
+                   failure_message="Proof generation failed (Circuit Check)",
+                   witness_values=None):
+    """
+    🔹 NEW:
+    - Proves any circuit in the registry from its raw input signals
+    - Pre-checks / demo mode stay in the per-circuit functions below
+    - witness_values: witness the circuit pre-check already computed
+    """
+    result = run_fullprove(get_circuit(circuit_name), input_data, witness_values)
+
+    if result is None:
+        return {"status": "fail", "message": failure_message}
+
+    proof, public_signals, timings = result
+
+    return {
+        "status": "success",
+        "proof": proof,
+        "public_signals": public_signals,
+        "timings": timings
+    }
 
 
 # ==========================================================
-# AGE PROOF (DIRECT INPUT)
+# PRE-CHECKS
 # ==========================================================
+# Run before any proving work. Each returns the failure message, or None
+# when the input passes.
+#
+# 🔹 MODIFIED: With PRECHECK_MODE=circuit (default) the circuit itself
+# decides: its witness is computed (running past failed asserts) and
+# checked against every R1CS constraint (circuits/r1cs.py). The plain-
+# Python rules below only word the message; when they disagree with the
+# circuit the circuit wins and the drift is counted. PRECHECK_MODE=python
+# gates on the rules alone (µs instead of a few ms per request), and so
+# do the generate_* functions under DEMO_MODE.
 
-def generate_age_proof(dob_year, current_year, min_age=18):
+PRECHECK_MODE = os.getenv("PRECHECK_MODE", "circuit").lower()
+
+# Verdicts per distinct input: years / codes / policies repeat a lot
+PRECHECK_CACHE_SIZE = int(os.getenv("PRECHECK_CACHE_SIZE", "4096"))
+
+
+def check_circuit(circuit_name, input_data):
     """
-    🔹 MODIFIED:
-    - Accepts dob_year directly (bypassing signature check)
-    - 🔹 NEW: Pre-check age before generating proof
+    Run a circuit on an input without proving.
+    Returns (witness, problems); no problems = a proof would succeed.
+    """
+    circuit = get_circuit(circuit_name)
+
+    try:
+        witness, problems = get_calculator(circuit.wasm_path).explain(input_data)
+    except WitnessError as exc:
+        # malformed input (missing / extra signals): nothing to check
+        return None, [str(exc)]
+
+    constraints = circuit.constraint_system
+    for index in constraints.unsatisfied(witness):
+        signals = constraints.constraint_signals(index)
+        shown = ", ".join(signals[:4]) + (", ..." if len(signals) > 4 else "")
+        problems.append(f"constraint {index} ({shown})")
+
+    return witness, problems
+
+
+@functools.lru_cache(maxsize=PRECHECK_CACHE_SIZE)
+def _cached_check(circuit_name, items):
+    witness, problems = check_circuit(circuit_name, dict(items))
+    # shared between callers: nothing downstream mutates the witness
+    return witness, tuple(problems)
+
+
+def _gate(circuit_name, input_data, rule_message):
+    """
+    (failure message or None, witness or None).
+    rule_message: verdict of the plain-Python rule for the same input.
+    input_data None: the rule alone decides (input cannot be built).
     """
+    if PRECHECK_MODE != "circuit" or input_data is None or circuit_name not in circuit_names():
+        return rule_message, None
+
+    witness, problems = _cached_check(circuit_name, tuple(sorted(input_data.items())))
+
+    if not problems:
+        if rule_message:
+            precheck_drift.inc(circuit_name)
+            print(f"Pre-check drift ({circuit_name}): circuit accepts, rule says {rule_message!r}")
+        return None, witness
+
+    if rule_message is None:
+        precheck_drift.inc(circuit_name)
+        print(f"Pre-check drift ({circuit_name}): rule accepts, circuit rejects: {'; '.join(problems)}")
+        return f"Input does not satisfy the {circuit_name} circuit", None
+
+    return rule_message, None
+
+
+def _age_inputs(dob_year, current_year, min_age):
+    return {"dob_year": dob_year, "current_year": current_year, "min_age": min_age}
+
+
+def _address_inputs(country_code, state_code, required_country, allowed_state1, allowed_state2):
+    return {
+        "country_code": country_code,
+        "state_code": state_code,
+        "required_country": required_country,
+        "allowed_state1": allowed_state1,
+        "allowed_state2": allowed_state2
+    }
+
 
-    # 🔹 PRE-CHECK: Age
+def _kyc_inputs(dob_year, current_year, min_age,
+                country_code, state_code,
+                required_country, allowed_state1, allowed_state2):
+    return {
+        **_age_inputs(dob_year, current_year, min_age),
+        **_address_inputs(country_code, state_code, required_country, allowed_state1, allowed_state2)
+    }
+
+
+def _age_rule(dob_year, current_year, min_age):
     age = current_year - dob_year
     if age < min_age:
         print(f"Pre-check failed: Age {age} is less than {min_age}")
-        return {"status": "fail", "message": f"User is under {min_age} (Age: {age})"}
+        return f"User is under {min_age} (Age: {age})"
+    return None
 
-    # 🔹 DEMO MODE: Skip actual ZKP generation if circuits not available
-    DEMO_MODE = os.getenv("DEMO_MODE", "true").lower() == "true"
-    
-    if DEMO_MODE:
-        print(f"✅ DEMO MODE: Age check passed (Age: {age} >= {min_age})")
-        return {"status": "success", "message": f"Age verified: {age} years"}
 
-    input_data = {
-        "dob_year": dob_year,
-        "current_year": current_year,
-        "min_age": min_age
-    }
+def _address_rule(country_code, state_code,
+                  required_country, allowed_state1, allowed_state2):
+    if country_code != required_country:
+        return "Invalid Country"
+
+    if state_code not in [allowed_state1, allowed_state2]:
+        return "Invalid State"
+
+    return None
+
 
-    input_path = os.path.join(BASE_DIR, "circuits", "temp_age_input.json")
-    proof_path = os.path.join(BASE_DIR, "proofs", "age_proof.json")
-    public_path = os.path.join(BASE_DIR, "proofs", "age_public.json")
-    wasm_path = os.path.join(BASE_DIR, "circuits", "build_age", "age_js", "age.wasm")
-    zkey_path = os.path.join(BASE_DIR, "age_final.zkey")
+def _kyc_rule(dob_year, current_year, min_age,
+              country_code, state_code,
+              required_country, allowed_state1, allowed_state2):
+    if current_year - dob_year < min_age:
+        return f"User is under {min_age}"
 
-    with open(input_path, "w") as f:
-        json.dump(input_data, f)
+    return _address_rule(country_code, state_code,
+                         required_country, allowed_state1, allowed_state2)
+
+
+def _address_set_rule(country_code, state_code, required_country, allowed_states):
+    if not allowed_states:
+        return "No allowed states given"
+
+    if len(set(allowed_states)) > MAX_STATES:
+        return f"At most {MAX_STATES} allowed states are supported"
+
+    if country_code != required_country:
+        return "Invalid Country"
 
-    command = f'npx snarkjs groth16 fullprove "{input_path}" "{wasm_path}" "{zkey_path}" "{proof_path}" "{public_path}"'
+    if state_code not in allowed_states:
+        return "Invalid State"
 
-    result = run_command(command)
+    return None
 
-    if result.returncode != 0:
-        print(result.stderr)
-        return {"status": "fail", "message": "Proof generation failed (Circuit Check)"}
 
-    return {"status": "success"}
+def precheck_age(dob_year, current_year, min_age=18):
+    return _gate(
+        "age",
+        _age_inputs(dob_year, current_year, min_age),
+        _age_rule(dob_year, current_year, min_age)
+    )[0]
+
+
+def precheck_address(country_code, state_code,
+                     required_country, allowed_state1, allowed_state2):
+    args = (country_code, state_code, required_country, allowed_state1, allowed_state2)
+    return _gate("address", _address_inputs(*args), _address_rule(*args))[0]
+
+
+def precheck_kyc(dob_year, current_year, min_age,
+                 country_code, state_code,
+                 required_country, allowed_state1, allowed_state2):
+    args = (dob_year, current_year, min_age, country_code, state_code,
+            required_country, allowed_state1, allowed_state2)
+    return _gate("kyc", _kyc_inputs(*args), _kyc_rule(*args))[0]
+
+
+def precheck_address_set(country_code, state_code, required_country, allowed_states):
+    # rule only: a state outside the policy has no Merkle path to feed the circuit
+    return _address_set_rule(country_code, state_code, required_country, allowed_states)
 
 
 # ==========================================================
-# ADDRESS PROOF (DIRECT INPUT)
+# AGE PROOF (DIRECT INPUT)
 # ==========================================================
 
-def generate_address_proof(country_code, state_code,
-                           required_country, allowed_state1, allowed_state2):
+def generate_age_proof(dob_year, current_year, min_age=18):
     """
     🔹 MODIFIED:
-    - Accepts country/state codes directly (bypassing signature check)
-    - 🔹 NEW: Pre-check address attributes
+    - Accepts dob_year directly (bypassing signature check)
+    - 🔹 NEW: Pre-check age before generating proof
     """
 
-    # 🔹 PRE-CHECK: Address
-    if country_code != required_country:
-        return {"status": "fail", "message": "Invalid Country"}
-    
-    if state_code not in [allowed_state1, allowed_state2]:
-        return {"status": "fail", "message": "Invalid State"}
+    # 🔹 DEMO MODE: the plain-Python rule alone decides (no circuit needed)
+    DEMO_MODE = os.getenv("DEMO_MODE", "true").lower() == "true"
+
+    # 🔹 PRE-CHECK: Age (🔹 decided by the circuit, see PRE-CHECKS)
+    input_data = _age_inputs(dob_year, current_year, min_age)
+    message, witness = _gate(
+        "age", None if DEMO_MODE else input_data, _age_rule(dob_year, current_year, min_age)
+    )
+    if message:
+        precheck_failures.inc("age")
+        return {"status": "fail", "message": message}
+
+    age = current_year - dob_year
 
     # 🔹 DEMO MODE: Skip actual ZKP generation if circuits not available
-    DEMO_MODE = os.getenv("DEMO_MODE", "true").lower() == "true"
-    
     if DEMO_MODE:
-        print(f"✅ DEMO MODE: Address check passed (Country: {country_code}, State: {state_code})")
-        return {"status": "success", "message": "Address verified"}
+        print(f"✅ DEMO MODE: Age check passed (Age: {age} >= {min_age})")
+        return {"status": "success", "message": f"Age verified: {age} years", "demo": True}
 
-    input_data = {
-        "country_code": country_code,
-        "state_code": state_code,
-        "required_country": required_country,
-        "allowed_state1": allowed_state1,
-        "allowed_state2": allowed_state2
-    }
+    return generate_proof("age", input_data, "Proof generation failed (Circuit Check)", witness)
 
-    input_path = os.path.join(BASE_DIR, "circuits", "temp_address_input.json")
-    proof_path = os.path.join(BASE_DIR, "proofs", "address_proof.json")
-    public_path = os.path.join(BASE_DIR, "proofs", "address_public.json")
-    wasm_path = os.path.join(BASE_DIR, "circuits", "build_address", "address_js", "address.wasm")
-    zkey_path = os.path.join(BASE_DIR, "address_final.zkey")
 
-    with open(input_path, "w") as f:
-        json.dump(input_data, f)
+# ==========================================================
+# ADDRESS PROOF (DIRECT INPUT)
+# ==========================================================
 
-    command = f'npx snarkjs groth16 fullprove "{input_path}" "{wasm_path}" "{zkey_path}" "{proof_path}" "{public_path}"'
+def generate_address_proof(country_code, state_code,
+                           required_country, allowed_state1, allowed_state2):
+    """
+    🔹 MODIFIED:
+    - Accepts country/state codes directly (bypassing signature check)
+    - 🔹 NEW: Pre-check address attributes
+    """
 
-    result = run_command(command)
+    # 🔹 DEMO MODE: the plain-Python rule alone decides (no circuit needed)
+    DEMO_MODE = os.getenv("DEMO_MODE", "true").lower() == "true"
 
-    if result.returncode != 0:
-        print(result.stderr)
-        return {"status": "fail", "message": "Address invalid (Circuit Check)"}
+    # 🔹 PRE-CHECK: Address (🔹 decided by the circuit, see PRE-CHECKS)
+    args = (country_code, state_code, required_country, allowed_state1, allowed_state2)
+    input_data = _address_inputs(*args)
+    message, witness = _gate("address", None if DEMO_MODE else input_data, _address_rule(*args))
+    if message:
+        precheck_failures.inc("address")
+        return {"status": "fail", "message": message}
+
+    # 🔹 DEMO MODE: Skip actual ZKP generation if circuits not available
+    if DEMO_MODE:
+        print(f"✅ DEMO MODE: Address check passed (Country: {country_code}, State: {state_code})")
+        return {"status": "success", "message": "Address verified", "demo": True}
 
-    return {"status": "success"}
+    return generate_proof("address", input_data, "Address invalid (Circuit Check)", witness)
 
 
 # ==========================================================
@@ -135,50 +358,117 @@ def generate_kyc_proof(dob_year, current_year, min_age,
     - 🔹 NEW: Pre-check all attributes
     """
 
-    # 🔹 PRE-CHECK: All
+    # 🔹 DEMO MODE: the plain-Python rule alone decides (no circuit needed)
+    DEMO_MODE = os.getenv("DEMO_MODE", "true").lower() == "true"
+
+    # 🔹 PRE-CHECK: All (🔹 decided by the circuit, see PRE-CHECKS)
+    args = (dob_year, current_year, min_age, country_code, state_code,
+            required_country, allowed_state1, allowed_state2)
+    input_data = _kyc_inputs(*args)
+    message, witness = _gate("kyc", None if DEMO_MODE else input_data, _kyc_rule(*args))
+    if message:
+        precheck_failures.inc("kyc")
+        return {"status": "fail", "message": message}
+
     age = current_year - dob_year
-    if age < min_age:
-        return {"status": "fail", "message": f"User is under {min_age}"}
 
-    if country_code != required_country:
-        return {"status": "fail", "message": "Invalid Country"}
-    
-    if state_code not in [allowed_state1, allowed_state2]:
-        return {"status": "fail", "message": "Invalid State"}
+    # 🔹 DEMO MODE: Skip actual ZKP generation if circuits not available
+    if DEMO_MODE:
+        print(f"✅ DEMO MODE: KYC check passed (Age: {age}, Country: {country_code}, State: {state_code})")
+        return {"status": "success", "message": "KYC verified", "demo": True}
+
+    return generate_proof("kyc", input_data, "KYC invalid (Circuit Check)", witness)
+
+
+# ==========================================================
+# ALLOWED-STATE SET PROOFS (Merkle root policy)
+# ==========================================================
+
+def _membership_inputs(state_code, allowed_states):
+    tree = get_state_tree(allowed_states)
+    path_elements, path_indices = tree.path(state_code)
+    return {
+        "allowed_states_root": tree.root,
+        "state_code": state_code,
+        "path_elements": path_elements,
+        "path_indices": path_indices
+    }
+
+
+def _not_built(circuit_name):
+    if circuit_name in circuit_names():
+        return None
+    return {"status": "fail", "message": f"The {circuit_name} circuit is not built on this server"}
+
+
+def generate_address_set_proof(country_code, state_code, required_country, allowed_states):
+    """
+    🔹 NEW:
+    - Address policy over any number of allowed states (up to MAX_STATES)
+    - The circuit checks a Merkle path to the policy's root, so cost does
+      not grow with the number of states (circuits/state_tree.py)
+    """
+
+    # 🔹 PRE-CHECK: Address
+    message = precheck_address_set(country_code, state_code, required_country, allowed_states)
+    if message:
+        precheck_failures.inc("address_membership")
+        return {"status": "fail", "message": message}
 
     # 🔹 DEMO MODE: Skip actual ZKP generation if circuits not available
     DEMO_MODE = os.getenv("DEMO_MODE", "true").lower() == "true"
-    
+
     if DEMO_MODE:
-        print(f"✅ DEMO MODE: KYC check passed (Age: {age}, Country: {country_code}, State: {state_code})")
-        return {"status": "success", "message": "KYC verified"}
+        print(f"✅ DEMO MODE: Address set check passed (Country: {country_code}, State: {state_code})")
+        return {"status": "success", "message": "Address verified", "demo": True}
+
+    failure = _not_built("address_membership")
+    if failure:
+        return failure
 
     input_data = {
-        "dob_year": dob_year,
-        "current_year": current_year,
-        "min_age": min_age,
-        "country_code": country_code,
-        "state_code": state_code,
         "required_country": required_country,
-        "allowed_state1": allowed_state1,
-        "allowed_state2": allowed_state2
+        "country_code": country_code,
+        **_membership_inputs(state_code, allowed_states)
     }
 
-    input_path = os.path.join(BASE_DIR, "circuits", "temp_kyc_input.json")
-    proof_path = os.path.join(BASE_DIR, "proofs", "kyc_proof.json")
-    public_path = os.path.join(BASE_DIR, "proofs", "kyc_public.json")
-    wasm_path = os.path.join(BASE_DIR, "circuits", "build", "kyc_js", "kyc.wasm")
-    zkey_path = os.path.join(BASE_DIR, "kyc_final.zkey")
+    return generate_proof("address_membership", input_data, "Address invalid (Circuit Check)")
+
+
+def generate_kyc_set_proof(dob_year, current_year, min_age,
+                           country_code, state_code,
+                           required_country, allowed_states):
+    """
+    🔹 NEW:
+    - Combined KYC with the allowed states given as a Merkle root policy
+    """
+
+    # 🔹 PRE-CHECK: All
+    message = _age_rule(dob_year, current_year, min_age) or _address_set_rule(
+        country_code, state_code, required_country, allowed_states
+    )
+    if message:
+        precheck_failures.inc("kyc_membership")
+        return {"status": "fail", "message": message}
 
-    with open(input_path, "w") as f:
-        json.dump(input_data, f)
+    # 🔹 DEMO MODE: Skip actual ZKP generation if circuits not available
+    DEMO_MODE = os.getenv("DEMO_MODE", "true").lower() == "true"
 
-    command = f'npx snarkjs groth16 fullprove "{input_path}" "{wasm_path}" "{zkey_path}" "{proof_path}" "{public_path}"'
+    if DEMO_MODE:
+        print(f"✅ DEMO MODE: KYC set check passed (Country: {country_code}, State: {state_code})")
+        return {"status": "success", "message": "KYC verified", "demo": True}
 
-    result = run_command(command)
+    failure = _not_built("kyc_membership")
+    if failure:
+        return failure
 
-    if result.returncode != 0:
-        print(result.stderr)
-        return {"status": "fail", "message": "KYC invalid (Circuit Check)"}
+    input_data = {
+        "current_year": current_year,
+        "min_age": min_age,
+        "required_country": required_country,
+        "dob_year": dob_year,
+        "country_code": country_code,
+        **_membership_inputs(state_code, allowed_states)
+    }
 
-    return {"status": "success"}
+    return generate_proof("kyc_membership", input_data, "KYC invalid (Circuit Check)")
@@ -0,0 +1,229 @@
+"""
+PROVING SCHEDULER
+
+Responsibilities:
+1. Estimate what a proof of each circuit costs: from its constraint
+   count (circuits/r1cs.py) until it has been measured, then from its
+   measured prove time (moving average)
+2. Pick which waiting proof gets the next free slot:
+       wfq    weighted fair queuing across circuits (default): each circuit
+              gets its weight's share of prover time, and cheap proofs
+              finish first within that share. Waiters that name a client
+              (API limiter, job queue) queue per (client, circuit), with
+              weight CLIENT_WEIGHTS[client] x PROVER_WEIGHTS[circuit]
+       sjf    shortest job first; waiting time is credited against cost
+              so heavy proofs still run under a stream of cheap ones
+       fifo   arrival order
+3. Report the usable cores, so the worker pool can be sized to them and
+   its workers pinned
+
+Used by the prover worker pool (threads waiting for a Node worker) and
+the API limiter (requests waiting for a proving slot), so a burst of kyc
+proofs does not hold up cheap address checks at either queue.
+
+Config (environment):
+    PROVER_SCHEDULER    wfq | sjf | fifo (default wfq)
+    PROVER_WEIGHTS      wfq weights per circuit, e.g. "address=2,kyc=1" (default 1)
+    PROVER_SJF_AGING    seconds of cost forgiven per second waited (default 1.0)
+"""
+
+import itertools
+import os
+import threading
+import time
+
+from monitoring.metrics import Gauge
+
+SCHEDULER_POLICY = os.getenv("PROVER_SCHEDULER", "wfq").lower()
+SJF_AGING = float(os.getenv("PROVER_SJF_AGING", "1.0"))
+
+POLICIES = ("wfq", "sjf", "fifo")
+
+# Before a circuit has been measured: fixed per-proof overhead (in
+# constraint-equivalents) + its constraints, at a default rate
+FIXED_COST_CONSTRAINTS = 1000
+DEFAULT_SECONDS_PER_CONSTRAINT = 1e-4
+
+# weight of the newest measurement in the moving average
+COST_SMOOTHING = 0.2
+
+
+def parse_weights(text):
+    """"name=weight,..." → {name: weight}; missing weights count as 1."""
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip():
+            weights[name.strip()] = max(float(weight or 1), 1e-6)
+    return weights
+
+
+PROVER_WEIGHTS = parse_weights(os.getenv("PROVER_WEIGHTS", ""))
+
+
+def usable_cpus():
+    """CPUs this process may run on (honours taskset / cgroup cpusets)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+# ==========================================================
+# COST MODEL
+# ==========================================================
+
+class CostModel:
+
+    def __init__(self, smoothing=COST_SMOOTHING):
+        self.smoothing = smoothing
+        self._measured = {}
+        self._lock = threading.Lock()
+
+    def _units(self, circuit_name):
+        # imported here: the registry is loaded lazily, after this module
+        from circuits.registry import get_circuit
+
+        try:
+            constraints = get_circuit(circuit_name).constraint_system.n_constraints
+        except KeyError:
+            constraints = 0
+        return FIXED_COST_CONSTRAINTS + constraints
+
+    def estimate(self, circuit_name):
+        """Expected prove time (s); None (unknown work) costs like an average proof."""
+        with self._lock:
+            measured = dict(self._measured)
+
+        if circuit_name in measured:
+            return measured[circuit_name]
+
+        if circuit_name is None:
+            if measured:
+                return sum(measured.values()) / len(measured)
+            return FIXED_COST_CONSTRAINTS * DEFAULT_SECONDS_PER_CONSTRAINT
+
+        # scale the constraint count by what measured circuits cost per unit
+        rates = [seconds / self._units(name) for name, seconds in measured.items()]
+        rate = sum(rates) / len(rates) if rates else DEFAULT_SECONDS_PER_CONSTRAINT
+
+        return self._units(circuit_name) * rate
+
+    def observe(self, circuit_name, seconds):
+        with self._lock:
+            previous = self._measured.get(circuit_name)
+            if previous is None:
+                self._measured[circuit_name] = seconds
+            else:
+                self._measured[circuit_name] = previous + self.smoothing * (seconds - previous)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._measured)
+
+
+cost_model = CostModel()
+
+
+# ==========================================================
+# SCHEDULER
+# ==========================================================
+
+class Ticket:
+
+    __slots__ = ("circuit", "waiter", "cost", "seq", "enqueued", "finish")
+
+    def __init__(self, circuit, waiter, cost, seq):
+        self.circuit = circuit
+        self.waiter = waiter
+        self.cost = cost
+        self.seq = seq
+        self.enqueued = time.perf_counter()
+        self.finish = 0.0
+
+
+class Scheduler:
+    """
+    Ordered set of waiters. Not thread-safe: callers hold their own lock
+    (or run on one event loop). waiter is whatever the caller wakes up.
+
+    Queues here are short (bounded by the API queue limit), so picking
+    is a linear scan; that keeps SJF aging exact.
+    """
+
+    def __init__(self, policy=SCHEDULER_POLICY, weights=None, client_weights=None, costs=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown scheduler policy: {policy} (use one of {', '.join(POLICIES)})")
+        self.policy = policy
+        self.weights = PROVER_WEIGHTS if weights is None else weights
+        self.client_weights = client_weights or {}
+        self.costs = costs or cost_model
+        self._waiting = []
+        self._seq = itertools.count()
+        # wfq: virtual time + last finish tag per circuit (self-clocked fair queuing)
+        self._virtual_time = 0.0
+        self._last_finish = {}
+
+    def __len__(self):
+        return len(self._waiting)
+
+    def push(self, circuit, waiter, client=None):
+        """client: whose share the ticket is charged to (wfq), together with the circuit."""
+        ticket = Ticket(circuit, waiter, self.costs.estimate(circuit), next(self._seq))
+
+        if self.policy == "wfq":
+            flow = (client, circuit)
+            weight = self.weights.get(circuit, 1.0) * self.client_weights.get(client, 1.0)
+            start = max(self._virtual_time, self._last_finish.get(flow, 0.0))
+            ticket.finish = start + ticket.cost / weight
+            self._last_finish[flow] = ticket.finish
+
+        self._waiting.append(ticket)
+        return ticket
+
+    def _key(self, ticket, now):
+        if self.policy == "wfq":
+            return (ticket.finish, ticket.seq)
+        if self.policy == "sjf":
+            return (ticket.cost - SJF_AGING * (now - ticket.enqueued), ticket.seq)
+        return (ticket.seq,)
+
+    def pop(self):
+        """Next ticket to run, or None if nobody is waiting."""
+        if not self._waiting:
+            return None
+
+        now = time.perf_counter()
+        ticket = min(self._waiting, key=lambda t: self._key(t, now))
+        self._waiting.remove(ticket)
+
+        if self.policy == "wfq":
+            self._virtual_time = ticket.finish
+            if not self._waiting:
+                # idle: start the next busy period from zero
+                self._virtual_time = 0.0
+                self._last_finish.clear()
+
+        return ticket
+
+    def remove(self, ticket):
+        """Drop a waiter that gave up (timeout / cancellation)."""
+        if ticket in self._waiting:
+            self._waiting.remove(ticket)
+
+    def queued_cost(self):
+        """Expected seconds of work waiting (estimate at enqueue time)."""
+        return sum(ticket.cost for ticket in self._waiting)
+
+    def waiting_by_circuit(self):
+        counts = {}
+        for ticket in self._waiting:
+            counts[ticket.circuit] = counts.get(ticket.circuit, 0) + 1
+        return counts
+
+
+Gauge(
+    "kyc_prover_cost_estimate_seconds",
+    "Expected prove time per circuit used for scheduling (measured average)",
+    labels=("circuit",),
+    callback=lambda: {(name,): seconds for name, seconds in cost_model.snapshot().items()}
+)
@@ -70,18 +70,91 @@ Responsibilities:
 2. Decode Base64 payload
 3. Extract Aadhaar data + signature
 4. Verify using public key
+5. 🔹 NEW: Verify QR strings in bulk across a process pool
+
+The UIDAI public key is loaded once per process (and once per pool
+worker), not on every call.
+
+Config (environment):
+    SIGNATURE_WORKERS       process pool size for bulk checks (default: usable CPU cores)
+    SIGNATURE_BATCH_LIMIT   QR strings accepted per bulk request (default 1000)
 """
 
+import atexit
 import json
 import os
 import base64
+import binascii
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives import serialization, hashes
 from cryptography.exceptions import InvalidSignature
 
+from prover.scheduler import usable_cpus
+
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
+PUBLIC_KEY_PATH = os.path.join(BASE_DIR, "keys", "public_key.pem")
+
+# 🔹 MODIFIED: cores this process may use (taskset / cgroup cpusets), not all of the box
+SIGNATURE_WORKERS = int(os.getenv("SIGNATURE_WORKERS", str(len(usable_cpus()))))
+SIGNATURE_BATCH_LIMIT = int(os.getenv("SIGNATURE_BATCH_LIMIT", "1000"))
+
+# Below this many QR strings a pool round-trip costs more than it saves
+BULK_INLINE_THRESHOLD = 64
+
+PSS_PADDING = padding.PSS(
+    mgf=padding.MGF1(hashes.SHA256()),
+    salt_length=padding.PSS.MAX_LENGTH
+)
+
+
+# ==========================================================
+# PUBLIC KEY (loaded once)
+# ==========================================================
+
+_public_key = None
+
+
+def get_public_key():
+    global _public_key
+
+    if _public_key is None:
+        with open(PUBLIC_KEY_PATH, "rb") as f:
+            _public_key = serialization.load_pem_public_key(f.read())
+
+    return _public_key
+
+
+# ==========================================================
+# SINGLE QR
+# ==========================================================
+
+def verify_qr_string(qr_string):
+    """
+    Decode one Base64 QR payload and check its UIDAI signature.
+
+    Returns {"status": "valid", "aadhaar_data": {...}} or
+    {"status": "invalid", "message": "..."}.
+    """
+    try:
+        payload = json.loads(base64.b64decode(qr_string))
+        aadhaar_data = payload["aadhaar_data"]
+        signature = base64.b64decode(payload["signature"])
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        return {"status": "invalid", "message": "Malformed Aadhaar QR"}
+
+    message = json.dumps(aadhaar_data).encode()
+
+    try:
+        get_public_key().verify(signature, message, PSS_PADDING, hashes.SHA256())
+    except InvalidSignature:
+        return {"status": "invalid", "message": "Invalid Aadhaar QR"}
+
+    return {"status": "valid", "aadhaar_data": aadhaar_data}
+
 
 def verify_aadhaar_signature():
 
@@ -89,41 +162,56 @@ def verify_aadhaar_signature():
     with open(os.path.join(BASE_DIR, "data", "aadhaar_qr.txt"), "r") as f:
         qr_string = f.read()
 
-    # 🔹 STEP 2: Decode QR payload
-    decoded_payload = base64.b64decode(qr_string)
-    payload = json.loads(decoded_payload)
+    # 🔹 STEP 2-4: Decode + verify (key is cached)
+    result = verify_qr_string(qr_string)
 
-    aadhaar_data = payload["aadhaar_data"]
-    signature = base64.b64decode(payload["signature"])
+    if result["status"] == "valid":
+        print("QR Decoded & Signature Verified Successfully")
+    else:
+        print("Signature Verification Failed")
 
-    # 🔹 STEP 3: Load public key
-    with open(os.path.join(BASE_DIR, "keys", "public_key.pem"), "rb") as f:
-        public_key = serialization.load_pem_public_key(f.read())
+    return result
 
-    message = json.dumps(aadhaar_data).encode()
 
-    try:
-        public_key.verify(
-            signature,
-            message,
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
-            ),
-            hashes.SHA256()
-        )
+# ==========================================================
+# BULK QR (process pool)
+# ==========================================================
 
-        print("QR Decoded & Signature Verified Successfully")
+_pool = None
+_pool_lock = threading.Lock()
 
-        return {
-            "status": "valid",
-            "aadhaar_data": aadhaar_data
-        }
 
-    except InvalidSignature:
-        print("Signature Verification Failed")
+def _init_worker():
+    # Load the key once per worker process, not per QR
+    get_public_key()
+
+
+def _get_pool():
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=SIGNATURE_WORKERS,
+                initializer=_init_worker
+            )
+            atexit.register(_pool.shutdown)
+
+    return _pool
+
+
+def verify_qr_batch(qr_strings):
+    """
+    Verify many QR strings; results come back in input order.
+
+    Large batches are split into chunks over a process pool sized to
+    the usable cores, since RSA verification is CPU-bound.
+    """
+    qr_strings = list(qr_strings)
+
+    if len(qr_strings) < BULK_INLINE_THRESHOLD or SIGNATURE_WORKERS <= 1:
+        return [verify_qr_string(qr) for qr in qr_strings]
+
+    chunksize = max(1, len(qr_strings) // (SIGNATURE_WORKERS * 4))
 
-        return {
-            "status": "invalid",
-            "message": "Invalid Aadhaar QR"
-        }
+    return list(_get_pool().map(verify_qr_string, qr_strings, chunksize=chunksize))
@@ -0,0 +1,116 @@
+/*
+ * SNARKJS PROVER WORKER
+ *
+ * Long-lived Node process started by prover/worker_pool.py.
+ *
+ * Responsibilities:
+ * 1. Load snarkjs and the BN128 curve once
+ * 2. Keep every circuit's wasm and zkey in memory after first use
+ * 3. Read one JSON request per line from stdin
+ * 4. Write one JSON response per line to stdout
+ *
+ * Requests:
+ *   {"id": 1, "op": "ping"}
+ *   {"id": 2, "op": "load", "files": ["<wasm>", "<zkey>"]}
+ *   {"id": 3, "op": "prove", "witness": "<base64 .wtns>", "zkey": "<path>"}
+ *   {"id": 4, "op": "fullprove", "input": {...}, "wasm": "<path>", "zkey": "<path>"}
+ *
+ * Responses:
+ *   {"id": 3, "ok": true, "proof": {...}, "publicSignals": [...]}
+ *   {"id": 3, "ok": false, "error": "..."}
+ *
+ * "prove" takes a witness computed in Python (prover/witness.py);
+ * "fullprove" computes the witness here as well.
+ */
+
+const fs = require("fs");
+const readline = require("readline");
+const snarkjs = require("snarkjs");
+
+// stdout carries the protocol only, anything logged goes to stderr
+console.log = console.error;
+console.info = console.error;
+console.debug = console.error;
+
+const files = new Map();
+
+function memFile(path) {
+    let data = files.get(path);
+    if (!data) {
+        data = new Uint8Array(fs.readFileSync(path));
+        files.set(path, data);
+    }
+    // fresh wrapper per call, the cached bytes are shared read-only
+    return { type: "mem", data };
+}
+
+async function handle(request) {
+    switch (request.op) {
+        case "ping":
+            return {};
+
+        case "load":
+            for (const path of request.files || []) {
+                memFile(path);
+            }
+            return { loaded: files.size };
+
+        case "prove": {
+            const witness = { type: "mem", data: new Uint8Array(Buffer.from(request.witness, "base64")) };
+            const { proof, publicSignals } = await snarkjs.groth16.prove(
+                memFile(request.zkey),
+                witness
+            );
+            return { proof, publicSignals };
+        }
+
+        case "fullprove": {
+            const { proof, publicSignals } = await snarkjs.groth16.fullProve(
+                request.input,
+                memFile(request.wasm),
+                memFile(request.zkey)
+            );
+            return { proof, publicSignals };
+        }
+
+        default:
+            throw new Error(`Unknown op: ${request.op}`);
+    }
+}
+
+function reply(message) {
+    process.stdout.write(JSON.stringify(message) + "\n");
+}
+
+// One request at a time, in arrival order
+let queue = Promise.resolve();
+
+const rl = readline.createInterface({ input: process.stdin });
+
+rl.on("line", (line) => {
+    if (!line.trim()) {
+        return;
+    }
+
+    queue = queue.then(async () => {
+        let request;
+        try {
+            request = JSON.parse(line);
+        } catch (err) {
+            reply({ id: null, ok: false, error: `Bad request: ${err.message}` });
+            return;
+        }
+
+        try {
+            const result = await handle(request);
+            reply({ id: request.id, ok: true, ...result });
+        } catch (err) {
+            reply({ id: request.id, ok: false, error: String(err && err.message ? err.message : err) });
+        }
+    });
+});
+
+// Parent closed our stdin: finish pending work, then exit
+rl.on("close", () => {
+    queue.then(() => process.exit(0));
+});
@@ -0,0 +1,257 @@
+"""
+IN-PROCESS WITNESS GENERATION
+
+Responsibilities:
+1. Compile + instantiate each circuit's wasm once (wasmtime)
+2. Feed inputs to the circom witness calculator
+3. Return the witness as a snarkjs .wtns binary buffer
+4. 🔹 NEW: Optionally run past failed asserts (explain()), so the
+   constraint checker (circuits/r1cs.py) can say which ones an input breaks
+
+Python port of the circom-generated witness_calculator.js, so the
+witness step no longer hides inside `snarkjs fullprove` and can be
+timed (and fail fast on assertion errors) before the prover runs.
+"""
+
+import struct
+import threading
+
+import wasmtime
+
+EXCEPTION_MESSAGES = {
+    1: "Signal not found",
+    2: "Too many signals set",
+    3: "Signal already set",
+    4: "Assert Failed",
+    5: "Not enough memory",
+    6: "Input signal array access exceeds the size"
+}
+
+
+ASSERT_FAILED = 4
+
+
+class WitnessError(Exception):
+    """Raised when the inputs do not satisfy the circuit."""
+
+
+def _i32(value):
+    # wasm i32 params are signed
+    return value - (1 << 32) if value >= (1 << 31) else value
+
+
+def _fnv_hash(name):
+    h = 0xCBF29CE484222325
+    for ch in name:
+        h ^= ord(ch)
+        h = (h * 0x100000001B3) % (1 << 64)
+    return h >> 32, h & 0xFFFFFFFF
+
+
+def _flatten(value):
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _flatten(item)
+    else:
+        yield value
+
+
+# ==========================================================
+# WITNESS CALCULATOR
+# ==========================================================
+
+class WitnessCalculator:
+
+    _engine = wasmtime.Engine()
+
+    def __init__(self, wasm_path):
+        self.wasm_path = wasm_path
+        # wasmtime stores are single-threaded
+        self._lock = threading.Lock()
+
+        self._store = wasmtime.Store(self._engine)
+        module = wasmtime.Module.from_file(self._engine, wasm_path)
+
+        self._errors = []
+        # None: asserts raise; a list: failed asserts are collected there
+        self._failed_asserts = None
+        no_args = wasmtime.FuncType([], [])
+
+        imports = {
+            "exceptionHandler": wasmtime.Func(
+                self._store,
+                wasmtime.FuncType([wasmtime.ValType.i32()], []),
+                self._on_exception
+            ),
+            "printErrorMessage": wasmtime.Func(
+                self._store, no_args, lambda: self._errors.append(self._message())
+            ),
+            "writeBufferMessage": wasmtime.Func(
+                self._store, no_args, lambda: self._message()
+            ),
+            "showSharedRWMemory": wasmtime.Func(
+                self._store, no_args, lambda: None
+            )
+        }
+
+        instance = wasmtime.Instance(
+            self._store,
+            module,
+            [imports[item.name] for item in module.imports]
+        )
+
+        exports = instance.exports(self._store)
+        self._fn = {
+            name: exports[name] for name in (
+                "init", "getFieldNumLen32", "getRawPrime", "getWitnessSize",
+                "getInputSize", "getInputSignalSize", "setInputSignal",
+                "getWitness", "readSharedRWMemory", "writeSharedRWMemory",
+                "getMessageChar"
+            )
+        }
+
+        self.n32 = self._call("getFieldNumLen32")
+        self._call("getRawPrime")
+        self.prime = self._read_field()
+        self.witness_size = self._call("getWitnessSize")
+
+    # ------------------------------------------------------
+    # wasm helpers
+    # ------------------------------------------------------
+
+    def _call(self, name, *args):
+        return self._fn[name](self._store, *args)
+
+    def _message(self):
+        chars = []
+        c = self._call("getMessageChar")
+        while c != 0:
+            chars.append(chr(c))
+            c = self._call("getMessageChar")
+        return "".join(chars)
+
+    def _on_exception(self, code):
+        message = EXCEPTION_MESSAGES.get(code, "Unknown error")
+        details = " ".join(self._errors).strip()
+
+        if code == ASSERT_FAILED and self._failed_asserts is not None:
+            # returning lets the generated code carry on past the assert
+            self._failed_asserts.append(details or message)
+            self._errors = []
+            return
+
+        raise WitnessError(f"{message}. {details}".strip())
+
+    def _read_field(self):
+        value = 0
+        for j in range(self.n32):
+            value |= (self._call("readSharedRWMemory", j) & 0xFFFFFFFF) << (32 * j)
+        return value
+
+    def _write_field(self, value):
+        for j in range(self.n32):
+            self._call("writeSharedRWMemory", j, _i32((value >> (32 * j)) & 0xFFFFFFFF))
+
+    # ------------------------------------------------------
+    # witness
+    # ------------------------------------------------------
+
+    def _set_inputs(self, input_data):
+        self._errors = []
+        self._call("init", 0)
+
+        input_counter = 0
+
+        for name, value in input_data.items():
+            msb, lsb = _fnv_hash(name)
+            values = list(_flatten(value))
+
+            size = self._call("getInputSignalSize", _i32(msb), _i32(lsb))
+            if size < 0:
+                raise WitnessError(f"Signal {name} not found")
+            if len(values) != size:
+                raise WitnessError(
+                    f"Expected {size} values for input signal {name}, got {len(values)}"
+                )
+
+            for i, item in enumerate(values):
+                self._write_field(int(item) % self.prime)
+                self._call("setInputSignal", _i32(msb), _i32(lsb), i)
+                input_counter += 1
+
+        expected = self._call("getInputSize")
+        if input_counter < expected:
+            raise WitnessError(
+                f"Not all inputs have been set. Only {input_counter} out of {expected}"
+            )
+
+    def _run(self, input_data, collect):
+        with self._lock:
+            return self._run_unlocked(input_data, collect)
+
+    def _run_unlocked(self, input_data, collect):
+        try:
+            self._set_inputs(input_data)
+        except wasmtime.WasmtimeError as exc:
+            # Trap raised through the exception handler
+            raise WitnessError(str(exc).splitlines()[0])
+
+        witness = []
+        for i in range(self.witness_size):
+            self._call("getWitness", i)
+            witness.append(collect())
+        return witness
+
+    def calculate(self, input_data):
+        """Witness as a list of field elements (ints)."""
+        return self._run(input_data, self._read_field)
+
+    def explain(self, input_data):
+        """
+        (witness, failed asserts): the witness is computed even when the
+        input breaks the circuit's asserts, for diagnosis only.
+        """
+        with self._lock:
+            self._failed_asserts = []
+            try:
+                witness = self._run_unlocked(input_data, self._read_field)
+                return witness, self._failed_asserts
+            finally:
+                self._failed_asserts = None
+
+    def calculate_wtns(self, input_data):
+        """Witness in snarkjs .wtns (version 2) binary format."""
+        return self.encode_wtns(self.calculate(input_data))
+
+    def encode_wtns(self, witness):
+        """Witness values (ints) → snarkjs .wtns (version 2) binary format."""
+        n8 = self.n32 * 4
+
+        header = b"wtns" + struct.pack("<II", 2, 2)
+        section1 = (
+            struct.pack("<IQI", 1, 4 + n8 + 4, n8)
+            + self.prime.to_bytes(n8, "little")
+            + struct.pack("<I", self.witness_size)
+        )
+        section2 = struct.pack("<IQ", 2, n8 * self.witness_size) + b"".join(
+            value.to_bytes(n8, "little") for value in witness
+        )
+
+        return header + section1 + section2
+
+
+# ==========================================================
+# SHARED CALCULATORS (one instance per circuit)
+# ==========================================================
+
+_calculators = {}
+_calculators_lock = threading.Lock()
+
+
+def get_calculator(wasm_path):
+    with _calculators_lock:
+        calculator = _calculators.get(wasm_path)
+        if calculator is None:
+            calculator = WitnessCalculator(wasm_path)
+            _calculators[wasm_path] = calculator
+    return calculator
@@ -0,0 +1,357 @@
+"""
+SNARKJS WORKER POOL
+
+Responsibilities:
+1. Start long-lived Node prover workers (prover/snarkjs_worker.js)
+2. Lend one idle worker to each proof request; when all are busy, the
+   scheduler (prover/scheduler.py) picks which waiting proof goes next
+3. Restart workers that crash or hang
+4. Keep circuit wasm / zkey loaded between requests
+5. Size the pool to the usable cores and pin each worker to one
+
+snarkjs starts a thread per core in every worker, so a pool sized to the
+cores is pinned by default: each worker's threads share one core instead
+of cores x cores threads competing for all of them.
+
+Booting Node and re-reading the zkey costs far more than proving
+these small circuits, so workers are started once and reused.
+
+Config (environment):
+    PROVER_POOL_SIZE   number of Node workers (default: usable CPU cores)
+    PROVER_PIN_CPUS    "true" pins each worker to its own core
+                       (default "true" when PROVER_POOL_SIZE is not set, else "false")
+    PROVER_TIMEOUT     seconds to wait for one proof (default 60)
+    NODE_BINARY        node executable (default "node")
+"""
+
+import atexit
+import base64
+import itertools
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+
+from circuits.registry import load_registry
+from monitoring.metrics import Counter, Gauge, worker_start_seconds
+from prover.scheduler import Scheduler, cost_model, usable_cpus
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+WORKER_SCRIPT = os.path.join(BASE_DIR, "prover", "snarkjs_worker.js")
+
+# 🔹 MODIFIED: one worker per core this process may use (was a fixed 2)
+POOL_SIZE = int(os.getenv("PROVER_POOL_SIZE", str(len(usable_cpus()))))
+PIN_CPUS = os.getenv(
+    "PROVER_PIN_CPUS", "false" if "PROVER_POOL_SIZE" in os.environ else "true"
+).lower() == "true"
+PROVER_TIMEOUT = float(os.getenv("PROVER_TIMEOUT", "60"))
+NODE_BINARY = os.getenv("NODE_BINARY", "node")
+
+
+class WorkerError(Exception):
+    """Raised when a worker fails, crashes or times out."""
+
+    def __init__(self, message, fatal=False):
+        super().__init__(message)
+        # fatal: the worker itself is broken and must be restarted
+        self.fatal = fatal
+
+
+# ==========================================================
+# SINGLE WORKER
+# ==========================================================
+
+def _pin(pid, cpu):
+    """
+    Pin a running process to one core: the main thread first (threads it
+    starts later inherit that), then any thread it has already started.
+    """
+    try:
+        os.sched_setaffinity(pid, {cpu})
+        tids = [int(tid) for tid in os.listdir(f"/proc/{pid}/task")]
+    except OSError as exc:
+        print(f"Prover worker {pid} not pinned to CPU {cpu}: {exc}")
+        return
+
+    for tid in tids:
+        try:
+            os.sched_setaffinity(tid, {cpu})
+        except OSError:
+            # thread exited meanwhile
+            pass
+
+
+class _Worker:
+
+    def __init__(self, cpu=None):
+        # cpu: core to pin the Node process (and its threads) to, or None
+        self.cpu = cpu
+        # set by WorkerPool.shutdown: no longer in the pool, never replaced
+        self.retired = False
+        self.process = subprocess.Popen(
+            [NODE_BINARY, WORKER_SCRIPT],
+            cwd=BASE_DIR,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+        # not preexec_fn: that is unsafe in a process with threads
+        if cpu is not None:
+            _pin(self.process.pid, cpu)
+        self._ids = itertools.count(1)
+        self._responses = queue.Queue()
+
+        reader = threading.Thread(target=self._read_loop, daemon=True)
+        reader.start()
+
+    def _read_loop(self):
+        for line in self.process.stdout:
+            self._responses.put(line)
+        # EOF: the process has exited
+        self._responses.put(None)
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def call(self, message, timeout):
+        request_id = next(self._ids)
+
+        try:
+            self.process.stdin.write(json.dumps({"id": request_id, **message}) + "\n")
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as exc:
+            raise WorkerError(f"Prover worker is not running ({exc})", fatal=True)
+
+        while True:
+            try:
+                line = self._responses.get(timeout=timeout)
+            except queue.Empty:
+                raise WorkerError(f"Prover worker timed out after {timeout}s", fatal=True)
+
+            if line is None:
+                raise WorkerError("Prover worker exited unexpectedly", fatal=True)
+
+            try:
+                response = json.loads(line)
+            except ValueError:
+                # stray output on the protocol channel: the worker can't be trusted
+                raise WorkerError(f"Prover worker sent a malformed reply: {line[:200]!r}", fatal=True)
+
+            # Skip stale replies from an earlier, abandoned request
+            if response.get("id") == request_id:
+                break
+
+        if not response.get("ok"):
+            raise WorkerError(response.get("error", "Unknown prover error"))
+
+        return response
+
+    def stop(self):
+        if not self.alive():
+            return
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+
+    def kill(self):
+        if self.alive():
+            self.process.kill()
+
+
+# ==========================================================
+# POOL
+# ==========================================================
+
+class WorkerPool:
+
+    def __init__(self, size=POOL_SIZE, preload=(), pin_cpus=PIN_CPUS, scheduler=None):
+        self.size = max(1, size)
+        self.preload = list(preload)
+        self.pin_cpus = pin_cpus and hasattr(os, "sched_setaffinity")
+        # 🔹 MODIFIED: idle list + scheduler instead of a FIFO queue
+        self._idle = []
+        self._scheduler = scheduler or Scheduler()
+        self._workers = []
+        self._lock = threading.Lock()
+        # guards _idle and _scheduler; never held while a worker runs
+        self._dispatch = threading.Lock()
+        self.restarts = 0
+
+    def start(self):
+        with self._lock:
+            if self._workers:
+                return
+            cpus = usable_cpus()
+            for index in range(self.size):
+                # round robin over the cores when there are more workers
+                cpu = cpus[index % len(cpus)] if self.pin_cpus else None
+                worker = self._spawn(cpu)
+                self._workers.append(worker)
+                self._release(worker)
+
+    def _spawn(self, cpu=None):
+        # 🔹 Boot and file loading are timed apart (see GET /metrics)
+        start = time.perf_counter()
+        worker = _Worker(cpu)
+        worker.call({"op": "ping"}, PROVER_TIMEOUT)
+        worker_start_seconds.observe(time.perf_counter() - start, "boot")
+
+        if self.preload:
+            start = time.perf_counter()
+            worker.call({"op": "load", "files": self.preload}, PROVER_TIMEOUT)
+            worker_start_seconds.observe(time.perf_counter() - start, "load")
+        return worker
+
+    def _replace(self, worker):
+        worker.kill()
+        with self._lock:
+            # pool shut down while this worker was out: nothing to replace,
+            # the caller's call fails with WorkerError
+            if worker.retired or worker not in self._workers:
+                return worker
+            self.restarts += 1
+            fresh = self._spawn(worker.cpu)
+            self._workers[self._workers.index(worker)] = fresh
+        return fresh
+
+    # ------------------------------------------------------
+    # 🔹 NEW: scheduled hand-off of idle workers
+    # ------------------------------------------------------
+
+    def _acquire(self, circuit, timeout):
+        with self._dispatch:
+            if self._idle:
+                return self._idle.pop()
+            ticket = self._scheduler.push(circuit, {"ready": threading.Event(), "worker": None})
+
+        waiter = ticket.waiter
+        if waiter["ready"].wait(timeout):
+            return waiter["worker"]
+
+        with self._dispatch:
+            # handed a worker just as the wait ran out: use it
+            if waiter["worker"] is not None:
+                return waiter["worker"]
+            self._scheduler.remove(ticket)
+        raise WorkerError(f"No prover worker free after {timeout}s")
+
+    def _release(self, worker):
+        if worker.retired:
+            return
+        with self._dispatch:
+            ticket = self._scheduler.pop()
+            if ticket is None:
+                self._idle.append(worker)
+                return
+            ticket.waiter["worker"] = worker
+        ticket.waiter["ready"].set()
+
+    def waiting(self):
+        with self._dispatch:
+            return len(self._scheduler)
+
+    def idle(self):
+        with self._dispatch:
+            return len(self._idle)
+
+    def request(self, message, timeout=PROVER_TIMEOUT, circuit=None):
+        """circuit: registry name, used to order this request when all workers are busy."""
+        self.start()
+
+        worker = self._acquire(circuit, timeout)
+
+        try:
+            # 🔹 Worker died while idle: restart before use
+            if not worker.alive():
+                worker = self._replace(worker)
+
+            try:
+                start = time.perf_counter()
+                response = worker.call(message, timeout)
+            except WorkerError as exc:
+                # Crash / hang leaves the worker unusable
+                if exc.fatal:
+                    worker = self._replace(worker)
+                raise
+        finally:
+            self._release(worker)
+
+        # 🔹 measured prove time (not the wait) replaces the constraint-count estimate
+        if circuit is not None and message["op"] == "prove":
+            cost_model.observe(circuit, time.perf_counter() - start)
+
+        return response
+
+    def prove(self, witness, zkey_path, circuit=None):
+        """Prove from a .wtns buffer computed in Python."""
+        response = self.request({
+            "op": "prove",
+            "witness": base64.b64encode(witness).decode(),
+            "zkey": zkey_path
+        }, circuit=circuit)
+        return response["proof"], response["publicSignals"]
+
+    def fullprove(self, input_data, wasm_path, zkey_path, circuit=None):
+        response = self.request({
+            "op": "fullprove",
+            "input": input_data,
+            "wasm": wasm_path,
+            "zkey": zkey_path
+        }, circuit=circuit)
+        return response["proof"], response["publicSignals"]
+
+    def shutdown(self):
+        with self._lock:
+            for worker in self._workers:
+                worker.retired = True
+                worker.stop()
+            self._workers = []
+            with self._dispatch:
+                self._idle = []
+
+
+# ==========================================================
+# SHARED POOL
+# ==========================================================
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide pool, started on first use."""
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            # zkeys are read once per worker at boot, not on its first proof
+            _pool = WorkerPool(preload=[c.zkey_path for c in load_registry().values()])
+            atexit.register(_pool.shutdown)
+
+    _pool.start()
+    return _pool
+
+
+Counter(
+    "kyc_prover_worker_restarts_total",
+    "Prover workers replaced after a crash or hang",
+    callback=lambda: _pool.restarts if _pool else 0
+)
+
+Gauge(
+    "kyc_prover_workers_idle",
+    "Prover workers waiting for work",
+    callback=lambda: _pool.idle() if _pool else 0
+)
+
+Gauge(
+    "kyc_prover_workers_waiting",
+    "Proof requests waiting for a prover worker",
+    callback=lambda: _pool.waiting() if _pool else 0
+)
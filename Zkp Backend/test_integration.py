@@ -16,6 +16,8 @@ This script tests the complete flow:
 3. Proof Verification (Verifier Side)
 
 This simulates real end-to-end architecture.
+
+For per-stage timings use benchmarks/stage_bench.py instead.
 """
 
 from prover.proof_runner import (
@@ -38,14 +40,20 @@ from verifier.verify_runner import (
 print("\n=== AGE VERIFICATION TEST ===")
 
 age_prover_result = generate_age_proof(
+    dob_year=2002,
     current_year=2026,
     min_age=18
 )
 
 print("Prover Result:", age_prover_result)
 
-if age_prover_result["status"] == "success":
-    age_verifier_result = verify_age_proof()
+if age_prover_result.get("demo"):
+    print("DEMO MODE: no proof generated, skipping verification")
+elif age_prover_result["status"] == "success":
+    age_verifier_result = verify_age_proof(
+        age_prover_result["proof"],
+        age_prover_result["public_signals"]
+    )
     print("Verifier Result:", age_verifier_result)
 else:
     print("Age Verification Failed at Prover Stage")
@@ -58,6 +66,8 @@ else:
 print("\n=== ADDRESS VERIFICATION TEST ===")
 
 address_prover_result = generate_address_proof(
+    country_code=1,
+    state_code=10,
     required_country=1,
     allowed_state1=10,
     allowed_state2=20
@@ -65,8 +75,13 @@ address_prover_result = generate_address_proof(
 
 print("Prover Result:", address_prover_result)
 
-if address_prover_result["status"] == "success":
-    address_verifier_result = verify_address_proof()
+if address_prover_result.get("demo"):
+    print("DEMO MODE: no proof generated, skipping verification")
+elif address_prover_result["status"] == "success":
+    address_verifier_result = verify_address_proof(
+        address_prover_result["proof"],
+        address_prover_result["public_signals"]
+    )
     print("Verifier Result:", address_verifier_result)
 else:
     print("Address Verification Failed at Prover Stage")
@@ -79,8 +94,11 @@ else:
 print("\n=== COMBINED KYC TEST ===")
 
 kyc_prover_result = generate_kyc_proof(
+    dob_year=2002,
     current_year=2026,
     min_age=18,
+    country_code=1,
+    state_code=10,
     required_country=1,
     allowed_state1=10,
     allowed_state2=20
@@ -88,8 +106,13 @@ kyc_prover_result = generate_kyc_proof(
 
 print("Prover Result:", kyc_prover_result)
 
-if kyc_prover_result["status"] == "success":
-    kyc_verifier_result = verify_kyc_proof()
+if kyc_prover_result.get("demo"):
+    print("DEMO MODE: no proof generated, skipping verification")
+elif kyc_prover_result["status"] == "success":
+    kyc_verifier_result = verify_kyc_proof(
+        kyc_prover_result["proof"],
+        kyc_prover_result["public_signals"]
+    )
     print("Verifier Result:", kyc_verifier_result)
 else:
     print("KYC Verification Failed at Prover Stage")
@@ -0,0 +1,424 @@
+"""
+IN-PROCESS GROTH16 VERIFIER (BN128)
+
+Responsibilities:
+1. Parse snarkjs verification keys into curve points
+2. Parse snarkjs proofs and public signals
+3. Check the Groth16 pairing equation in Python (no snarkjs process)
+
+Groth16 accepts a proof (A, B, C) when
+
+    e(A, B) = e(alpha, beta) * e(vk_x, gamma) * e(C, delta)
+    vk_x    = IC[0] + sum(public[i] * IC[i + 1])
+
+which is checked as one pairing product against the identity:
+
+    e(-A, B) * e(alpha, beta) * e(vk_x, gamma) * e(C, delta) == 1
+
+A batch of N proofs for the same key is checked with one randomized
+product (random 128-bit r_i per proof):
+
+    prod e(-r_i A_i, B_i) * e(sum(r_i) alpha, beta)
+        * e(sum(r_i vk_x_i), gamma) * e(sum(r_i C_i), delta) == 1
+
+i.e. N + 3 Miller loops and a single final exponentiation instead of
+4N loops and N exponentiations. A forged proof passes only with
+probability ~2^-128.
+
+A prepared key (prepare_verification_key) moves all work that depends
+only on the key out of the per-proof path: e(alpha, beta) is kept as a
+Miller loop value, and the Miller loop line functions of beta / gamma /
+delta are precomputed so that evaluating them at a G1 point costs two
+scalar multiplications instead of curve arithmetic over FQ12. The
+fixed-point loops also share one squaring per step.
+"""
+
+import secrets
+
+from py_ecc.optimized_bn128 import (
+    FQ,
+    FQ2,
+    FQ12,
+    add,
+    b,
+    b2,
+    curve_order,
+    double,
+    eq,
+    field_modulus,
+    final_exponentiate,
+    is_on_curve,
+    multiply,
+    neg,
+    normalize,
+    pairing,
+    twist
+)
+from py_ecc.optimized_bn128.optimized_pairing import linefunc, pseudo_binary_encoding
+
+BATCH_SCALAR_BITS = 128
+
+# G2 subgroup check (Scott, "A note on group membership tests for G1, G2
+# and GT on BLS pairing-friendly curves"): on BN254 a twist point P is in
+# the order-r subgroup iff psi(P) == [6u^2] P, with psi the untwist-
+# Frobenius-twist endomorphism. A 128-bit scalar instead of [r] P.
+BN_U = 4965661367192848881
+_XI = FQ2([9, 1])
+_PSI_X = _XI ** ((field_modulus - 1) // 3)
+_PSI_Y = _XI ** ((field_modulus - 1) // 2)
+
+
+class ProofFormatError(ValueError):
+    """Raised when a proof, public signal or key cannot be parsed."""
+
+
+# ==========================================================
+# PARSING (snarkjs JSON → curve points)
+# ==========================================================
+
+def _field_element(value):
+    n = int(value)
+    if not 0 <= n < field_modulus:
+        raise ProofFormatError(f"Coordinate out of range: {value}")
+    return n
+
+
+def parse_g1(coords):
+    """snarkjs G1 point ["x", "y", "z"] → projective FQ point."""
+    try:
+        x, y, z = (_field_element(c) for c in coords)
+    except (TypeError, ValueError) as exc:
+        raise ProofFormatError(f"Bad G1 point: {exc}")
+
+    point = (FQ(x), FQ(y), FQ(z))
+
+    if not is_on_curve(point, b):
+        raise ProofFormatError("G1 point is not on the curve")
+
+    return point
+
+
+def _conjugate(a):
+    return FQ2([a.coeffs[0], -a.coeffs[1]])
+
+
+def _psi(point):
+    x, y, z = point
+    return (_conjugate(x) * _PSI_X, _conjugate(y) * _PSI_Y, _conjugate(z))
+
+
+def in_g2_subgroup(point):
+    """Twist point (already on the curve) is in the prime-order subgroup."""
+    return eq(_psi(point), multiply(point, 6 * BN_U * BN_U))
+
+
+def parse_g2(coords):
+    """snarkjs G2 point [["x0", "x1"], ["y0", "y1"], ["z0", "z1"]] → projective FQ2 point."""
+    try:
+        (x0, x1), (y0, y1), (z0, z1) = (
+            (_field_element(c[0]), _field_element(c[1])) for c in coords
+        )
+    except (TypeError, ValueError) as exc:
+        raise ProofFormatError(f"Bad G2 point: {exc}")
+
+    point = (FQ2([x0, x1]), FQ2([y0, y1]), FQ2([z0, z1]))
+
+    if not is_on_curve(point, b2):
+        raise ProofFormatError("G2 point is not on the curve")
+
+    # 🔹 G2 has a large cofactor: points outside the subgroup are on the curve too
+    if not in_g2_subgroup(point):
+        raise ProofFormatError("G2 point is not in the prime-order subgroup")
+
+    return point
+
+
+def parse_public_signals(signals, n_public):
+    if len(signals) != n_public:
+        raise ProofFormatError(
+            f"Expected {n_public} public signals, got {len(signals)}"
+        )
+
+    values = []
+    for signal in signals:
+        try:
+            n = int(signal)
+        except (TypeError, ValueError):
+            raise ProofFormatError(f"Bad public signal: {signal}")
+        if not 0 <= n < curve_order:
+            raise ProofFormatError(f"Public signal out of range: {signal}")
+        values.append(n)
+
+    return values
+
+
+def parse_verification_key(data):
+    """snarkjs verification_key.json (already loaded) → parsed key."""
+    if data.get("protocol") != "groth16" or data.get("curve") != "bn128":
+        raise ProofFormatError("Only groth16 / bn128 verification keys are supported")
+
+    return {
+        "n_public": int(data["nPublic"]),
+        "alpha": parse_g1(data["vk_alpha_1"]),
+        "beta": parse_g2(data["vk_beta_2"]),
+        "gamma": parse_g2(data["vk_gamma_2"]),
+        "delta": parse_g2(data["vk_delta_2"]),
+        "ic": [parse_g1(point) for point in data["IC"]]
+    }
+
+
+def parse_proof(data):
+    """snarkjs proof.json (already loaded) → (A, B, C)."""
+    if data.get("protocol", "groth16") != "groth16":
+        raise ProofFormatError("Only groth16 proofs are supported")
+
+    try:
+        return (
+            parse_g1(data["pi_a"]),
+            parse_g2(data["pi_b"]),
+            parse_g1(data["pi_c"])
+        )
+    except KeyError as exc:
+        raise ProofFormatError(f"Proof is missing {exc}")
+
+
+# ==========================================================
+# VERIFICATION
+# ==========================================================
+
+def compute_vk_x(vk, public_values):
+    vk_x = vk["ic"][0]
+    for value, point in zip(public_values, vk["ic"][1:]):
+        if value:
+            vk_x = add(vk_x, multiply(point, value))
+    return vk_x
+
+
+def _miller(q, p):
+    # Miller loop only; the final exponentiation is shared by the product
+    return pairing(q, p, final_exponentiate=False)
+
+
+# ==========================================================
+# PREPARED KEYS (precomputed Miller loop lines)
+# ==========================================================
+
+# Loop schedule of py_ecc's miller_loop: one doubling line per bit,
+# plus an addition line for every non-zero digit
+_SCHEDULE = pseudo_binary_encoding[63::-1]
+
+_PROBES = [
+    (FQ12.zero(), FQ12.zero(), FQ12.one()),
+    (FQ12.one(), FQ12.zero(), FQ12.one()),
+    (FQ12.zero(), FQ12.one(), FQ12.one())
+]
+
+
+def _line_coefficients(p1, p2):
+    """
+    linefunc(p1, p2, T) for an affine T = (x, y, 1) is
+    (cx * x + cy * y + c0) / den; recover the coefficients by probing.
+    """
+    (n0, den), (nx, _), (ny, _) = (linefunc(p1, p2, probe) for probe in _PROBES)
+    return (nx - n0, ny - n0, n0), den
+
+
+def prepare_g2(point):
+    """Line coefficients of the Miller loop for a fixed G2 point, in loop order."""
+    q = twist(point)
+    r = q
+    lines = []
+    den = FQ12.one()
+
+    for digit in _SCHEDULE:
+        line, d = _line_coefficients(r, r)
+        lines.append(line)
+        den = den * den * d
+        r = double(r)
+
+        if digit:
+            step = q if digit == 1 else neg(q)
+            line, d = _line_coefficients(r, step)
+            lines.append(line)
+            den = den * d
+            r = add(r, step)
+
+    q1 = (q[0] ** field_modulus, q[1] ** field_modulus, q[2] ** field_modulus)
+    nq2 = (q1[0] ** field_modulus, -q1[1] ** field_modulus, q1[2] ** field_modulus)
+
+    line, d1 = _line_coefficients(r, q1)
+    lines.append(line)
+    r = add(r, q1)
+
+    line, d2 = _line_coefficients(r, nq2)
+    lines.append(line)
+
+    # every denominator is fixed by the G2 point: fold them into one inverse
+    return {"lines": lines, "den_inv": FQ12.one() / (den * d1 * d2)}
+
+
+def prepare_verification_key(vk):
+    """Parsed key → parsed key + "prepared" precomputation (same dict shape)."""
+    prepared = dict(vk)
+    prepared["prepared"] = {
+        "alpha_beta": _miller(vk["beta"], vk["alpha"]),
+        "beta": prepare_g2(vk["beta"]),
+        "gamma": prepare_g2(vk["gamma"]),
+        "delta": prepare_g2(vk["delta"])
+    }
+    return prepared
+
+
+def _prepared_miller(tables, points):
+    """Product of Miller loops for prepared G2 tables at G1 points (shared squarings)."""
+    pairs = []
+    den_inv = FQ12.one()
+
+    for table, point in zip(tables, points):
+        if point is None or point[2] == FQ.zero():
+            continue  # point at infinity pairs to 1
+        x, y = normalize(point)
+        pairs.append((table["lines"], x.n, y.n))
+        den_inv = den_inv * table["den_inv"]
+
+    f = FQ12.one()
+    index = 0
+
+    for digit in _SCHEDULE:
+        f = f * f
+        for lines, x, y in pairs:
+            cx, cy, c0 = lines[index]
+            f = f * (cx * x + cy * y + c0)
+        index += 1
+
+        if digit:
+            for lines, x, y in pairs:
+                cx, cy, c0 = lines[index]
+                f = f * (cx * x + cy * y + c0)
+            index += 1
+
+    for _ in range(2):
+        for lines, x, y in pairs:
+            cx, cy, c0 = lines[index]
+            f = f * (cx * x + cy * y + c0)
+        index += 1
+
+    return f * den_inv
+
+
+def _fixed_miller(vk, terms):
+    """terms: [("beta" | "gamma" | "delta", G1 point)] → product of Miller loops."""
+    prepared = vk.get("prepared")
+
+    if prepared is None:
+        product = FQ12.one()
+        for name, point in terms:
+            product = product * _miller(vk[name], point)
+        return product
+
+    return _prepared_miller([prepared[name] for name, _ in terms], [point for _, point in terms])
+
+
+def verify(vk, proof, public_signals):
+    """
+    Verify one snarkjs-format proof against a parsed (or prepared) verification key.
+
+    Returns True / False; malformed input raises ProofFormatError.
+    """
+    a, b_point, c = parse_proof(proof)
+    public_values = parse_public_signals(public_signals, vk["n_public"])
+
+    vk_x = compute_vk_x(vk, public_values)
+
+    prepared = vk.get("prepared")
+
+    if prepared is not None:
+        alpha_beta = prepared["alpha_beta"]
+    else:
+        alpha_beta = _miller(vk["beta"], vk["alpha"])
+
+    product = (
+        _miller(b_point, neg(a))
+        * alpha_beta
+        * _fixed_miller(vk, [("gamma", vk_x), ("delta", c)])
+    )
+
+    return final_exponentiate(product) == FQ12.one()
+
+
+# ==========================================================
+# BATCH VERIFICATION
+# ==========================================================
+
+def _random_scalar():
+    r = 0
+    while r == 0:
+        r = secrets.randbits(BATCH_SCALAR_BITS)
+    return r
+
+
+def verify_batch(vk, items):
+    """
+    Verify many (proof, public_signals) pairs against one verification key.
+
+    Returns a list of True / False, one per item. Well-formed items are
+    checked together with one randomized pairing product; only if that
+    fails is each of them re-checked on its own to find the bad ones.
+    Malformed items are reported None (falsy) without failing the batch.
+    """
+    results = [None] * len(items)
+    parsed = []
+
+    for index, (proof, public_signals) in enumerate(items):
+        try:
+            a, b_point, c = parse_proof(proof)
+            public_values = parse_public_signals(public_signals, vk["n_public"])
+        except ProofFormatError:
+            continue
+        parsed.append((index, a, b_point, c, public_values))
+
+    if not parsed:
+        return results
+
+    scalars = [_random_scalar() for _ in parsed]
+
+    product = FQ12.one()
+    sum_r = 0
+    sum_c = None
+    # sum(r_i * vk_x_i) folded into one scalar per IC point
+    ic_scalars = [0] * len(vk["ic"])
+
+    for r, (_, a, b_point, c, public_values) in zip(scalars, parsed):
+        product = product * _miller(b_point, neg(multiply(a, r)))
+
+        sum_r = (sum_r + r) % curve_order
+
+        rc = multiply(c, r)
+        sum_c = rc if sum_c is None else add(sum_c, rc)
+
+        ic_scalars[0] = (ic_scalars[0] + r) % curve_order
+        for j, value in enumerate(public_values, start=1):
+            ic_scalars[j] = (ic_scalars[j] + r * value) % curve_order
+
+    sum_vk_x = multiply(vk["ic"][0], ic_scalars[0])
+    for scalar, point in zip(ic_scalars[1:], vk["ic"][1:]):
+        if scalar:
+            sum_vk_x = add(sum_vk_x, multiply(point, scalar))
+
+    product = product * _fixed_miller(vk, [
+        ("beta", multiply(vk["alpha"], sum_r)),
+        ("gamma", sum_vk_x),
+        ("delta", sum_c)
+    ])
+
+    if final_exponentiate(product) == FQ12.one():
+        for index, *_ in parsed:
+            results[index] = True
+        return results
+
+    # 🔹 Batch failed: fall back to single checks to locate the bad proofs
+    for index, *_ in parsed:
+        proof, public_signals = items[index]
+        results[index] = verify(vk, proof, public_signals)
+
+    return results
@@ -0,0 +1,120 @@
+"""
+PREPARED VERIFICATION KEYS (binary, memory-mapped)
+
+Responsibilities:
+1. Store a circuit's prepared key (verifier/groth16.py, prepare_verification_key)
+   in a compact binary file next to the other circuit artifacts
+2. Map it at startup instead of recomputing e(alpha, beta) and the
+   beta / gamma / delta Miller loop lines (about a second per circuit)
+3. Tie each file to the exact verification key it was made from
+
+File layout (all integers little-endian):
+
+    magic       8 bytes   b"KYCPVK\\x00\\x01"
+    vk_sha256   32 bytes  sha256 of the verification key JSON file
+    n_lines     3 x u32   lines per table (beta, gamma, delta)
+    alpha_beta  FQ12      Miller loop value of e(alpha, beta)
+    per table   FQ12      den_inv
+                n_lines x 3 x FQ12   (cx, cy, c0)
+
+An FQ12 is 12 coefficients of 32 bytes. A file whose hash does not match
+the current key is treated as missing and rebuilt.
+"""
+
+import mmap
+import os
+import struct
+
+from py_ecc.optimized_bn128 import FQ12
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+PREPARED_DIR = os.path.join(BASE_DIR, "circuits", "prepared")
+
+MAGIC = b"KYCPVK\x00\x01"
+TABLES = ("beta", "gamma", "delta")
+
+FIELD_BYTES = 32
+FQ12_BYTES = 12 * FIELD_BYTES
+HEADER = struct.Struct("<8s32s3I")
+
+
+def prepared_key_path(circuit_name):
+    return os.path.join(PREPARED_DIR, f"{circuit_name}.pvk")
+
+
+# ==========================================================
+# WRITE
+# ==========================================================
+
+def _fq12_bytes(value):
+    return b"".join(int(c).to_bytes(FIELD_BYTES, "little") for c in value.coeffs)
+
+
+def write_prepared_key(path, prepared, vk_sha256):
+    """prepared: vk["prepared"] from prepare_verification_key."""
+    chunks = [
+        HEADER.pack(MAGIC, bytes.fromhex(vk_sha256), *(len(prepared[t]["lines"]) for t in TABLES)),
+        _fq12_bytes(prepared["alpha_beta"])
+    ]
+
+    for table in TABLES:
+        chunks.append(_fq12_bytes(prepared[table]["den_inv"]))
+        for line in prepared[table]["lines"]:
+            chunks.extend(_fq12_bytes(value) for value in line)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # write + rename: a worker mapping the file never sees half of it
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"".join(chunks))
+    os.replace(tmp_path, path)
+
+
+# ==========================================================
+# READ
+# ==========================================================
+
+def read_prepared_key(path, vk_sha256):
+    """Prepared tables from a .pvk file, or None if missing / stale / damaged."""
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < HEADER.size:
+            return None
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    try:
+        magic, digest, *line_counts = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or digest != bytes.fromhex(vk_sha256):
+            return None
+
+        expected = HEADER.size + FQ12_BYTES * (1 + sum(1 + 3 * n for n in line_counts))
+        if len(buf) != expected:
+            return None
+
+        pos = HEADER.size
+
+        def fq12():
+            nonlocal pos
+            coeffs = [
+                int.from_bytes(buf[offset:offset + FIELD_BYTES], "little")
+                for offset in range(pos, pos + FQ12_BYTES, FIELD_BYTES)
+            ]
+            pos += FQ12_BYTES
+            return FQ12(coeffs)
+
+        prepared = {"alpha_beta": fq12()}
+
+        for table, n_lines in zip(TABLES, line_counts):
+            den_inv = fq12()
+            prepared[table] = {
+                "den_inv": den_inv,
+                "lines": [(fq12(), fq12(), fq12()) for _ in range(n_lines)]
+            }
+
+        return prepared
+    finally:
+        buf.close()
@@ -0,0 +1,371 @@
+"""
+COMPACT PROOF ENCODING (Groth16 / BN128)
+
+Responsibilities:
+1. Compress snarkjs proofs to 128 bytes: A (32) + B (64) + C (32)
+2. Pack public signals as a short length-prefixed array
+3. Bundle both into one self-describing blob for the API, disk and proof stores
+4. Convert both ways with snarkjs JSON (decoded proofs verify unchanged)
+
+Point compression keeps x and one bit choosing between y and -y:
+
+    G1   32 bytes   x, big-endian
+    G2   64 bytes   x.c1 || x.c0, big-endian
+
+The field modulus is below 2^254, so the two top bits of the first byte
+are free: 0x80 = "y is the larger root" (for G2 compared on y.c1, then
+y.c0), 0x40 = point at infinity. Decoding recomputes y with a square
+root and rejects points that are not on the curve.
+
+Public signals: varint count, then per signal a 1-byte length and the
+value as minimal big-endian bytes (policy values like 18 or 2026 take
+2-3 bytes instead of a decimal string).
+
+Bundle: version byte (0x01) + 128-byte proof + encoded public signals.
+
+    python -m verifier.proof_codec encode proof.json public.json proof.kycp
+    python -m verifier.proof_codec decode proof.kycp proof.json public.json
+"""
+
+import argparse
+import base64
+import json
+
+from py_ecc.optimized_bn128 import FQ, FQ2, b, b2, curve_order, field_modulus, normalize
+
+from verifier.groth16 import ProofFormatError, parse_g1, parse_g2
+
+BUNDLE_VERSION = 1
+
+G1_BYTES = 32
+G2_BYTES = 64
+PROOF_BYTES = 2 * G1_BYTES + G2_BYTES
+
+FLAG_LARGER_Y = 0x80
+FLAG_INFINITY = 0x40
+FLAGS = FLAG_LARGER_Y | FLAG_INFINITY
+
+P = field_modulus
+HALF = (P - 1) // 2
+
+
+# ==========================================================
+# SQUARE ROOTS (p = 3 mod 4, plain integers)
+# ==========================================================
+# FQ2 = FQ[u] / (u^2 + 1) as (c0, c1) int pairs: py_ecc's FQ2 power is
+# far too slow for decoding on the request path.
+
+# G2 curve: y^2 = x^3 + b2
+B2 = tuple(int(c) for c in b2.coeffs)
+
+
+def _is_square(a):
+    return a % P == 0 or pow(a, (P - 1) // 2, P) == 1
+
+
+def _sqrt_fq(a):
+    root = pow(a, (P + 1) // 4, P)
+    if root * root % P != a % P:
+        raise ProofFormatError("Compressed point is not on the curve")
+    return root
+
+
+def _mul_fq2(a, b_):
+    a0, a1 = a
+    b0, b1 = b_
+    return ((a0 * b0 - a1 * b1) % P, (a0 * b1 + a1 * b0) % P)
+
+
+def _sqrt_fq2(a):
+    """Square root via the norm: |a| = a0^2 + a1^2 is a square in FQ."""
+    a0, a1 = a
+
+    if a1 == 0:
+        if _is_square(a0):
+            root = (_sqrt_fq(a0), 0)
+        else:
+            root = (0, _sqrt_fq(-a0 % P))
+    else:
+        norm = _sqrt_fq((a0 * a0 + a1 * a1) % P)
+        half = pow(2, -1, P)
+        t = (a0 + norm) * half % P
+        if not _is_square(t):
+            t = (a0 - norm) * half % P
+        x0 = _sqrt_fq(t)
+        root = (x0, a1 * pow(2 * x0, -1, P) % P)
+
+    if _mul_fq2(root, root) != (a0 % P, a1 % P):
+        raise ProofFormatError("Compressed point is not on the curve")
+    return root
+
+
+# ==========================================================
+# POINTS
+# ==========================================================
+
+def _g2_larger(y0, y1):
+    # y > -y, comparing the c1 coefficient first
+    return y1 > HALF or (y1 == 0 and y0 > HALF)
+
+
+def _read_x(data, size):
+    """Top byte flags + the coordinate value with the flag bits cleared."""
+    flags = data[0] & FLAGS
+    value = int.from_bytes(bytes([data[0] & ~FLAGS & 0xFF]) + bytes(data[1:size]), "big")
+
+    if flags & FLAG_INFINITY:
+        if flags & FLAG_LARGER_Y or value:
+            raise ProofFormatError("Bad encoding of the point at infinity")
+        return flags, None
+
+    return flags, value
+
+
+def encode_g1(point):
+    """snarkjs G1 point → 32 bytes."""
+    parsed = parse_g1(point)
+    if parsed[2] == FQ.zero():
+        return bytes([FLAG_INFINITY]) + bytes(G1_BYTES - 1)
+
+    x, y = (coord.n for coord in normalize(parsed))
+
+    data = bytearray(x.to_bytes(G1_BYTES, "big"))
+    if y > HALF:
+        data[0] |= FLAG_LARGER_Y
+    return bytes(data)
+
+
+def decode_g1(data):
+    """32 bytes → snarkjs G1 point ["x", "y", "1"]."""
+    flags, x = _read_x(data, G1_BYTES)
+
+    if x is None:
+        return ["0", "1", "0"]
+    if x >= P:
+        raise ProofFormatError("Compressed G1 coordinate out of range")
+
+    y = _sqrt_fq((x * x * x + b.n) % P)
+    if (y > HALF) != bool(flags & FLAG_LARGER_Y):
+        y = P - y
+
+    return [str(x), str(y), "1"]
+
+
+def encode_g2(point):
+    """snarkjs G2 point → 64 bytes."""
+    parsed = parse_g2(point)
+    if parsed[2] == FQ2.zero():
+        return bytes([FLAG_INFINITY]) + bytes(G2_BYTES - 1)
+
+    x, y = normalize(parsed)
+    (x0, x1), (y0, y1) = (int(c) for c in x.coeffs), (int(c) for c in y.coeffs)
+
+    data = bytearray(x1.to_bytes(G1_BYTES, "big") + x0.to_bytes(G1_BYTES, "big"))
+    if _g2_larger(y0, y1):
+        data[0] |= FLAG_LARGER_Y
+    return bytes(data)
+
+
+def decode_g2(data):
+    """64 bytes → snarkjs G2 point [["x0", "x1"], ["y0", "y1"], ["1", "0"]]."""
+    flags, x1 = _read_x(data, G1_BYTES)
+
+    if x1 is None:
+        if any(data[G1_BYTES:G2_BYTES]):
+            raise ProofFormatError("Bad encoding of the point at infinity")
+        return [["0", "0"], ["1", "0"], ["0", "0"]]
+
+    x0 = int.from_bytes(data[G1_BYTES:G2_BYTES], "big")
+    if x0 >= P or x1 >= P:
+        raise ProofFormatError("Compressed G2 coordinate out of range")
+
+    x = (x0, x1)
+    x3 = _mul_fq2(_mul_fq2(x, x), x)
+    y0, y1 = _sqrt_fq2(((x3[0] + B2[0]) % P, (x3[1] + B2[1]) % P))
+
+    if _g2_larger(y0, y1) != bool(flags & FLAG_LARGER_Y):
+        y0, y1 = -y0 % P, -y1 % P
+
+    return [[str(x0), str(x1)], [str(y0), str(y1)], ["1", "0"]]
+
+
+# ==========================================================
+# PROOFS
+# ==========================================================
+
+def encode_proof(proof):
+    """snarkjs proof dict → 128 bytes."""
+    try:
+        return encode_g1(proof["pi_a"]) + encode_g2(proof["pi_b"]) + encode_g1(proof["pi_c"])
+    except KeyError as exc:
+        raise ProofFormatError(f"Proof is missing {exc}")
+
+
+def decode_proof(data):
+    """128 bytes → snarkjs proof dict."""
+    if len(data) != PROOF_BYTES:
+        raise ProofFormatError(f"Compact proof must be {PROOF_BYTES} bytes, got {len(data)}")
+
+    return {
+        "pi_a": decode_g1(data[:G1_BYTES]),
+        "pi_b": decode_g2(data[G1_BYTES:G1_BYTES + G2_BYTES]),
+        "pi_c": decode_g1(data[G1_BYTES + G2_BYTES:]),
+        "protocol": "groth16",
+        "curve": "bn128"
+    }
+
+
+# ==========================================================
+# PUBLIC SIGNALS
+# ==========================================================
+
+def _write_varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        out.append(byte | (0x80 if value else 0))
+        if not value:
+            return bytes(out)
+
+
+def _read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data) or shift > 28:
+            raise ProofFormatError("Bad public signal count")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def encode_public_signals(signals):
+    out = [_write_varint(len(signals))]
+
+    for signal in signals:
+        try:
+            value = int(signal)
+        except (TypeError, ValueError):
+            raise ProofFormatError(f"Bad public signal: {signal}")
+        if not 0 <= value < curve_order:
+            raise ProofFormatError(f"Public signal out of range: {signal}")
+
+        raw = value.to_bytes((value.bit_length() + 7) // 8, "big")
+        out.append(bytes([len(raw)]) + raw)
+
+    return b"".join(out)
+
+
+def decode_public_signals(data, pos=0):
+    """Returns (signals as decimal strings, position after the last one)."""
+    count, pos = _read_varint(data, pos)
+    signals = []
+
+    for _ in range(count):
+        if pos >= len(data):
+            raise ProofFormatError("Truncated public signals")
+        length = data[pos]
+        end = pos + 1 + length
+        if length > 32 or end > len(data):
+            raise ProofFormatError("Truncated public signals")
+
+        value = int.from_bytes(data[pos + 1:end], "big")
+        if value >= curve_order:
+            raise ProofFormatError("Public signal out of range")
+
+        signals.append(str(value))
+        pos = end
+
+    return signals, pos
+
+
+# ==========================================================
+# BUNDLES (proof + public signals)
+# ==========================================================
+
+def encode_bundle(proof, public_signals):
+    return bytes([BUNDLE_VERSION]) + encode_proof(proof) + encode_public_signals(public_signals)
+
+
+def decode_bundle(data):
+    """Bundle bytes → (snarkjs proof dict, public signals)."""
+    data = bytes(data)
+
+    if not data or data[0] != BUNDLE_VERSION:
+        raise ProofFormatError("Unknown compact proof version")
+
+    proof = decode_proof(data[1:1 + PROOF_BYTES])
+    public_signals, end = decode_public_signals(data, 1 + PROOF_BYTES)
+
+    if end != len(data):
+        raise ProofFormatError("Trailing bytes after public signals")
+
+    return proof, public_signals
+
+
+def bundle_to_base64(proof, public_signals):
+    return base64.b64encode(encode_bundle(proof, public_signals)).decode()
+
+
+def bundle_from_base64(text):
+    try:
+        data = base64.b64decode(text, validate=True)
+    except ValueError:
+        raise ProofFormatError("Compact proof is not valid base64")
+    return decode_bundle(data)
+
+
+def write_proof_file(path, proof, public_signals):
+    with open(path, "wb") as f:
+        f.write(encode_bundle(proof, public_signals))
+
+
+def read_proof_file(path):
+    with open(path, "rb") as f:
+        return decode_bundle(f.read())
+
+
+# ==========================================================
+# CLI
+# ==========================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert Groth16 proofs between snarkjs JSON and compact binary")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    encode = commands.add_parser("encode", help="snarkjs proof.json + public.json → bundle")
+    encode.add_argument("proof")
+    encode.add_argument("public")
+    encode.add_argument("out")
+
+    decode = commands.add_parser("decode", help="bundle → snarkjs proof.json + public.json")
+    decode.add_argument("bundle")
+    decode.add_argument("proof")
+    decode.add_argument("public")
+
+    args = parser.parse_args()
+
+    if args.command == "encode":
+        with open(args.proof, "r") as f:
+            proof = json.load(f)
+        with open(args.public, "r") as f:
+            public_signals = json.load(f)
+
+        write_proof_file(args.out, proof, public_signals)
+        print(f"{args.out}: {len(encode_bundle(proof, public_signals))} bytes")
+    else:
+        proof, public_signals = read_proof_file(args.bundle)
+
+        with open(args.proof, "w") as f:
+            json.dump(proof, f, indent=1)
+        with open(args.public, "w") as f:
+            json.dump(public_signals, f, indent=1)
+        print(f"Written: {args.proof}, {args.public}")
+
+
+if __name__ == "__main__":
+    main()
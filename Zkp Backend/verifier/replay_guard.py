@@ -0,0 +1,244 @@
+"""
+REPLAY GUARD (seen-proof index)
+
+Responsibilities:
+1. Key every accepted client proof on a canonical hash
+       (circuit, A, B, C, public signals)
+2. Answer "seen before?" from an in-memory Bloom filter in microseconds
+3. Confirm likely duplicates in a compact on-disk store (SQLite, WAL)
+4. Rebuild the Bloom filter from the store at startup
+
+Only Bloom filter hits reach the disk store, so a fresh proof costs a
+hash and a few bit tests. Recording is an INSERT OR IGNORE, which also
+settles races between two requests carrying the same proof.
+
+Coordinates are hashed as affine integers, and (-A, -B) is folded onto
+(A, B), so re-encoding a proof does not get it past the index. Groth16
+proofs can still be re-randomized by anyone holding the verification
+key; tying a proof to a single use needs a nonce / nullifier among the
+circuit's public signals.
+
+Config (environment):
+    REPLAY_PROTECTION   "false" turns the index off (default "true")
+    REPLAY_DB           SQLite file (default data/seen_proofs.sqlite3)
+    REPLAY_CAPACITY     proofs the Bloom filter is sized for (default 1000000)
+    REPLAY_FP_RATE      target Bloom false-positive rate (default 0.001)
+"""
+
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from py_ecc.optimized_bn128 import field_modulus, normalize
+
+from monitoring.metrics import Counter, Gauge
+from verifier.groth16 import ProofFormatError, parse_g1, parse_g2
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+REPLAY_PROTECTION = os.getenv("REPLAY_PROTECTION", "true").lower() == "true"
+REPLAY_DB = os.getenv("REPLAY_DB", os.path.join(BASE_DIR, "data", "seen_proofs.sqlite3"))
+REPLAY_CAPACITY = int(os.getenv("REPLAY_CAPACITY", "1000000"))
+REPLAY_FP_RATE = float(os.getenv("REPLAY_FP_RATE", "0.001"))
+
+
+# ==========================================================
+# CANONICAL PROOF HASH
+# ==========================================================
+
+def _coordinate(value):
+    # out of range is rejected, not reduced: the verifier rejects such a
+    # proof, so it must not share the key of the in-range one
+    n = int(value)
+    if not 0 <= n < field_modulus:
+        raise ProofFormatError(f"Coordinate out of range: {value}")
+    return n
+
+
+def _affine(coords, parse):
+    """snarkjs point → tuple of affine integer coordinates."""
+    if coords[2] in ("1", 1, ["1", "0"], [1, 0]):
+        # snarkjs always emits z = 1: no curve arithmetic needed
+        return tuple(
+            tuple(_coordinate(c) for c in coord) if isinstance(coord, list)
+            else _coordinate(coord)
+            for coord in coords[:2]
+        )
+
+    x, y = normalize(parse(coords))
+    return tuple(
+        tuple(int(c) for c in coord.coeffs) if hasattr(coord, "coeffs") else coord.n
+        for coord in (x, y)
+    )
+
+
+def _negated(y):
+    if isinstance(y, tuple):
+        return tuple((field_modulus - c) % field_modulus for c in y)
+    return (field_modulus - y) % field_modulus
+
+
+def proof_digest(circuit_name, proof, public_signals):
+    """32-byte key for a proof; raises ProofFormatError if it cannot be read."""
+    try:
+        a = _affine(proof["pi_a"], parse_g1)
+        b = _affine(proof["pi_b"], parse_g2)
+        c = _affine(proof["pi_c"], parse_g1)
+        signals = [int(signal) for signal in public_signals]
+    except (KeyError, IndexError, TypeError, ValueError, ZeroDivisionError) as exc:
+        # ZeroDivisionError: point at infinity
+        raise ProofFormatError(f"Cannot read proof: {exc}")
+
+    # e(-A, -B) = e(A, B): pick the representative with A.y in the lower half
+    if a[1] > field_modulus // 2:
+        a = (a[0], _negated(a[1]))
+        b = (b[0], _negated(b[1]))
+
+    h = hashlib.sha256(circuit_name.encode())
+    h.update(repr((a, b, c, signals)).encode())
+    return h.digest()
+
+
+# ==========================================================
+# BLOOM FILTER
+# ==========================================================
+
+class BloomFilter:
+
+    def __init__(self, capacity, fp_rate):
+        self.capacity = max(1, capacity)
+        self.fp_rate = fp_rate
+        self.size = max(8, int(-self.capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest):
+        # double hashing over the (already uniform) sha256 digest
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, digest):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, digest):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(digest))
+
+
+# ==========================================================
+# REPLAY GUARD
+# ==========================================================
+
+class ReplayGuard:
+
+    def __init__(self, path=REPLAY_DB, capacity=REPLAY_CAPACITY, fp_rate=REPLAY_FP_RATE):
+        self.path = path
+        self.fp_rate = fp_rate
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            " digest BLOB PRIMARY KEY, circuit TEXT NOT NULL, first_seen REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+
+        self.bloom = None
+        self._rebuild(capacity)
+
+    def _rebuild(self, capacity):
+        start = time.perf_counter()
+
+        entries = self._db.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+        bloom = BloomFilter(max(capacity, entries * 2), self.fp_rate)
+
+        for (digest,) in self._db.execute("SELECT digest FROM seen"):
+            bloom.add(digest)
+
+        self.bloom = bloom
+        print(f"Replay index: {entries} proofs loaded in {time.perf_counter() - start:.2f}s")
+
+    def seen(self, digest):
+        with self._lock:
+            if digest not in self.bloom:
+                return False
+
+            found = self._db.execute(
+                "SELECT 1 FROM seen WHERE digest = ?", (digest,)
+            ).fetchone() is not None
+
+        if not found:
+            bloom_false_positives.inc()
+        return found
+
+    def add(self, digest, circuit_name):
+        """Record an accepted proof; False if it was already recorded."""
+        with self._lock:
+            inserted = self._db.execute(
+                "INSERT OR IGNORE INTO seen (digest, circuit, first_seen) VALUES (?, ?, ?)",
+                (digest, circuit_name, time.time())
+            ).rowcount == 1
+
+            if inserted:
+                self.bloom.add(digest)
+                # keep the false-positive rate near target as the index grows
+                if self.bloom.count > self.bloom.capacity:
+                    self._rebuild(self.bloom.capacity * 2)
+
+        return inserted
+
+    def entries(self):
+        return self.bloom.count if self.bloom else 0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# ==========================================================
+# SHARED GUARD
+# ==========================================================
+
+_guard = None
+_guard_lock = threading.Lock()
+
+
+def get_replay_guard():
+    """Process-wide guard, opened (and its Bloom filter rebuilt) on first use."""
+    global _guard
+
+    with _guard_lock:
+        if _guard is None:
+            _guard = ReplayGuard()
+
+    return _guard
+
+
+replays_rejected = Counter(
+    "kyc_replay_rejected_total",
+    "Client proofs rejected because they were already used",
+    labels=("circuit",)
+)
+
+bloom_false_positives = Counter(
+    "kyc_replay_bloom_false_positives_total",
+    "Bloom filter hits the disk store did not confirm"
+)
+
+Gauge(
+    "kyc_replay_index_entries",
+    "Proofs recorded in the replay index",
+    callback=lambda: _guard.entries() if _guard else 0
+)
@@ -0,0 +1,225 @@
+"""
+VERIFICATION RESULT CACHE (shared by every worker on a node)
+
+Responsibilities:
+1. Key each verification on (verification key hash, canonical proof hash),
+   the proof hash covering A, B, C and the public signals
+   (verifier/replay_guard.py, proof_digest)
+2. Remember valid / invalid verdicts in a fixed-size table in a
+   memory-mapped file, so all uvicorn workers on the box share it
+3. Answer repeats in microseconds: a hash and a 64-byte read, no pairing
+
+Verification is deterministic, so a verdict never goes stale; a new
+verification key changes every key and old entries are simply never hit.
+
+Table layout (after a 16-byte header: magic + slot count):
+
+    n_buckets x 4 slots, 16 bytes each
+
+A key picks one bucket. A slot holds tag = blake2b(key || verdict)[:16]
+instead of (key, verdict), so a lookup hashes both possible verdicts and
+looks for either tag. Writers take no lock: a slot torn by two processes
+writing at once matches neither tag and reads as a miss. When a bucket is
+full, the key picks which slot to overwrite.
+
+The file is created readable / writable by the service user only: anyone
+who can write it can mark proofs valid. Workers open (and, if needed,
+create) it one at a time under a lock on <path>.lock, so a worker never
+replaces the table another has already mapped.
+
+Config (environment):
+    VERIFY_CACHE_ENTRIES   verdicts kept, 0 disables the cache (default 65536)
+    VERIFY_CACHE_PATH      table file (default data/verify_cache.bin; a path
+                           under /dev/shm keeps it in memory)
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no flock, workers starting together may each build the table
+    fcntl = None
+
+from monitoring.metrics import Counter, Gauge
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+VERIFY_CACHE_ENTRIES = int(os.getenv("VERIFY_CACHE_ENTRIES", "65536"))
+VERIFY_CACHE_PATH = os.getenv("VERIFY_CACHE_PATH", os.path.join(BASE_DIR, "data", "verify_cache.bin"))
+
+MAGIC = b"KYCVRC\x00\x01"
+HEADER = struct.Struct("<8sQ")
+
+TAG_BYTES = 16
+WAYS = 4
+BUCKET_BYTES = WAYS * TAG_BYTES
+EMPTY = bytes(TAG_BYTES)
+
+
+def cache_key(vk_sha256, digest):
+    """vk_sha256: hex hash of the verification key file; digest: proof_digest(...)."""
+    return hashlib.sha256(bytes.fromhex(vk_sha256) + digest).digest()
+
+
+def _tag(key, valid):
+    return hashlib.blake2b(key + (b"\x01" if valid else b"\x00"), digest_size=TAG_BYTES).digest()
+
+
+# ==========================================================
+# SHARED TABLE
+# ==========================================================
+
+class VerifyCache:
+
+    def __init__(self, path=VERIFY_CACHE_PATH, entries=VERIFY_CACHE_ENTRIES):
+        self.path = path
+        self.n_buckets = max(1, entries // WAYS)
+        self.size = HEADER.size + self.n_buckets * BUCKET_BYTES
+
+        # per process
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self._buf = self._open()
+
+    def _open(self):
+        header = HEADER.pack(MAGIC, self.n_buckets)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        lock_fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            # held until the table is mapped: without it a second worker
+            # could replace the file after the first checked it, leaving
+            # the first writing to an unlinked copy nobody else sees
+            if fcntl is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX)
+
+            if not self._usable(header):
+                # new file, or one made with another size: replace it whole
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                fd = os.open(tmp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, "wb") as f:
+                    f.write(header)
+                    f.truncate(self.size)
+                os.replace(tmp_path, self.path)
+
+            # opened after any replace, so this maps the file now at path
+            with open(self.path, "r+b") as f:
+                return mmap.mmap(f.fileno(), self.size)
+        finally:
+            # closing the descriptor releases the lock
+            os.close(lock_fd)
+
+    def _usable(self, header):
+        try:
+            with open(self.path, "rb") as f:
+                return os.fstat(f.fileno()).st_size == self.size and f.read(HEADER.size) == header
+        except OSError:
+            return False
+
+    def _bucket(self, key):
+        return HEADER.size + int.from_bytes(key[:8], "little") % self.n_buckets * BUCKET_BYTES
+
+    def get(self, key):
+        """True / False for a cached verdict, None on a miss."""
+        start = self._bucket(key)
+        bucket = self._buf[start:start + BUCKET_BYTES]
+        valid_tag = _tag(key, True)
+        invalid_tag = _tag(key, False)
+
+        for offset in range(0, BUCKET_BYTES, TAG_BYTES):
+            slot = bucket[offset:offset + TAG_BYTES]
+            if slot == valid_tag or slot == invalid_tag:
+                with self._lock:
+                    self.hits += 1
+                return slot == valid_tag
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, valid):
+        start = self._bucket(key)
+        bucket = self._buf[start:start + BUCKET_BYTES]
+
+        # first empty slot, else one picked by the key
+        way = key[8] % WAYS
+        for candidate in range(WAYS):
+            if bucket[candidate * TAG_BYTES:(candidate + 1) * TAG_BYTES] == EMPTY:
+                way = candidate
+                break
+
+        offset = start + way * TAG_BYTES
+        self._buf[offset:offset + TAG_BYTES] = _tag(key, valid)
+
+    def entries(self):
+        """Filled slots (scans the whole table: for stats, not the request path)."""
+        table = self._buf[HEADER.size:self.size]
+        return sum(
+            1 for offset in range(0, len(table), TAG_BYTES)
+            if table[offset:offset + TAG_BYTES] != EMPTY
+        )
+
+    def stats(self):
+        with self._lock:
+            return {
+                "path": self.path,
+                "capacity": self.n_buckets * WAYS,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+    def close(self):
+        self._buf.close()
+
+
+# ==========================================================
+# SHARED INSTANCE
+# ==========================================================
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_verify_cache():
+    """Process-wide cache, None when disabled or its file cannot be opened."""
+    global _cache
+
+    if VERIFY_CACHE_ENTRIES <= 0:
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = VerifyCache()
+            except OSError as exc:
+                # read-only deployment: verify everything
+                print(f"Verification cache disabled: {exc}")
+                _cache = False
+
+    return _cache or None
+
+
+Counter(
+    "kyc_verify_cache_hits_total",
+    "Verifications answered from the shared verdict cache (this process)",
+    callback=lambda: _cache.hits if _cache else 0
+)
+
+Counter(
+    "kyc_verify_cache_misses_total",
+    "Verifications that were not cached and ran the pairing check (this process)",
+    callback=lambda: _cache.misses if _cache else 0
+)
+
+Gauge(
+    "kyc_verify_cache_capacity",
+    "Verdicts the shared cache holds",
+    callback=lambda: _cache.n_buckets * WAYS if _cache else 0
+)
@@ -47,84 +47,342 @@
 VERIFIER SIDE MODULE
 
 Responsibilities:
-1. Load verification key
-2. Load proof.json
-3. Load public.json
-4. Verify using snarkjs
-5. Return verification result
+1. Take the parsed verification key from the circuit registry
+2. Take proof + public signals straight from the prover / request
+3. Verify in-process (Groth16 pairing check, no snarkjs spawn)
+4. Return verification result
+5. 🔹 NEW: Prepare each circuit's key once (e(alpha, beta) and the
+   gamma / delta / beta Miller lines) and keep it in circuits/prepared/
+   so a verification only does the per-proof work
+6. 🔹 NEW: Remember verdicts in a cache shared by every worker on the
+   node (verifier/verify_cache.py): a proof checked before is answered
+   without a pairing
+
+    python -m verifier.verify_runner --prepare    # (re)build every prepared key
 """
 
-import subprocess
 import os
+import sys
+import threading
+import time
+
+from circuits.registry import circuit_names, get_circuit
+from circuits.state_tree import get_state_tree
+from monitoring.metrics import stage_seconds, verify_failures
+from verifier.groth16 import ProofFormatError, prepare_verification_key, verify, verify_batch
+from verifier.prepared_key import prepared_key_path, read_prepared_key, write_prepared_key
+from verifier.replay_guard import (
+    REPLAY_PROTECTION,
+    get_replay_guard,
+    proof_digest,
+    replays_rejected
+)
+from verifier.verify_cache import cache_key, get_verify_cache
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
 
-def run_command(command):
-    result = subprocess.run(
-        command,
-        shell=True,       # Required for Windows (npx)
-        capture_output=True,
-        text=True
-    )
-    return result
+REPLAYED = {"status": "replayed", "message": "Proof has already been used"}
 
 
 # ==========================================================
-# AGE VERIFICATION
+# PREPARED KEYS
 # ==========================================================
 
-def verify_age_proof():
+_prepared = {}
+_prepared_lock = threading.Lock()
+
+
+def _load_or_prepare(circuit, rebuild=False):
+    vk = circuit.verification_key
+    vk_sha256 = circuit.sha256["verification_key"]
+    path = prepared_key_path(circuit.name)
+
+    tables = None if rebuild else read_prepared_key(path, vk_sha256)
+
+    if tables is not None:
+        return dict(vk, prepared=tables)
+
+    start = time.perf_counter()
+    prepared = prepare_verification_key(vk)
+
+    try:
+        write_prepared_key(path, prepared["prepared"], vk_sha256)
+    except OSError as exc:
+        # read-only deployment: keep the in-memory copy
+        print(f"Prepared key for {circuit.name} not saved: {exc}")
+
+    print(f"Prepared verification key for {circuit.name} in {time.perf_counter() - start:.2f}s")
+    return prepared
+
+
+def get_prepared_key(circuit_name):
+    """Verification key + precomputed pairing tables, built or mapped once per process."""
+    prepared = _prepared.get(circuit_name)
+    if prepared is not None:
+        return prepared
 
-    verification_key = os.path.join(BASE_DIR, "age_verification_key.json")
-    proof_file = os.path.join(BASE_DIR, "proofs", "age_proof.json")
-    public_file = os.path.join(BASE_DIR, "proofs", "age_public.json")
+    with _prepared_lock:
+        if circuit_name not in _prepared:
+            _prepared[circuit_name] = _load_or_prepare(get_circuit(circuit_name))
 
-    command = f'npx snarkjs groth16 verify "{verification_key}" "{public_file}" "{proof_file}"'
+    return _prepared[circuit_name]
 
-    result = run_command(command)
 
-    if "OK!" in result.stdout:
+def prepare_verification_keys(rebuild=False):
+    """Prepare every registered circuit (startup / CLI)."""
+    with _prepared_lock:
+        for name in circuit_names():
+            _prepared[name] = _load_or_prepare(get_circuit(name), rebuild=rebuild)
+
+
+# ==========================================================
+# VERDICT CACHE
+# ==========================================================
+
+def _verdict_key(circuit_name, proof, public_signals, digest=None):
+    """Cache key, or None when the cache is off or the proof cannot be read."""
+    if get_verify_cache() is None or proof is None:
+        return None
+
+    if digest is None:
+        try:
+            digest = proof_digest(circuit_name, proof, public_signals or [])
+        except ProofFormatError:
+            return None
+
+    return cache_key(get_circuit(circuit_name).sha256["verification_key"], digest)
+
+
+def _cached_verdict(key):
+    return None if key is None else get_verify_cache().get(key)
+
+
+def run_verify(circuit_name, proof, public_signals, check_replay=False):
+    """
+    🔹 MODIFIED:
+    - Takes the proof and public signals directly from the prover (no shared files)
+    - Verification key comes pre-parsed from the circuit registry
+    - 🔹 NEW: Timing and failures are recorded for GET /metrics
+    - 🔹 NEW: check_replay (client-supplied proofs): a proof is accepted
+      once, later copies get status "replayed" (verifier/replay_guard.py)
+    - 🔹 NEW: Uses the prepared key (fixed pairing work done once)
+    - 🔹 NEW: Verdicts are cached per (verification key, proof, public signals)
+    """
+    vk = get_prepared_key(circuit_name)
+
+    digest = None
+
+    if check_replay and REPLAY_PROTECTION:
+        try:
+            digest = proof_digest(circuit_name, proof, public_signals or [])
+        except ProofFormatError as exc:
+            print(f"Verification error: {exc}")
+            verify_failures.inc(circuit_name)
+            return {"status": "invalid", "message": "Proof verification failed"}
+
+        # Bloom filter first: the disk store is only read for likely repeats
+        if get_replay_guard().seen(digest):
+            replays_rejected.inc(circuit_name)
+            return dict(REPLAYED)
+
+    key = _verdict_key(circuit_name, proof, public_signals, digest)
+    valid = _cached_verdict(key)
+
+    if valid is None:
+        start = time.perf_counter()
+        try:
+            valid = proof is not None and verify(vk, proof, public_signals or [])
+        except ValueError as exc:
+            # ProofFormatError: malformed proof / public signals. Not cached:
+            # the key reduces coordinates mod p, so a malformed copy of a
+            # valid proof shares its key and would mark it invalid for good
+            print(f"Verification error: {exc}")
+            valid = False
+            key = None
+        stage_seconds.observe(time.perf_counter() - start, circuit_name, "verify")
+
+        if key is not None:
+            get_verify_cache().put(key, valid)
+
+    if valid:
+        # an identical proof may have been accepted while this one was verified
+        if digest is not None and not get_replay_guard().add(digest, circuit_name):
+            replays_rejected.inc(circuit_name)
+            return dict(REPLAYED)
+
         return {"status": "valid", "message": "Proof verified successfully"}
 
+    verify_failures.inc(circuit_name)
     return {"status": "invalid", "message": "Proof verification failed"}
 
 
 # ==========================================================
-# ADDRESS VERIFICATION
+# AGE VERIFICATION
 # ==========================================================
 
-def verify_address_proof():
+def verify_age_proof(proof, public_signals):
 
-    verification_key = os.path.join(BASE_DIR, "address_verification_key.json")
-    proof_file = os.path.join(BASE_DIR, "proofs", "address_proof.json")
-    public_file = os.path.join(BASE_DIR, "proofs", "address_public.json")
+    return run_verify("age", proof, public_signals)
 
-    command = f'npx snarkjs groth16 verify "{verification_key}" "{public_file}" "{proof_file}"'
 
-    result = run_command(command)
+# ==========================================================
+# ADDRESS VERIFICATION
+# ==========================================================
 
-    if "OK!" in result.stdout:
-        return {"status": "valid", "message": "Proof verified successfully"}
+def verify_address_proof(proof, public_signals):
 
-    return {"status": "invalid", "message": "Proof verification failed"}
+    return run_verify("address", proof, public_signals)
 
 
 # ==========================================================
 # COMBINED KYC VERIFICATION
 # ==========================================================
 
-def verify_kyc_proof():
+def verify_kyc_proof(proof, public_signals):
 
-    verification_key = os.path.join(BASE_DIR, "kyc_verification_key.json")
-    proof_file = os.path.join(BASE_DIR, "proofs", "kyc_proof.json")
-    public_file = os.path.join(BASE_DIR, "proofs", "kyc_public.json")
+    return run_verify("kyc", proof, public_signals)
 
-    command = f'npx snarkjs groth16 verify "{verification_key}" "{public_file}" "{proof_file}"'
 
-    result = run_command(command)
+# ==========================================================
+# ALLOWED-STATE SET VERIFICATION (Merkle root policy)
+# ==========================================================
+# Public signals are rebuilt from the verifier's own policy, never taken
+# from the prover: a proof made against another policy's root fails.
 
-    if "OK!" in result.stdout:
-        return {"status": "valid", "message": "Proof verified successfully"}
+def verify_address_set_proof(proof, required_country, allowed_states):
 
-    return {"status": "invalid", "message": "Proof verification failed"}
+    root = get_state_tree(allowed_states).root
+
+    return run_verify("address_membership", proof, [str(required_country), str(root)])
+
+
+def verify_kyc_set_proof(proof, current_year, min_age, required_country, allowed_states):
+
+    root = get_state_tree(allowed_states).root
+
+    return run_verify(
+        "kyc_membership",
+        proof,
+        [str(current_year), str(min_age), str(required_country), str(root)]
+    )
+
+
+# ==========================================================
+# BATCH VERIFICATION (same circuit, many proofs)
+# ==========================================================
+
+def _find_replays(circuit, proofs):
+    """Digests of the batch (None if unreadable) + indices already used."""
+    guard = get_replay_guard()
+    digests = []
+    replayed = []
+    in_batch = set()
+
+    for index, (proof, public_signals) in enumerate(proofs):
+        try:
+            digest = proof_digest(circuit, proof, public_signals or [])
+        except ProofFormatError:
+            # left to the verifier, which rejects it
+            digest = None
+
+        if digest is not None and (digest in in_batch or guard.seen(digest)):
+            replayed.append(index)
+
+        in_batch.add(digest)
+        digests.append(digest)
+
+    return digests, replayed
+
+
+def verify_batch_proofs(circuit, proofs, check_replay=False):
+    """
+    🔹 NEW:
+    - Checks N proofs for one circuit with a single randomized pairing product
+    - proofs: list of (proof_dict, public_signals_list)
+    - Per-proof checks only run when the combined check fails
+    - check_replay: proofs used before (or twice in this batch) are
+      rejected without being verified
+    """
+    if circuit not in circuit_names():
+        return {"status": "error", "message": f"Unknown circuit: {circuit}"}
+
+    # an empty batch must not read as "all proofs verified"
+    if not proofs:
+        return {"status": "error", "message": "Batch contains no proofs"}
+
+    vk = get_prepared_key(circuit)
+
+    replayed = []
+
+    if check_replay and REPLAY_PROTECTION:
+        digests, replayed = _find_replays(circuit, proofs)
+
+    skip = set(replayed)
+    pending = [index for index in range(len(proofs)) if index not in skip]
+
+    results = [False] * len(proofs)
+
+    # 🔹 verdicts seen before are not checked again
+    keys = {}
+    unchecked = []
+    for index in pending:
+        proof, public_signals = proofs[index]
+        keys[index] = _verdict_key(
+            circuit, proof, public_signals, digests[index] if check_replay and REPLAY_PROTECTION else None
+        )
+        cached = _cached_verdict(keys[index])
+        if cached is None:
+            unchecked.append(index)
+        else:
+            results[index] = cached
+
+    if unchecked:
+        start = time.perf_counter()
+        checked = verify_batch(vk, [proofs[index] for index in unchecked])
+        stage_seconds.observe(time.perf_counter() - start, circuit, "verify_batch")
+
+        for index, valid in zip(unchecked, checked):
+            results[index] = bool(valid)
+            # None: malformed, never cached (see run_verify)
+            if keys[index] is not None and valid is not None:
+                get_verify_cache().put(keys[index], valid)
+
+    if check_replay and REPLAY_PROTECTION:
+        guard = get_replay_guard()
+        for index in pending:
+            if results[index] and not guard.add(digests[index], circuit):
+                results[index] = False
+                replayed.append(index)
+
+    if replayed:
+        replays_rejected.inc(circuit, amount=len(replayed))
+
+    replayed_set = set(replayed)
+    invalid = [index for index, valid in enumerate(results) if not valid and index not in replayed_set]
+
+    if invalid:
+        verify_failures.inc(circuit, amount=len(invalid))
+
+    if not invalid and not replayed:
+        return {"status": "valid", "results": results, "message": "All proofs verified successfully"}
+
+    result = {
+        "status": "invalid",
+        "results": results,
+        "invalid": invalid,
+        "message": f"{len(invalid) + len(replayed)} of {len(results)} proofs failed verification"
+    }
+
+    if replayed:
+        result["replayed"] = sorted(replayed)
+
+    return result
+
+
+if __name__ == "__main__":
+
+    if "--prepare" in sys.argv:
+        prepare_verification_keys(rebuild=True)
+        for name in circuit_names():
+            print(f"{name}: {prepared_key_path(name)}")